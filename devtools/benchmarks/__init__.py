@@ -0,0 +1,5 @@
+"""
+Benchmarks for hot paths in Pyttman, comparing new implementations
+with the behavior they replace. Run them from the project's root
+directory, e.g. 'python -m devtools.benchmarks.tokenization'.
+"""
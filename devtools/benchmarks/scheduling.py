@@ -0,0 +1,56 @@
+"""
+Benchmarks the overhead of dispatching scheduled Jobs, by running
+a simulated day of Jobs on a VirtualClock with each scheduler
+engine. The Jobs do nothing, so the time measured is the time spent
+finding, firing, executing and rescheduling them.
+"""
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.append(Path.cwd().as_posix())
+
+from pyttman.tools.scheduling.clock import VirtualClock
+from pyttman.tools.scheduling.engines.heap import HeapSchedulerEngine
+from pyttman.tools.scheduling.engines.wheel import \
+    TimingWheelSchedulerEngine
+from pyttman.tools.scheduling.schedule import schedule
+
+# Jobs executing every minute, and every hour, over the simulated time.
+MINUTELY_JOBS = 20
+HOURLY_JOBS = 500
+SIMULATED = timedelta(days=1)
+STEP = timedelta(minutes=1)
+
+
+def noop(*_):
+    pass
+
+
+def simulate(engine_class) -> tuple[int, float]:
+    clock = VirtualClock(datetime(2024, 1, 1))
+    engine = engine_class(clock=clock)
+    jobs = [schedule.method(func=noop, recipient=noop, every=every,
+                            engine=engine)
+            for every, amount in (("minute", MINUTELY_JOBS),
+                                  ("hour", HOURLY_JOBS))
+            for _ in range(amount)]
+
+    started = time.perf_counter()
+    for _ in range(int(SIMULATED / STEP)):
+        clock.advance(STEP)
+        engine.settle()
+    seconds = time.perf_counter() - started
+
+    engine.shutdown()
+    schedule.name_job_map.popall(repr(noop), None)
+    return sum(job.trigger.amount_of_runs for job in jobs), seconds
+
+
+if __name__ == "__main__":
+    for engine_class in (HeapSchedulerEngine, TimingWheelSchedulerEngine):
+        executions, seconds = simulate(engine_class)
+        print(f"{engine_class.__name__:>28}: {executions} executions in "
+              f"{seconds:.2f} s, {seconds / executions * 1e6:6.1f} µs "
+              f"per execution")
@@ -0,0 +1,47 @@
+"""
+Benchmarks tokenizing a message and deriving the forms of its words
+used while routing it, comparing the Tokenizer middleware with the
+previous behavior where 'str.split' was used and the sanitized and
+lowered forms were recomputed with regexes every time they were read.
+"""
+import re
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.append(Path.cwd().as_posix())
+
+from pyttman.core.containers import Message
+
+MESSAGE = ("Hey there! Please add a new purchase of 3 coffee beans, "
+           "for 120.50 SEK, to my expenses - and remind me tomorrow "
+           "at 10:30 about the dentist appointment; thanks.")
+
+# The amount of Intents matched against each message, and the amount
+# of EntityFields parsing it, in the simulated app.
+INTENTS = 25
+ENTITY_FIELDS = 4
+NUMBER = 5000
+
+
+def legacy_routing():
+    content = MESSAGE.split()
+    for _ in range(INTENTS):
+        [re.sub(r"[^\w\s]", "", i).lower() for i in content]
+    for _ in range(ENTITY_FIELDS):
+        [i.lower() for i in content]
+
+
+def tokenized_routing():
+    message = Message(MESSAGE)
+    for _ in range(INTENTS):
+        message.sanitized_content()
+    for _ in range(ENTITY_FIELDS):
+        message.lowered_content()
+
+
+if __name__ == "__main__":
+    for name, func in (("legacy", legacy_routing),
+                       ("tokenizer", tokenized_routing)):
+        seconds = timeit.timeit(func, number=NUMBER)
+        print(f"{name:>10}: {seconds / NUMBER * 1e6:8.1f} µs per message")
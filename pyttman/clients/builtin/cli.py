@@ -1,3 +1,4 @@
+import asyncio
 import sys
 
 import pyttman
@@ -24,16 +25,23 @@ class CliClient(BaseClient):
                 reply: Reply | ReplyStream = self.\
                     message_router.get_reply(message)
 
-                if isinstance(reply, ReplyStream):
-                    while reply.qsize():
+                if isinstance(reply, ReplyStream) and reply.is_async:
+                    asyncio.run(self._print_async_stream(reply))
+                elif isinstance(reply, ReplyStream):
+                    for chunk in reply:
                         print(f"[{pyttman.settings.APP_NAME.upper()}]: ",
-                              reply.get().as_str())
+                              chunk.as_str())
                 elif isinstance(reply, Reply):
                     print(f"{pyttman.settings.APP_NAME}:", reply.as_str())
                 print()
         except (KeyboardInterrupt, EOFError):
             sys.exit(0)
 
+    @staticmethod
+    async def _print_async_stream(reply: ReplyStream):
+        async for chunk in reply:
+            print(f"[{pyttman.settings.APP_NAME.upper()}]: ", chunk.as_str())
+
     @staticmethod
     def publish(reply: Reply):
         print(reply.as_str())
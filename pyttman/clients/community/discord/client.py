@@ -4,7 +4,7 @@ from datetime import datetime
 import discord
 from discord import Intents
 
-from pyttman import logger
+from pyttman import logger, schedule
 from pyttman.core.middleware.routing import AbstractMessageRouter
 from pyttman.core.exceptions import ClientImproperlyConfiguredError
 from pyttman.clients.base import BaseClient
@@ -96,6 +96,8 @@ class DiscordClient(discord.Client, BaseClient):
                          intents=discord_intents)
 
     async def on_ready(self):
+        # Scheduler engines with native async support run Jobs in this loop
+        schedule.engine.attach(asyncio.get_running_loop())
         logger.log(f"App online on discord.")
 
     async def on_message(self, message: DiscordMessage) -> None:
@@ -140,8 +142,8 @@ class DiscordClient(discord.Client, BaseClient):
                 discord_message)
 
             if isinstance(reply, ReplyStream):
-                while reply.qsize():
-                    await discord_message.channel.send(reply.get().as_str())
+                async for chunk in reply:
+                    await discord_message.channel.send(chunk.as_str())
                     await asyncio.sleep(0.01)
             else:
                 await discord_message.channel.send(reply.as_str())
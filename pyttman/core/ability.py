@@ -1,10 +1,11 @@
 import inspect
-from typing import Tuple
+from typing import Tuple, Callable, Type
 
 from pyttman.core.intent import Intent
 from pyttman.core.internals import _generate_name
 from pyttman.core.mixins import PrettyReprMixin
-from pyttman.core.storage.basestorage import Storage
+from pyttman.core.storage.basestorage import Storage, BaseStorage
+from pyttman.core.storage.engines.base import AbstractStorageEngine
 
 
 class Ability(PrettyReprMixin):
@@ -26,16 +27,34 @@ class Ability(PrettyReprMixin):
     set up objects in the Storage object, or any other
     code that needs to run before the app starts - can
     be put in or called by the 'configure' method
+
+    The Storage object can be persisted by configuring a
+    storage engine for the Ability, in 'storage_engine'.
+    Provide the engine, or a callable returning one if it
+    should not be created until the Ability is:
+
+        storage_engine = SqliteStorageEngine("reminders.sqlite3")
+        storage_engine = functools.partial(SqliteStorageEngine,
+                                           "reminders.sqlite3")
+
+    The class of the Storage object is set in 'storage_class',
+    and is created with the keyword arguments in 'storage_options':
+
+        storage_class = EvictingStorage
+        storage_options = {"max_entries": 10_000, "ttl": 3600}
     """
     description = "Unavailable"
     intents: Tuple = None
+    storage_engine: AbstractStorageEngine | Callable | None = None
+    storage_class: Type[BaseStorage] = Storage
+    storage_options: dict = None
 
     __repr_fields__ = ("name",)
 
     def __init__(self, **kwargs):
         super().__init__()
 
-        self.storage = Storage()
+        self.storage = self.create_storage()
         self.name = _generate_name(self.__class__.__name__)
         self.before_create()
         [setattr(self, k, v) for k, v in kwargs.items()]
@@ -43,6 +62,17 @@ class Ability(PrettyReprMixin):
         if self.intents is not None:
             self.__validate_intents()
 
+    def create_storage(self) -> BaseStorage:
+        """
+        Create the Storage object for the Ability, shared by
+        its Intents.
+        """
+        engine = self.storage_engine
+        if callable(engine) and not isinstance(engine, AbstractStorageEngine):
+            engine = engine()
+        return self.storage_class(engine=engine,
+                                  **(self.storage_options or {}))
+
     def __validate_intents(self):
         """
         Assert that the tuple contains references to
@@ -1,10 +1,24 @@
-import re
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterator, Iterator
 from datetime import datetime
-from queue import Queue
-from typing import List, Iterable
+from itertools import islice
+from queue import Queue, Empty, Full
+from time import monotonic
+from typing import List, Iterable, AsyncGenerator, Generator, Callable
 
+from pyttman.core.exceptions import ReplyChannelClosed
+from pyttman.core.middleware.tokenization import (
+    AbstractTokenizer,
+    WhitespaceTokenizer,
+    Token,
+    SANITIZE_PATTERN
+)
 from pyttman.core.mixins import PrettyReprMixin
 
+# Returned by 'next' once a synchronous ReplyStream source is exhausted
+_exhausted = object()
+
 
 class MessageMixin(PrettyReprMixin):
     """
@@ -18,21 +32,34 @@ class MessageMixin(PrettyReprMixin):
     The MessageMixin class can be included in multiple
     inheritance when a Message-like class is developed
     for supporting a 3rd party library / API.
+
+    The content of the message is split in to Token objects
+    by the 'tokenizer', configured in settings.py with
+    MIDDLEWARE['TOKENIZER_CLASS']. The 'content' list holds
+    the raw words, while 'tokens' holds the Token objects
+    with all forms of each word, computed once.
+
+    Very large messages are tokenized no further than 'max_tokens',
+    configured with MIDDLEWARE['MAX_ROUTING_TOKENS']. Messages
+    which are cut short have 'truncated' set, and 'truncated_at'
+    holds the offset in the text where tokenization stopped. The
+    rest of the tokens can be read lazily with 'iter_tokens'.
     """
     __repr_fields__ = ("author", "created")
+    tokenizer: AbstractTokenizer = WhitespaceTokenizer()
+    max_tokens: int | None = None
 
     def __init__(self, content=None, **kwargs):
         self.author = "anonymous"
         self.created = datetime.now()
         self.client = None
+        self.truncated = False
+        self.truncated_at: int | None = None
+        self._text: str | None = None
+        self._content_with_format = None
         self.content = content
         self.entities = {}
 
-        try:
-            self.content_with_format = str(content).splitlines(keepends=True)
-        except ValueError:
-            self.content_with_format = None
-
         for k, v in kwargs.items():
             setattr(self, k, v)
 
@@ -45,21 +72,109 @@ class MessageMixin(PrettyReprMixin):
 
     @content.setter
     def content(self, val):
+        """
+        Tokenize the new content. The text of the message is
+        replaced with it, or cleared for lists of words - which
+        are then joined when the message is read as a string.
+        """
+        self.truncated, self.truncated_at = False, None
+        self._text, self._content_with_format = None, None
         if val is None:
-            self._content = ["None"]
+            tokens = [self.tokenizer.make_token("None")]
         elif isinstance(val, str):
-            self._content = val.split()
+            tokens = self._tokenize_text(val)
         elif isinstance(val, list) or isinstance(val, tuple):
-            self._content = [str(i) for i in val]
-        elif isinstance(val, dict):
-            self._content = str(val).split()
+            # Tokens from another message are kept along with their offsets
+            tokens = [i if isinstance(i, Token)
+                      else self.tokenizer.make_token(str(i)) for i in val]
         else:
             try:
-                self._content = repr(val).split()
+                tokens = self._tokenize_text(str(val))
             except Exception:
                 raise TypeError(f"content cannot be type {type(val)} "
                                 f"as it is could not be typecast to "
                                 f"str.")
+        self._set_tokens(tokens)
+
+    def _tokenize_text(self, text: str) -> List[Token]:
+        """
+        Tokenize the text, but no further than 'max_tokens'. The
+        text, and where it was truncated, is kept on the message.
+        """
+        self._text = text
+        if self.max_tokens is None:
+            return list(self.tokenizer.tokenize(text))
+
+        tokens = list(islice(self.tokenizer.tokenize(text),
+                             self.max_tokens + 1))
+        if len(tokens) > self.max_tokens:
+            self.truncated = True
+            self.truncated_at = tokens.pop().start
+        return tokens
+
+    @property
+    def content_with_format(self) -> List[str] | None:
+        """
+        The lines of the message text, with line breaks kept.
+        Materialized from the text when first accessed.
+        """
+        if self._content_with_format is None and self._text is not None:
+            self._content_with_format = self._text.splitlines(keepends=True)
+        return self._content_with_format
+
+    @content_with_format.setter
+    def content_with_format(self, val):
+        self._content_with_format = val
+        self._text = None
+
+    def iter_tokens(self) -> Iterator[Token]:
+        """
+        Yield the tokens of the message, and lazily continue to
+        tokenize the text past 'max_tokens' if the message was
+        truncated.
+        """
+        yield from self.tokens
+        if self.truncated_at is not None and self._text is not None:
+            yield from self.tokenizer.tokenize(self._text, self.truncated_at)
+
+    @property
+    def tokens(self) -> List[Token]:
+        """
+        The Token objects for the words in 'content', in order.
+        If 'content' was mutated since the message was tokenized,
+        the tokens are realigned with it.
+        :return: list, Token
+        """
+        if self._content != self._token_raws:
+            self._realign_tokens()
+        return self._tokens
+
+    def _set_tokens(self, tokens: List[Token]) -> None:
+        self._tokens = tokens
+        self._token_raws = [i.raw for i in tokens]
+        self._content = list(self._token_raws)
+        self._sanitized = None
+
+    def _realign_tokens(self) -> None:
+        """
+        Rebuild the token list after 'content' was mutated, keeping
+        the Token objects for words which remain in the content.
+        """
+        remaining: dict[str, deque[Token]] = {}
+        for token in self._tokens:
+            remaining.setdefault(token.raw, deque()).append(token)
+
+        tokens = []
+        for word in self._content:
+            try:
+                tokens.append(remaining[word].popleft())
+            except (KeyError, IndexError):
+                tokens.append(self.tokenizer.make_token(str(word)))
+        content = self._content
+        self._set_tokens(tokens)
+        # Keep the identity of the list which was mutated by the caller
+        content[:] = self._content
+        self._content = content
 
     def sanitized_content(self, preserve_case=False) -> List[str]:
         """
@@ -69,21 +184,21 @@ class MessageMixin(PrettyReprMixin):
         Case is preserved if preserve_case is True.
         :return: list
         """
-        out = []
-        for i in self.content:
-            sanitized = re.sub(r"[^\w\s]", "", i)
-            if preserve_case:
-                out.append(sanitized)
-            else:
-                out.append(sanitized.lower())
-        return out
+        if preserve_case:
+            return [SANITIZE_PATTERN.sub("", i) for i in self.content]
+        tokens = self.tokens
+        if self._sanitized is None:
+            self._sanitized = [i.sanitized for i in tokens]
+        return list(self._sanitized)
 
     def lowered_content(self) -> List[str]:
         """
-        Returns the content of the message case lowered.
+        Returns the content of the message case folded, which
+        is lowering the case of words and more - "Straße" is
+        folded to "strasse", so that it matches "STRASSE".
         :return: list, str
         """
-        return [i.lower() for i in self.content]
+        return [i.casefolded for i in self.tokens]
 
     def as_str(self, sanitized: bool = False) -> str:
         """
@@ -93,8 +208,10 @@ class MessageMixin(PrettyReprMixin):
         """
         if sanitized:
             return " ".join(self.sanitized_content())
-        elif self.content_with_format is not None:
-            return str().join(self.content_with_format)
+        elif self._text is not None:
+            return self._text
+        elif self._content_with_format is not None:
+            return str().join(self._content_with_format)
         return " ".join(self.content)
 
     def as_list(self, sanitized: bool = False) -> List:
@@ -142,13 +259,23 @@ class ReplyStream(Queue):
     the Reply class, whenever a collection of
     Reply objects are to be returned to the
     user. 
+
+    If the collection is a generator or iterator - sync
+    or async - it is not exhausted when the ReplyStream
+    is created. Elements are instead pulled from it while
+    the stream is iterated over, allowing clients to
+    deliver each Reply to the user as soon as it is
+    produced by the Intent.
     """
 
     def __init__(self, collection: Iterable = None):
         super().__init__()
+        self._source: Iterator | AsyncIterator | None = None
         if collection is not None:
             if isinstance(collection, str):
                 self.put(collection)
+            elif isinstance(collection, (Iterator, AsyncIterator)):
+                self._source = collection
             else:
                 try:
                     iter(collection)
@@ -157,9 +284,267 @@ class ReplyStream(Queue):
                 else:
                     [self.put(i) for i in collection]
 
-    def get(self, block=True, timeout=None):
+    def __iter__(self) -> Generator[Reply, None, None]:
+        """
+        Yield Reply objects from the stream, in order. Elements
+        from a lazy source are yielded as soon as they are produced.
+        :raise TypeError: The source is asynchronous - use 'async for'
         """
-        Remove and return an item from the ReplyStream.
+        while self.qsize():
+            yield self.get()
+        if self._source is None:
+            return
+        if isinstance(self._source, AsyncIterator):
+            raise TypeError("This ReplyStream is produced asynchronously "
+                            "and must be consumed with 'async for'.")
+        source, self._source = self._source, None
+        for element in source:
+            yield self._as_reply(element)
+
+    async def __aiter__(self) -> AsyncGenerator[Reply, None]:
+        """
+        Asynchronously yield Reply objects from the stream, in order.
+        Elements from synchronous sources are produced in an
+        executor, not to block the event loop.
         """
-        element = self._get()
+        while self.qsize():
+            yield self.get()
+        if self._source is None:
+            return
+        source, self._source = self._source, None
+        if isinstance(source, AsyncIterator):
+            async for element in source:
+                yield self._as_reply(element)
+        else:
+            loop = asyncio.get_running_loop()
+            while (element := await loop.run_in_executor(
+                    None, next, source, _exhausted)) is not _exhausted:
+                yield self._as_reply(element)
+
+    @property
+    def is_async(self) -> bool:
+        """
+        Returns whether the stream is produced asynchronously,
+        and must be consumed with 'async for'.
+        """
+        return isinstance(self._source, AsyncIterator)
+
+    @property
+    def is_lazy(self) -> bool:
+        """
+        Returns whether the stream still has elements which
+        are yet to be produced by its source.
+        """
+        return self._source is not None
+
+    @staticmethod
+    def _as_reply(element) -> Reply:
         return Reply(element) if not isinstance(element, Reply) else element
+
+    def get(self, block=True, timeout=None):
+        """
+        Remove and return an item from the ReplyStream. The
+        elements are put in the stream as it's created, so this
+        never waits for more to arrive - 'block' and 'timeout'
+        are ignored.
+        :raise queue.Empty: The stream is empty. Elements of a
+               lazy stream are only produced by iterating over it.
+        """
+        element = super().get(block=False)
+        return self._as_reply(element)
+
+
+class ReplyChannel(ReplyStream):
+    """
+    A bounded, thread-safe ReplyStream which is written to by
+    a producer - such as a thread doing background work for an
+    Intent, or a scheduled Job - while a client consumes it.
+
+    When the channel is full, 'put' blocks the producer until
+    the client has caught up, which keeps a fast producer from
+    growing the channel without bounds. The producer closes the
+    channel when it's done; consumers drain the remaining replies
+    and then stop.
+
+    example:
+        def respond(self, message):
+            channel = ReplyChannel(maxsize=10)
+            Thread(target=self.search, args=(channel,)).start()
+            return channel
+
+        def search(self, channel):
+            with channel:
+                for hit in self.find_hits():
+                    channel.put(hit)
+    """
+
+    def __init__(self, maxsize: int = 64):
+        super().__init__()
+        self.maxsize = maxsize
+        self._closed = False
+        # Coroutines waiting for a reply, or for room in the channel,
+        # as (event loop, future) pairs
+        self._async_getters: set[tuple] = set()
+        self._async_putters: set[tuple] = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __iter__(self) -> Generator[Reply, None, None]:
+        """
+        Yield Reply objects as they are put in the channel,
+        blocking while it's empty, until it's closed and drained.
+        """
+        while True:
+            try:
+                yield self.get()
+            except ReplyChannelClosed:
+                return
+
+    async def __aiter__(self) -> AsyncGenerator[Reply, None]:
+        """
+        Asynchronously yield Reply objects as they are put in the
+        channel. Waiting for the producer suspends the coroutine,
+        without blocking the event loop or a thread.
+        """
+        while True:
+            try:
+                yield self.get(block=False)
+            except Empty:
+                await self._wait_async(self._async_getters,
+                                       lambda: self._qsize() or self._closed)
+            except ReplyChannelClosed:
+                return
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def close(self) -> None:
+        """
+        Close the channel. Producers can no longer put replies
+        in it, and consumers stop once the remaining replies
+        have been consumed. Blocked producers and consumers are
+        woken up.
+        """
+        with self.mutex:
+            self._closed = True
+            self.not_empty.notify_all()
+            self.not_full.notify_all()
+            self._notify_async(self._async_getters)
+            self._notify_async(self._async_putters)
+
+    def put(self, item, block=True, timeout=None) -> None:
+        """
+        Put a reply in the channel, blocking while the channel is
+        full unless 'block' is False.
+        :raise ReplyChannelClosed: The channel is, or was while
+               waiting for room in it, closed.
+        :raise queue.Full: No room was available within 'timeout',
+               or immediately if 'block' is False.
+        """
+        with self.not_full:
+            if self._closed:
+                raise ReplyChannelClosed("Cannot put replies in a "
+                                         "closed ReplyChannel.")
+            if self.maxsize > 0:
+                deadline = None if timeout is None else monotonic() + timeout
+                while self._qsize() >= self.maxsize and not self._closed:
+                    if not block:
+                        raise Full
+                    if deadline is None:
+                        self.not_full.wait()
+                    elif (remaining := deadline - monotonic()) <= 0:
+                        raise Full
+                    else:
+                        self.not_full.wait(remaining)
+                if self._closed:
+                    raise ReplyChannelClosed("The ReplyChannel was closed "
+                                             "while waiting for room in it.")
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+            self._notify_async(self._async_getters)
+
+    async def aput(self, item) -> None:
+        """
+        Put a reply in the channel from a coroutine, which is
+        suspended while the channel is full.
+        :raise ReplyChannelClosed: The channel is, or was while
+               waiting for room in it, closed.
+        """
+        while True:
+            try:
+                self.put(item, block=False)
+                return
+            except Full:
+                await self._wait_async(
+                    self._async_putters,
+                    lambda: self._qsize() < self.maxsize or self._closed)
+
+    def get(self, block=True, timeout=None) -> Reply:
+        """
+        Remove and return a Reply from the channel, blocking
+        while it's empty unless 'block' is False.
+        :raise ReplyChannelClosed: The channel is closed and empty.
+        :raise queue.Empty: No reply was available within 'timeout',
+               or immediately if 'block' is False.
+        """
+        with self.not_empty:
+            deadline = None if timeout is None else monotonic() + timeout
+            while not self._qsize():
+                if self._closed:
+                    raise ReplyChannelClosed("The ReplyChannel is closed.")
+                if not block:
+                    raise Empty
+                if deadline is None:
+                    self.not_empty.wait()
+                elif (remaining := deadline - monotonic()) <= 0:
+                    raise Empty
+                else:
+                    self.not_empty.wait(remaining)
+            element = self._get()
+            self.not_full.notify()
+            self._notify_async(self._async_putters)
+        return self._as_reply(element)
+
+    async def _wait_async(self, waiters: set, ready: Callable[[], bool]):
+        """
+        Suspend the calling coroutine until 'ready' is true. The
+        producing or consuming thread wakes it through its event
+        loop, so no thread is blocked waiting - and a cancelled
+        coroutine leaves nothing behind.
+        """
+        loop = asyncio.get_running_loop()
+        with self.mutex:
+            if ready():
+                return
+            waiter = loop, loop.create_future()
+            waiters.add(waiter)
+        try:
+            await waiter[1]
+        finally:
+            with self.mutex:
+                waiters.discard(waiter)
+
+    @staticmethod
+    def _notify_async(waiters: set) -> None:
+        """
+        Wake the coroutines waiting in '_wait_async'. Call with
+        the mutex held.
+        """
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve, future)
+            except RuntimeError:
+                # The event loop of the waiter is closed
+                pass
+        waiters.clear()
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
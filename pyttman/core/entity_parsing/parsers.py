@@ -1,4 +1,3 @@
-import re
 import string
 import typing
 from itertools import zip_longest
@@ -127,12 +126,11 @@ class EntityFieldValueParser(PrettyReprMixin):
             word_index = 0
 
             message_lowered = message.lowered_content()
+            ignore_chars_table = str.maketrans("", "", self.chars_to_ignore)
             if self.ignore_chars:
                 # Strip away special chars
-                message_lowered = [
-                    re.sub(rf"[{self.chars_to_ignore}]", "", word)
-                    for word in message_lowered
-                ]
+                message_lowered = [word.translate(ignore_chars_table)
+                                   for word in message_lowered]
 
             common_occurrences = tuple(
                 OrderedSet(message_lowered).intersection(self.valid_strings))
@@ -156,10 +154,11 @@ class EntityFieldValueParser(PrettyReprMixin):
                 if self.ignore_chars:
                     if isinstance(self.value.value, list):
                         for i, elem in enumerate(self.value.value):
-                            elem = re.sub(rf"[{self.chars_to_ignore}]", "", elem)
-                            self.value.value[i] = elem
+                            self.value.value[i] = elem.translate(
+                                ignore_chars_table)
                     elif isinstance(self.value.value, str):
-                        self.value.value = re.sub(rf"[{self.chars_to_ignore}]", "", self.value.value)
+                        self.value.value = self.value.value.translate(
+                            ignore_chars_table)
                 entity = self.value
                 if entity.value == self.default:
                     return
@@ -201,7 +200,7 @@ class EntityFieldValueParser(PrettyReprMixin):
             if word == self.default:
                 continue
             try:
-                message.content.remove(word)
+                message.remove(word)
             except ValueError:
                 continue
 
@@ -34,3 +34,10 @@ class ClientImproperlyConfiguredError(BaseException):
     def __init__(self, message):
         super().__init__(message)
 
+
+class ReplyChannelClosed(Exception):
+    """
+    This error is raised when a reply is put in a ReplyChannel which
+    is closed, or when a consumer reads from a closed, drained channel.
+    """
+    pass
@@ -33,6 +33,13 @@ class AbstractIntent(abc.ABC):
         data, the use of the Storage object in the
         Intent instance is encouraged inside this
         method to store and retrieve information.
+
+        Replies can also be yielded, one at a time, making
+        this method a generator - sync or async. Clients
+        then deliver each Reply to the user as soon as it's
+        produced, rather than when all of them are. Note that
+        'after_respond' is then called before the replies are
+        produced.
         """
         pass
 
@@ -286,8 +293,13 @@ class BaseIntent(AbstractIntent, ABC, PrettyReprMixin):
 
     def after_respond(self, message: Message, reply: Reply) -> None:
         """
-        Implement this method to execute code before the App starts
-        and goes online to users.
+        Implement this method to execute code after an Intent has
+        responded to a message.
+
+        If 'respond' yields its replies, this method is called
+        before the client has consumed them - 'reply' is then a
+        lazy ReplyStream, and none of the code in 'respond' has
+        executed yet.
         """
         pass
 
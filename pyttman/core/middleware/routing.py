@@ -1,16 +1,20 @@
 import abc
+import inspect
 import random
 import warnings
 from copy import copy
-from typing import List, Any, Iterable
+from itertools import islice
+from typing import List, Any, Iterable, Generator, AsyncGenerator
 
 import pyttman
 from pyttman.core.exceptions import PyttmanProjectInvalidException
+from pyttman.core.entity_parsing.entity import Entity
 from pyttman.core.entity_parsing.parsers import parse_entities
 from pyttman.core.ability import Ability
 from pyttman.core.intent import Intent
 from pyttman.core.containers import MessageMixin, Reply, ReplyStream, Message
 from pyttman.core.internals import _generate_error_entry
+from pyttman.core.middleware.vocabulary import IntentIndex, Vocabulary
 
 
 class AbstractMessageRouter(abc.ABC):
@@ -34,15 +38,32 @@ class AbstractMessageRouter(abc.ABC):
     """
 
     help_keyword = "help"
+    entity_parsing_window: int | None = None
+    max_entity_parsing_tokens: int | None = None
 
     def __init__(self, abilities: List[Ability],
                  intent_unknown_responses: List[str],
                  help_keyword: str, **kwargs):
+        self.intent_index: IntentIndex | None = None
         self.abilities = abilities
         self.help_keyword = help_keyword
         self.intent_unknown_responses = intent_unknown_responses
         [setattr(self, k, v) for k, v in kwargs.items()]
 
+    @property
+    def abilities(self) -> Iterable[Ability]:
+        return self._abilities
+
+    @abilities.setter
+    def abilities(self, abilities: Iterable[Ability]):
+        """
+        Assigning abilities builds the Vocabulary for the app and
+        the IntentIndex over their Intents, used when routing.
+        """
+        self._abilities = abilities
+        if abilities is not None:
+            self.intent_index = IntentIndex(abilities)
+
     @abc.abstractmethod
     def get_matching_intent(self, message: MessageMixin) -> List[Intent]:
         """
@@ -71,7 +92,9 @@ class AbstractMessageRouter(abc.ABC):
     @staticmethod
     def process(message: Message,
                 intent: Intent,
-                keep_alive_on_exc=True) -> Reply | ReplyStream:
+                keep_alive_on_exc=True,
+                entity_parsing_window: int = None,
+                max_entity_parsing_tokens: int = None) -> Reply | ReplyStream:
         """
         Iterate over all EntityFieldValueParser objects and the name
         of the field it's allocated as.
@@ -84,6 +107,12 @@ class AbstractMessageRouter(abc.ABC):
         :param keep_alive_on_exc: Keeps the main loop running if exceptions
         occur in the application logic, and replies with an error message
         fetched from the application settings. Defaults to True.
+        :param entity_parsing_window: Optional amount of tokens to parse
+        for entities at a time. The message is then scanned in windows,
+        until all entities are found.
+        :param max_entity_parsing_tokens: Optional limit of how many tokens
+        in the message to parse for entities, in total. Defaults to the
+        tokens in 'message.content'.
         :return: Reply, logic defined in the 'respond' method
         """
         joined_patterns = set()
@@ -92,20 +121,36 @@ class AbstractMessageRouter(abc.ABC):
             joined_patterns.update(intent.lead)
         if intent.exclude_trail_in_entities is True:
             joined_patterns.update(intent.trail)
-        truncated_content = [i for i in message.content
-                             if i.casefold() not in joined_patterns]
-        truncated_message = Message(content=truncated_content)
-        entities: dict[str: Any] = parse_entities(
-            message=truncated_message,
-            entity_fields=intent.user_entity_fields,
-            original_message_content=copy(message.content),
-            exclude=intent.ignore_in_entities)
+
+        if entity_parsing_window or max_entity_parsing_tokens:
+            entities = _parse_entities_windowed(
+                message, intent, joined_patterns,
+                window=entity_parsing_window,
+                max_tokens=max_entity_parsing_tokens)
+        else:
+            truncated_content = [i for i in message.tokens
+                                 if i.casefolded not in joined_patterns]
+            truncated_message = Message(content=truncated_content)
+            entities: dict[str: Any] = parse_entities(
+                message=truncated_message,
+                entity_fields=intent.user_entity_fields,
+                original_message_content=copy(message.content),
+                exclude=intent.ignore_in_entities)
 
         message.entities = {k: v.value for k, v in entities.items()}
 
         try:
             intent.before_respond(message)
             reply: Reply | ReplyStream = intent.respond(message=message)
+
+            # Intents which yield their replies are consumed lazily by
+            # the client, which delivers each Reply as it is produced.
+            if inspect.isgenerator(reply):
+                reply = ReplyStream(_guarded_reply_generator(
+                    message, reply, keep_alive_on_exc))
+            elif inspect.isasyncgen(reply):
+                reply = ReplyStream(_guarded_async_reply_generator(
+                    message, reply, keep_alive_on_exc))
             intent.after_respond(message, reply)
         except Exception as e:
             reply = _generate_error_entry(message, e)
@@ -142,6 +187,84 @@ class AbstractMessageRouter(abc.ABC):
         return reply
 
 
+def _parse_entities_windowed(message: Message,
+                             intent: Intent,
+                             joined_patterns: set[str],
+                             window: int = None,
+                             max_tokens: int = None) -> dict[str, Entity]:
+    """
+    Parse a message for entities one window of tokens at a time,
+    which keeps the cost of parsing very large messages bounded.
+
+    Tokens are read lazily from the message - past its 'max_tokens'
+    if it was truncated - up to 'max_tokens' in total. Windows
+    overlap slightly, so that values next to a pre- or suffix at the
+    end of the previous window are found. The first value found for
+    an entity is kept, and the scan stops once all are found.
+    """
+    max_tokens = max_tokens or len(message.content)
+    window = max(1, min(window or max_tokens, max_tokens))
+    overlap = window // 4
+    stream = islice(message.iter_tokens(), max_tokens)
+    tokens = list(islice(stream, window))
+    entities: dict[str, Entity] = {}
+
+    while tokens:
+        truncated_message = Message(content=[
+            i for i in tokens if i.casefolded not in joined_patterns])
+        parsed = parse_entities(
+            message=truncated_message,
+            entity_fields=intent.user_entity_fields,
+            original_message_content=[i.raw for i in tokens],
+            exclude=intent.ignore_in_entities)
+
+        for name, entity in parsed.items():
+            if name not in entities or (entities[name].is_fallback_default
+                                        and not entity.is_fallback_default):
+                entities[name] = entity
+        for entity_field in intent.user_entity_fields.values():
+            entity_field.reset()
+
+        if not any(i.is_fallback_default for i in entities.values()):
+            break
+        if not (next_tokens := list(islice(stream, window - overlap))):
+            break
+        tokens = tokens[len(tokens) - overlap:] + next_tokens
+    return entities
+
+
+def _guarded_reply_generator(message: Message,
+                             replies: Generator,
+                             keep_alive_on_exc: bool = True) -> Generator:
+    """
+    Wraps a generator returned from an Intent, so that exceptions
+    raised while the client consumes it are handled as if they
+    were raised in 'respond'.
+    """
+    try:
+        yield from replies
+    except Exception as e:
+        if keep_alive_on_exc is False:
+            raise e
+        yield _generate_error_entry(message, e)
+
+
+async def _guarded_async_reply_generator(
+        message: Message,
+        replies: AsyncGenerator,
+        keep_alive_on_exc: bool = True) -> AsyncGenerator:
+    """
+    Async counterpart of '_guarded_reply_generator'.
+    """
+    try:
+        async for reply in replies:
+            yield reply
+    except Exception as e:
+        if keep_alive_on_exc is False:
+            raise e
+        yield _generate_error_entry(message, e)
+
+
 class FirstMatchingRouter(AbstractMessageRouter):
     """
     Iterates over intents linearly.
@@ -184,15 +307,20 @@ class FirstMatchingRouter(AbstractMessageRouter):
                 # else:
                 #  TODO - Return help chapter for ability
         try:
-            reply: Reply | ReplyStream = self.process(message=message,
-                                                      intent=chosen_intent)
+            reply: Reply | ReplyStream = self.process(
+                message=message,
+                intent=chosen_intent,
+                entity_parsing_window=self.entity_parsing_window,
+                max_entity_parsing_tokens=self.max_entity_parsing_tokens)
         except Exception as e:
             reply: Reply = _generate_error_entry(message, e)
         return reply
 
     def get_matching_intent(self, message: MessageMixin) -> List[Intent]:
         """
-        Perform a linear search over intents for abilities.
+        Select the Intents matching the message. Candidates are
+        selected through the IntentIndex with bitwise operations,
+        and only those are compared with the message - in order.
         The matching one first in the sequence is chosen to
         reply the user.
 
@@ -204,15 +332,23 @@ class FirstMatchingRouter(AbstractMessageRouter):
         :return: List of Intent instances which match the intent
         """
         matching_intents = []
-        for ability in self.abilities:
-            for intent in ability.intents:
-                try:
-                    intent = intent(storage=ability.storage,
-                                    ability=ability)
+        # Intern the message once, and compare Intents with it as ints
+        token_ids = self.intent_index.intern(message.sanitized_content())
+        first_index: dict[int, int] = {}
+        for position, word_id in enumerate(token_ids):
+            if word_id != Vocabulary.UNKNOWN:
+                first_index.setdefault(word_id, position)
+
+        for compiled in self.intent_index.candidates(token_ids):
+            try:
+                if compiled.overrides_matches:
+                    intent = compiled.create_intent()
                     if intent.matches(message):
                         matching_intents.append(intent)
-                except TypeError as e:
-                    raise TypeError(f"The intent {intent} did not behave"
-                                    f" as expected - see full traceback.") \
-                        from e
+                elif compiled.matches(token_ids, first_index):
+                    matching_intents.append(compiled.create_intent())
+            except TypeError as e:
+                raise TypeError(f"The intent {compiled.intent_class} did "
+                                f"not behave as expected - see full "
+                                f"traceback.") from e
         return matching_intents
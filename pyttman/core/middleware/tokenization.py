@@ -0,0 +1,127 @@
+"""
+This module defines the Tokenizer middleware in Pyttman.
+
+Tokenizers split the text of incoming messages in to Token
+objects, which carry the different forms of each word used
+by the routing and entity parsing layers, computed once
+per message. The tokenizer used in an app is configured
+in settings.py:
+
+    MIDDLEWARE = {
+        ...
+        "TOKENIZER_CLASS": "pyttman.core.middleware.tokenization.WhitespaceTokenizer"
+    }
+"""
+import abc
+import re
+from dataclasses import dataclass
+from typing import Iterator
+
+SANITIZE_PATTERN = re.compile(r"[^\w\s]")
+
+
+@dataclass(frozen=True, slots=True)
+class Token:
+    """
+    A Token represents a single word in a message, in the
+    forms in which Pyttman compares words with each other,
+    along with its position in the text it was found in.
+
+    :field raw: The word as written by the user.
+    :field casefolded: The word, case folded.
+    :field sanitized: The case folded word, stripped of all
+        symbols while digits are kept.
+    :field start: Index of the first character of the word in
+        the text it was tokenized from. None if the Token was
+        not created from a text, but from a single word.
+    :field end: Index after the last character of the word in
+        the text it was tokenized from, or None.
+    """
+    raw: str
+    casefolded: str
+    sanitized: str
+    start: int | None = None
+    end: int | None = None
+
+    def __str__(self):
+        return self.raw
+
+
+class AbstractTokenizer(abc.ABC):
+    """
+    Abstract class for a Tokenizer.
+
+    Subclasses implement 'tokenize', to split a text in to
+    Token objects. The 'make_token' method is used to create
+    a Token from a word, with all of its forms.
+    """
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}()"
+
+    @abc.abstractmethod
+    def tokenize(self, text: str, offset: int = 0) -> Iterator[Token]:
+        """
+        Split a text in to Token objects, lazily.
+        :param text: The text to tokenize
+        :param offset: Index in the text from where to start. Offsets
+                       of the tokens are still relative to the text.
+        :return: Iterator of Token objects, in order of appearance
+        """
+        pass
+
+    @staticmethod
+    def make_token(raw: str,
+                   start: int | None = None,
+                   end: int | None = None) -> Token:
+        """
+        Create a Token from a word, computing all its forms once.
+        :param raw: The word as written by the user
+        :param start: Optional start offset of the word in its text
+        :param end: Optional end offset of the word in its text
+        :return: Token
+        """
+        casefolded = raw.casefold()
+        # Plain alphanumeric words have nothing to sanitize
+        if casefolded.isalnum():
+            sanitized = casefolded
+        else:
+            sanitized = SANITIZE_PATTERN.sub("", casefolded)
+        return Token(raw, casefolded, sanitized, start, end)
+
+
+class RegexTokenizer(AbstractTokenizer):
+    """
+    Tokenizes text by a regular expression, where each match
+    of the 'pattern' is a Token. Subclass this class and define
+    'pattern' for custom word boundaries.
+    """
+    pattern = r"\S+"
+
+    def __init__(self, pattern: str = None):
+        self.pattern = re.compile(pattern or self.pattern)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(pattern={self.pattern.pattern})"
+
+    def tokenize(self, text: str, offset: int = 0) -> Iterator[Token]:
+        make_token = self.make_token
+        for match in self.pattern.finditer(text, offset):
+            yield make_token(match.group(), match.start(), match.end())
+
+
+class WhitespaceTokenizer(RegexTokenizer):
+    """
+    The default Tokenizer in Pyttman. Splits text by whitespace,
+    just like 'str.split', while keeping the offsets of words.
+    """
+    pattern = r"\S+"
+
+
+class PunctuationTokenizer(RegexTokenizer):
+    """
+    Splits text by whitespace, and also separates punctuation
+    from the words it's written next to: "Hi, there!" is split
+    in to "Hi", ",", "there", "!".
+    """
+    pattern = r"\w+(?:['’]\w+)*|[^\w\s]"
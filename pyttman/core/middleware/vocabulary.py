@@ -0,0 +1,200 @@
+"""
+This module defines the Vocabulary and IntentIndex classes, used by
+MessageRouter classes to select Intents for a message by comparing
+integers rather than strings.
+
+The Vocabulary is built when the app is loaded, from the words which
+route messages: 'lead' and 'trail' in Intents. Messages are then
+interned to integer ids once when they enter the router.
+"""
+from array import array
+from typing import Iterable, Iterator, Type
+
+from pyttman.core.intent import Intent, BaseIntent
+from pyttman.core.mixins import PrettyReprMixin
+
+
+class Vocabulary(PrettyReprMixin):
+    """
+    App-wide mapping between words and integer ids.
+    Words which are not part of the vocabulary are
+    interned as 'Vocabulary.UNKNOWN'.
+    """
+    __repr_fields__ = ("size",)
+    UNKNOWN = -1
+
+    def __init__(self, words: Iterable[str] = None):
+        self._ids: dict[str, int] = {}
+        self._words: list[str] = []
+        for word in words or ():
+            self.add(word)
+
+    def __len__(self):
+        return len(self._words)
+
+    def __contains__(self, word):
+        return word in self._ids
+
+    @property
+    def size(self) -> int:
+        return len(self._words)
+
+    def add(self, word: str) -> int:
+        """
+        Add a word to the vocabulary, if it's not already in it.
+        :return: int, id of the word
+        """
+        if (word_id := self._ids.get(word)) is None:
+            word_id = self._ids[word] = len(self._words)
+            self._words.append(word)
+        return word_id
+
+    def id_of(self, word: str) -> int:
+        """
+        Return the id of a word, or Vocabulary.UNKNOWN.
+        """
+        return self._ids.get(word, self.UNKNOWN)
+
+    def word_of(self, word_id: int) -> str:
+        """
+        Return the word for an id.
+        :raise IndexError: The id is not in the vocabulary
+        """
+        return self._words[word_id]
+
+    def intern(self, words: Iterable[str]) -> array:
+        """
+        Map words to their ids, in order.
+        :param words: Words to intern, such as the sanitized content
+                      of a message
+        :return: array of ints
+        """
+        get, unknown = self._ids.get, self.UNKNOWN
+        return array("l", [get(word, unknown) for word in words])
+
+    @classmethod
+    def from_abilities(cls, abilities: Iterable) -> "Vocabulary":
+        """
+        Build the Vocabulary for an app, from the Intents in its
+        abilities.
+        """
+        vocabulary = cls()
+        for ability in abilities:
+            for intent_class in ability.intents or ():
+                for word in (*(intent_class.lead or ()),
+                             *(intent_class.trail or ())):
+                    vocabulary.add(word.casefold())
+        return vocabulary
+
+
+class CompiledIntent(PrettyReprMixin):
+    """
+    The 'lead' and 'trail' of an Intent class, as ids in a
+    Vocabulary. Matches messages with the same rules as
+    'BaseIntent.matches', using integer comparisons.
+    """
+    __repr_fields__ = ("intent_class", "lead", "trail", "ordered")
+
+    def __init__(self, ability, intent_class: Type[Intent],
+                 vocabulary: Vocabulary):
+        self.ability = ability
+        self.intent_class = intent_class
+        self.ordered = intent_class.ordered
+        self.lead = tuple(vocabulary.add(i.casefold())
+                          for i in intent_class.lead or ())
+        self.trail = tuple(vocabulary.add(i.casefold())
+                           for i in intent_class.trail or ())
+        self.lead_set = frozenset(self.lead)
+        self.trail_set = frozenset(self.trail)
+
+        # Intents which implement their own matching are always
+        # candidates, and decide for themselves whether they match.
+        self.overrides_matches = intent_class.matches is not BaseIntent.matches
+
+    def create_intent(self) -> Intent:
+        return self.intent_class(storage=self.ability.storage,
+                                 ability=self.ability)
+
+    def matches(self, token_ids: array, first_index: dict[int, int]) -> bool:
+        """
+        Tell whether an interned message matches the Intent.
+        :param token_ids: The sanitized content of the message, interned
+        :param first_index: The first position of each id in the message
+        """
+        if not (match_lead := [i for i in self.lead if i in first_index]):
+            return False
+        if self.ordered and not self._assert_ordered(token_ids):
+            return False
+        if not self.trail:
+            return True
+        if not (match_trail := [i for i in self.trail if i in first_index]):
+            return False
+        latest_lead = max(0, *(first_index[i] for i in match_lead))
+        latest_trail = max(0, *(first_index[i] for i in match_trail))
+        return latest_trail > latest_lead
+
+    def _assert_ordered(self, token_ids: array) -> bool:
+        for ids, id_set in ((self.lead, self.lead_set),
+                            (self.trail, self.trail_set)):
+            occurring = [i for i in token_ids if i in id_set]
+            if any(a != b for a, b in zip(occurring, ids)):
+                return False
+        return True
+
+
+class IntentIndex(PrettyReprMixin):
+    """
+    Index over all Intents in an app, where each Intent is a bit
+    in an integer bitset. For every word id in the Vocabulary, the
+    index holds the set of Intents with the word in their 'lead',
+    and in their 'trail'. Candidate Intents for a message are then
+    selected with bitwise operations on these sets.
+    """
+    __repr_fields__ = ("vocabulary",)
+
+    def __init__(self, abilities: Iterable, vocabulary: Vocabulary = None):
+        self.vocabulary = vocabulary or Vocabulary.from_abilities(abilities)
+        self.intents: list[CompiledIntent] = []
+        self._lead_index: dict[int, int] = {}
+        self._trail_index: dict[int, int] = {}
+        self._without_trail = 0
+        self._always_candidates = 0
+
+        for ability in abilities:
+            for intent_class in ability.intents or ():
+                self._add(CompiledIntent(ability, intent_class,
+                                         self.vocabulary))
+
+    def _add(self, compiled: CompiledIntent) -> None:
+        bit = 1 << len(self.intents)
+        self.intents.append(compiled)
+        if compiled.overrides_matches:
+            self._always_candidates |= bit
+        if not compiled.trail:
+            self._without_trail |= bit
+        for index, ids in ((self._lead_index, compiled.lead_set),
+                           (self._trail_index, compiled.trail_set)):
+            for word_id in ids:
+                index[word_id] = index.get(word_id, 0) | bit
+
+    def intern(self, words: Iterable[str]) -> array:
+        return self.vocabulary.intern(words)
+
+    def candidates(self, token_ids: array) -> Iterator[CompiledIntent]:
+        """
+        Yield the Intents which have a word from their 'lead' in the
+        message, and a word from their 'trail' if they have one, in
+        the order they're defined in.
+        """
+        lead_hits, trail_hits = 0, 0
+        lead_index, trail_index = self._lead_index, self._trail_index
+        for word_id in set(token_ids):
+            lead_hits |= lead_index.get(word_id, 0)
+            trail_hits |= trail_index.get(word_id, 0)
+
+        bits = lead_hits & (trail_hits | self._without_trail)
+        bits |= self._always_candidates
+        while bits:
+            lowest = bits & -bits
+            yield self.intents[lowest.bit_length() - 1]
+            bits ^= lowest
@@ -5,7 +5,12 @@ in Pyttman.
 import abc
 from abc import ABC
 from collections import UserDict
-from typing import Any
+from typing import Any, Callable, Iterable, Iterator, Mapping
+
+from pyttman.core.storage.engines.base import AbstractStorageEngine
+from pyttman.core.storage.indexes import StorageIndex
+
+_MISSING = object()
 
 
 class AbstractStorage(UserDict, abc.ABC):
@@ -36,6 +41,10 @@ class AbstractStorage(UserDict, abc.ABC):
     def get(self, key) -> Any:
         pass
 
+    @abc.abstractmethod
+    def delete(self, key: Any):
+        pass
+
     @abc.abstractmethod
     def dump(self):
         pass
@@ -45,6 +54,37 @@ class AbstractStorage(UserDict, abc.ABC):
         pass
 
 
+class StorageSnapshot(Mapping):
+    """
+    A read-only view of the items in a Storage object, as they
+    were when the snapshot was taken. Changes made to the Storage
+    afterwards are not seen in the snapshot, so it can be read at
+    length, and from other threads, while the Storage is changed.
+
+    The snapshot is shallow: objects stored in the Storage which
+    are changed in place, are changed in the snapshot as well.
+    """
+    __slots__ = ("_data",)
+
+    def __init__(self, data: dict):
+        self._data = data
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(keys={self._data.keys()})"
+
+    def __getitem__(self, item):
+        return self._data[item]
+
+    def __contains__(self, item):
+        return item in self._data
+
+    def __iter__(self) -> Iterator:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
 class BaseStorage(AbstractStorage, ABC):
     """
     Base Storage class for cache based storage in
@@ -57,13 +97,42 @@ class BaseStorage(AbstractStorage, ABC):
     Subclasses can easily integrate a file or
     database storage backend by implementing
     the 'synchronize' method.
+
+    Snapshots of the storage are taken in constant time with
+    'snapshot'. The snapshot shares the dict of the storage,
+    which is copied on the first change made after it: that
+    change costs a copy of every item, while the ones after it
+    don't. Snapshots suit storages read in full far more often
+    than they're changed - taking one between every write copies
+    the dict every time. Nothing guards the copy from races
+    between threads here: to take snapshots while other threads
+    change the storage, use the ConcurrentStorage, which
+    serializes them with its locks.
+
+    Items can be found by something else than their key, through
+    secondary indexes added with 'add_index', by binary search:
+
+        storage.add_index("due", lambda reminder: reminder.due)
+        storage.query_range("due", high=datetime.now())
+
+    Every change to 'self.data' is made through '_set' and '_unset',
+    which copy the dict when needed and keep the indexes updated.
     """
+    _shared = False
+    _indexes: dict[str, StorageIndex] = {}
+
     def __repr__(self):
         return f"{self.__class__.__name__}(keys={self.data.keys()})"
 
     def __contains__(self, item):
         return item in self.data
 
+    def __iter__(self):
+        # Iterate over a list of the keys, so the storage can be
+        # changed meanwhile, without copying the dict on the next change
+        self._load_all()
+        return iter(list(self.data))
+
     def __getitem__(self, item):
         """
         Behaves just like dict.__getitem__.
@@ -77,6 +146,12 @@ class BaseStorage(AbstractStorage, ABC):
             raise KeyError("Pyttman.Storage: No item stored "
                            f"under key which matches '{item}'")
 
+    def __setitem__(self, key, item):
+        self.put(key, item)
+
+    def __delitem__(self, key):
+        self.delete(key)
+
     def put(self, key: Any, item: Any):
         """
         Store an object in the Storage object, equivalent to
@@ -85,7 +160,20 @@ class BaseStorage(AbstractStorage, ABC):
         :param item: Any, the actual object to store
         :return: None
         """
-        self.data[key] = item
+        self._set(key, item)
+
+    def delete(self, key: Any):
+        """
+        Delete a stored object by provided key, equivalent
+        to `del my_dict[key]`.
+        :param key: Any, key for the stored object
+        :return: None
+        :raises: KeyError if key not present in self.data
+        """
+        if key not in self.data:
+            raise KeyError("Pyttman.Storage: No item stored "
+                           f"under key which matches '{key}'")
+        self._unset(key)
 
     def get(self, key) -> Any:
         """
@@ -98,8 +186,414 @@ class BaseStorage(AbstractStorage, ABC):
         """
         return self.data.get(key)
 
+    def get_many(self, keys: Iterable[Any]) -> dict[Any, Any]:
+        """
+        Get several stored objects at once.
+        :param keys: Keys for the requested objects
+        :return: dict with the keys which have an object stored
+        """
+        return {key: self[key] for key in keys if key in self}
+
+    def put_many(self, items: Mapping[Any, Any] | Iterable[tuple[Any, Any]]):
+        """
+        Store several objects at once.
+        :param items: Mapping, or iterable of (key, item) tuples
+        :return: None
+        """
+        for key, item in dict(items).items():
+            self.put(key, item)
+
+    def delete_many(self, keys: Iterable[Any]):
+        """
+        Delete several stored objects at once. Keys without an
+        object stored are ignored.
+        :param keys: Keys for the stored objects
+        :return: None
+        """
+        for key in keys:
+            if key in self:
+                self.delete(key)
+
+    def snapshot(self) -> StorageSnapshot:
+        """
+        Take a snapshot of the items in the storage, in constant
+        time. Readers of the snapshot see the items as they were
+        when it was taken, while the storage can be changed - by
+        other threads only if it's a ConcurrentStorage. The first
+        change after it copies the dict of the storage, in time
+        linear in the amount of items.
+        :return: StorageSnapshot
+        """
+        self._shared = True
+        return StorageSnapshot(self.data)
+
+    def add_index(self, name: str, extractor: Callable[[Any], Any]) -> None:
+        """
+        Add a secondary index of the stored items, by the value the
+        'extractor' returns for each item. The index is kept updated
+        as items are stored and deleted. See StorageIndex.
+        :param name: Name of the index, used to query it
+        :param extractor: Callable taking a stored item, returning the
+                          value to index it by
+        :return: None
+        """
+        index = StorageIndex(name, extractor)
+        for key, item in self.data.items():
+            index.add(key, item)
+        self._indexes = {**self._indexes, name: index}
+
+    def drop_index(self, name: str) -> None:
+        """
+        Remove a secondary index.
+        :param name: Name of the index
+        :return: None
+        """
+        self._indexes = {k: v for k, v in self._indexes.items() if k != name}
+
+    def query(self, index: str, value: Any) -> list:
+        """
+        Get the stored objects indexed by a value in an index.
+        :param index: Name of the index
+        :param value: The indexed value
+        :return: list of the stored objects
+        """
+        self._load_all()
+        return self._items_of(self._indexes[index].equal(value))
+
+    def query_range(self,
+                    index: str,
+                    low: Any = None,
+                    high: Any = None,
+                    include_low: bool = True,
+                    include_high: bool = False) -> list:
+        """
+        Get the stored objects indexed by values between 'low' and
+        'high' in an index, in order of their indexed value.
+        :param index: Name of the index
+        :param low: Lowest value, or None for no lower bound
+        :param high: Highest value, or None for no upper bound
+        :param include_low: Whether objects indexed by 'low' are included
+        :param include_high: Whether objects indexed by 'high' are included
+        :return: list of the stored objects
+        """
+        self._load_all()
+        keys = self._indexes[index].range(low, high,
+                                          include_low, include_high)
+        return self._items_of(keys)
+
+    def _items_of(self, keys: list) -> list:
+        # Keys may have been deleted since they were found
+        data = self.data
+        return [data[key] for key in keys if key in data]
+
+    def _load_all(self) -> None:
+        """
+        Storage objects which read their items lazily read all of
+        them in to memory, before they're queried.
+        """
+        pass
+
+    def _set(self, key: Any, item: Any) -> None:
+        """
+        Store an item in 'self.data'. The indexes are updated first,
+        so that an item which can't be indexed is not stored, and
+        the indexes are restored as they were.
+        :raises: TypeError if the item is indexed by a value which
+                 is not comparable to those of other items
+        """
+        updated = []
+        try:
+            for index in self._indexes.values():
+                index.add(key, item)
+                updated.append(index)
+        except Exception:
+            for index in updated:
+                if key in self.data:
+                    index.add(key, self.data[key])
+                else:
+                    index.remove(key)
+            raise
+        self._prepare_write()
+        self.data[key] = item
+
+    def _unset(self, key: Any) -> Any:
+        """
+        Remove an item from 'self.data'.
+        :return: The removed item
+        :raises: KeyError if key not present in self.data
+        """
+        self._prepare_write()
+        item = self.data.pop(key)
+        for index in self._indexes.values():
+            index.remove(key)
+        return item
+
+    def _reindex(self) -> None:
+        """
+        Rebuild the indexes, after 'self.data' was replaced.
+        """
+        for index in self._indexes.values():
+            index.clear()
+            for key, item in self.data.items():
+                index.add(key, item)
+
+    def _prepare_write(self) -> None:
+        """
+        Copy the dict of the storage before it's changed, if it's
+        shared with a snapshot.
+        """
+        if self._shared:
+            self.data = dict(self.data)
+            self._shared = False
+
+    async def aget(self, key) -> Any:
+        """
+        Get a stored object by provided key, like 'get', without
+        blocking the event loop. Storage objects in memory only
+        complete right away.
+        :param key: Any, key for requested object
+        :return: Any
+        """
+        return self.get(key)
+
+    async def aput(self, key: Any, item: Any):
+        """
+        Store an object, like 'put', without blocking the event loop.
+        :param key: Any, key for the stored object
+        :param item: Any, the actual object to store
+        :return: None
+        """
+        self.put(key, item)
+
+    async def adelete(self, key: Any):
+        """
+        Delete a stored object, like 'delete', without blocking
+        the event loop.
+        :param key: Any, key for the stored object
+        :return: None
+        :raises: KeyError if key not present
+        """
+        self.delete(key)
+
+    async def aget_many(self, keys: Iterable[Any]) -> dict[Any, Any]:
+        """
+        Get several stored objects at once.
+        :param keys: Keys for the requested objects
+        :return: dict with the keys which have an object stored
+        """
+        return self.get_many(keys)
+
+    async def aput_many(self, items: Mapping[Any, Any]
+                                     | Iterable[tuple[Any, Any]]):
+        """
+        Store several objects at once.
+        :param items: Mapping, or iterable of (key, item) tuples
+        :return: None
+        """
+        self.put_many(items)
+
+    async def adelete_many(self, keys: Iterable[Any]):
+        """
+        Delete several stored objects at once. Keys without an
+        object stored are ignored.
+        :param keys: Keys for the stored objects
+        :return: None
+        """
+        self.delete_many(keys)
+
 
 class Storage(BaseStorage):
+    """
+    The Storage class is the default Storage in Pyttman, which
+    every Ability has one of.
+
+    A storage engine can be configured, to persist the items
+    in the Storage. Items are then written through to the engine
+    as they're stored, while reads are served from memory. Items
+    are read from the engine lazily, when they're first accessed,
+    so that the time it takes to start an app does not grow with
+    the amount of stored data. Iterating over the Storage, or
+    getting its length, reads all items from the engine once.
+
+    The async API reads from and writes to the engine with its
+    async methods, which don't block the event loop, while items
+    in memory are returned right away.
+    """
+    def __init__(self,
+                 engine: AbstractStorageEngine = None,
+                 indexes: dict[str, Callable[[Any], Any]] = None,
+                 **kwargs):
+        """
+        :param engine: Optional storage engine
+        :param indexes: Optional secondary indexes to add, by name
+        """
+        self.engine = engine
+        self._loaded = engine is None
+        super().__init__(**kwargs)
+        for name, extractor in (indexes or {}).items():
+            self.add_index(name, extractor)
+
+    def __contains__(self, item):
+        return item in self.data or self._read_through(item) is not _MISSING
+
+    def __getitem__(self, item):
+        if item in self.data:
+            return self.data[item]
+        if (value := self._read_through(item)) is not _MISSING:
+            return value
+        raise KeyError("Pyttman.Storage: No item stored "
+                       f"under key which matches '{item}'")
+
+    def __len__(self):
+        self._load_all()
+        return len(self.data)
+
+    def snapshot(self) -> StorageSnapshot:
+        """
+        Take a snapshot of all items in the storage. Items are read
+        from the engine first, if they were not yet.
+        """
+        self._load_all()
+        return super().snapshot()
+
+    def _read_through(self, key: Any) -> Any:
+        """
+        Read a key from the engine in to memory, if the Storage
+        was not loaded in full yet.
+        """
+        if self._loaded:
+            return _MISSING
+        try:
+            value = self.engine.read(key)
+        except KeyError:
+            return _MISSING
+        return self._remember(key, value)
+
+    def _remember(self, key: Any, value: Any) -> Any:
+        """
+        Keep a value read from the engine in memory. A value stored
+        while it was being read takes precedence.
+        """
+        if key not in self.data:
+            self._set(key, value)
+        return self.data[key]
+
+    def _store(self, key: Any, item: Any) -> None:
+        """
+        Store an item in memory, without writing it to the engine.
+        """
+        self._set(key, item)
+
+    def _discard(self, key: Any) -> None:
+        """
+        Remove an item from memory, without deleting it from the engine.
+        """
+        if key in self.data:
+            self._unset(key)
+
+    def _needs_read(self, key: Any) -> bool:
+        return not self._loaded and key not in self.data
+
+    def _load_all(self) -> None:
+        """
+        Read all items from the engine which are not in memory yet.
+        """
+        if self._loaded:
+            return
+        for key, value in self.engine.read_all():
+            if key not in self.data:
+                self._set(key, value)
+        self._loaded = True
+
+    def put(self, key: Any, item: Any):
+        self._store(key, item)
+        if self.engine is not None:
+            self.engine.write(key, item)
+
+    def get(self, key) -> Any:
+        if key in self.data:
+            return self.data[key]
+        if (value := self._read_through(key)) is not _MISSING:
+            return value
+        return None
+
+    def delete(self, key: Any):
+        if key not in self:
+            raise KeyError("Pyttman.Storage: No item stored "
+                           f"under key which matches '{key}'")
+        self._discard(key)
+        if self.engine is not None:
+            self.engine.delete(key)
+
+    def get_many(self, keys: Iterable[Any]) -> dict[Any, Any]:
+        keys = list(keys)
+        if missing := [key for key in keys if self._needs_read(key)]:
+            for key, value in self.engine.read_many(missing).items():
+                self._remember(key, value)
+        return {key: self.get(key) for key in keys if key in self.data}
+
+    def put_many(self, items: Mapping[Any, Any] | Iterable[tuple[Any, Any]]):
+        items = dict(items)
+        for key, item in items.items():
+            self._store(key, item)
+        if self.engine is not None:
+            self.engine.write_many(items.items())
+
+    def delete_many(self, keys: Iterable[Any]):
+        keys = list(keys)
+        for key in keys:
+            self._discard(key)
+        if self.engine is not None:
+            self.engine.delete_many(keys)
+
+    async def aget(self, key) -> Any:
+        if self._needs_read(key):
+            try:
+                self._remember(key, await self.engine.aread(key))
+            except KeyError:
+                return None
+        return self.get(key)
+
+    async def aput(self, key: Any, item: Any):
+        self._store(key, item)
+        if self.engine is not None:
+            await self.engine.awrite(key, item)
+
+    async def adelete(self, key: Any):
+        if self._needs_read(key):
+            try:
+                self._remember(key, await self.engine.aread(key))
+            except KeyError:
+                pass
+        if key not in self.data:
+            raise KeyError("Pyttman.Storage: No item stored "
+                           f"under key which matches '{key}'")
+        self._discard(key)
+        if self.engine is not None:
+            await self.engine.adelete(key)
+
+    async def aget_many(self, keys: Iterable[Any]) -> dict[Any, Any]:
+        keys = list(keys)
+        if missing := [key for key in keys if self._needs_read(key)]:
+            for key, value in (await self.engine.aread_many(missing)).items():
+                self._remember(key, value)
+        return {key: self.get(key) for key in keys if key in self.data}
+
+    async def aput_many(self, items: Mapping[Any, Any]
+                                     | Iterable[tuple[Any, Any]]):
+        items = dict(items)
+        for key, item in items.items():
+            self._store(key, item)
+        if self.engine is not None:
+            await self.engine.awrite_many(items.items())
+
+    async def adelete_many(self, keys: Iterable[Any]):
+        keys = list(keys)
+        for key in keys:
+            self._discard(key)
+        if self.engine is not None:
+            await self.engine.adelete_many(keys)
+
     def dump(self):
         """
         Dump the storage to set backend type.
@@ -107,18 +601,28 @@ class Storage(BaseStorage):
         in storage.engines
         :return:
         """
-        raise NotImplementedError("Dumping the Storage object is not "
-                                  "implemented in this version of Pyttman, "
-                                  "but will be available in a future release.")
+        self._assert_engine()
+        self._load_all()
+        self.engine.dump(self.data.items())
 
     def synchronize(self):
         """
         Synchronize the storage object with set
-        storage engine. In case of the SqlEngine,
+        storage engine. In case of the SqliteStorageEngine,
         this would synchronize the Storage object
-        with an SQL database.
+        with an SQLite database.
         :return:
         """
-        raise NotImplementedError("Synchronizing is not implemented "
-                                  "in this version of Pyttman, but will "
-                                  "be available in a future release.")
+        self._assert_engine()
+        self.engine.flush()
+        self.data = dict(self.engine.read_all())
+        self._shared = False
+        self._loaded = True
+        self._reindex()
+
+    def _assert_engine(self):
+        if self.engine is None:
+            raise NotImplementedError(
+                "This Storage has no storage engine to dump to or "
+                "synchronize with. Configure one for the Ability with "
+                "'storage_engine', from pyttman.core.storage.engines.")
@@ -0,0 +1,208 @@
+"""
+This module defines the ConcurrentStorage, a thread safe Storage
+with atomic operations for read-modify-write sequences.
+"""
+import contextlib
+import threading
+from typing import Any, Callable
+
+from pyttman.core.storage.basestorage import Storage, StorageSnapshot, \
+    _MISSING
+from pyttman.core.storage.engines.base import AbstractStorageEngine
+
+
+class ConcurrentStorage(Storage):
+    """
+    A thread safe Storage, for Abilities whose Storage is used by
+    Intents, scheduled jobs and lifecycle hooks at the same time.
+    Configure it for an Ability with:
+
+        class CounterAbility(Ability):
+            storage_class = ConcurrentStorage
+
+    Keys are spread over 'stripes' locks by their hash, so that
+    operations on different keys rarely wait for each other, while
+    operations on the same key are serialized. Besides 'put', 'get'
+    and 'delete', the Storage offers atomic operations for the
+    read-modify-write sequences which otherwise race:
+
+        storage.incr("messages")
+        storage.setdefault("users", {})
+        storage.compare_and_set("state", "idle", "busy")
+        storage.update_with("seen", lambda seen: (seen or set()) | {user})
+
+    For other sequences, the lock of a key is held with 'locked':
+
+        with storage.locked("balance"):
+            storage["balance"] = storage["balance"] - cost
+
+    Callables given to 'update_with', and code run while holding
+    'locked', may use the same key again, but should not use other
+    keys, since their locks could be held by other threads waiting
+    for this one.
+    """
+
+    def __init__(self,
+                 engine: AbstractStorageEngine = None,
+                 stripes: int = 64,
+                 **kwargs):
+        """
+        :param engine: Optional storage engine
+        :param stripes: Amount of locks the keys are spread over
+        """
+        self._locks = tuple(threading.RLock() for _ in range(stripes))
+        self._load_lock = threading.Lock()
+        self._copy_lock = threading.Lock()
+        super().__init__(engine=engine, **kwargs)
+
+    def locked(self, key: Any) -> threading.RLock:
+        """
+        The lock guarding a key, to use as a context manager
+        around sequences of operations on the key.
+        """
+        return self._locks[hash(key) % len(self._locks)]
+
+    def __getitem__(self, item):
+        with self.locked(item):
+            return super().__getitem__(item)
+
+    def __contains__(self, item):
+        with self.locked(item):
+            return super().__contains__(item)
+
+    def _load_all(self) -> None:
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+            for key, value in self.engine.read_all():
+                with self.locked(key):
+                    if key not in self.data:
+                        self._set(key, value)
+            self._loaded = True
+
+    def snapshot(self) -> StorageSnapshot:
+        """
+        Take a snapshot of the items in the storage. Every lock is
+        held meanwhile, so that no change is half made when the
+        snapshot is taken, which takes constant time. Writers
+        do wait for the first change after it, though, which
+        copies the dict of the storage while holding its lock.
+        """
+        self._load_all()
+        with contextlib.ExitStack() as stack:
+            for lock in self._locks:
+                stack.enter_context(lock)
+            return super().snapshot()
+
+    def _prepare_write(self) -> None:
+        # Writers of different keys may race to copy the dict
+        if self._shared:
+            with self._copy_lock:
+                super()._prepare_write()
+
+    def put(self, key: Any, item: Any):
+        with self.locked(key):
+            super().put(key, item)
+
+    def get(self, key, default: Any = None) -> Any:
+        with self.locked(key):
+            if (value := self._get(key)) is not _MISSING:
+                return value
+            return default
+
+    def delete(self, key: Any):
+        with self.locked(key):
+            super().delete(key)
+
+    def pop(self, key: Any, default: Any = _MISSING) -> Any:
+        """
+        Atomically delete and return the object stored under
+        a key, or return 'default' if nothing is stored under it.
+        :raises: KeyError if key not present, and no default is given
+        """
+        with self.locked(key):
+            if (value := self._get(key)) is _MISSING:
+                if default is _MISSING:
+                    raise KeyError("Pyttman.Storage: No item stored "
+                                   f"under key which matches '{key}'")
+                return default
+            super().delete(key)
+            return value
+
+    def setdefault(self, key: Any, default: Any = None) -> Any:
+        """
+        Atomically store 'default' under a key if nothing is
+        stored under it yet.
+        :return: The object stored under the key
+        """
+        with self.locked(key):
+            if (value := self._get(key)) is not _MISSING:
+                return value
+            super().put(key, default)
+            return default
+
+    def incr(self, key: Any, amount: int | float = 1,
+             initial: int | float = 0) -> int | float:
+        """
+        Atomically increment the number stored under a key.
+        :param amount: Amount to add, which may be negative
+        :param initial: Number to start from if nothing is stored
+        :return: The incremented number
+        """
+        with self.locked(key):
+            value = self._get(key)
+            value = (initial if value is _MISSING else value) + amount
+            super().put(key, value)
+            return value
+
+    def compare_and_set(self, key: Any, expected: Any, new: Any) -> bool:
+        """
+        Atomically store 'new' under a key, if the object stored
+        under it equals 'expected'. A key with nothing stored under
+        it equals None.
+        :return: True if 'new' was stored, else False
+        """
+        with self.locked(key):
+            value = self._get(key)
+            if (None if value is _MISSING else value) != expected:
+                return False
+            super().put(key, new)
+            return True
+
+    def update_with(self, key: Any, func: Callable[[Any], Any],
+                    default: Any = None) -> Any:
+        """
+        Atomically replace the object stored under a key with
+        the return value of 'func', called with the object.
+        :param func: Callable taking the stored object, or 'default'
+                     if nothing is stored, and returning the new one
+        :return: The new object
+        """
+        with self.locked(key):
+            value = self._get(key)
+            value = func(default if value is _MISSING else value)
+            super().put(key, value)
+            return value
+
+    def _remember(self, key: Any, value: Any) -> Any:
+        with self.locked(key):
+            return super()._remember(key, value)
+
+    def _store(self, key: Any, item: Any) -> None:
+        with self.locked(key):
+            super()._store(key, item)
+
+    def _discard(self, key: Any) -> None:
+        with self.locked(key):
+            super()._discard(key)
+
+    def _get(self, key: Any) -> Any:
+        """
+        Get the object stored under a key, or _MISSING.
+        Called with the lock of the key held.
+        """
+        if key in self.data:
+            return self.data[key]
+        return self._read_through(key)
@@ -0,0 +1,173 @@
+"""
+This module defines the base class for storage engines, which
+persist the contents of Storage objects in Pyttman.
+"""
+import abc
+import asyncio
+import functools
+from typing import Any, Callable, Iterable, Iterator
+
+
+class AbstractStorageEngine(abc.ABC):
+    """
+    Abstract storage engine class.
+
+    A storage engine persists the items in a Storage object.
+    The Storage keeps its items in memory for reads, and writes
+    each change through to its engine - which may buffer and
+    batch the writes as it sees fit, as long as 'read' reflects
+    every write made.
+
+    Engines are configured per Ability, with 'storage_engine':
+
+        class ReminderAbility(Ability):
+            storage_engine = SqliteStorageEngine("reminders.sqlite3")
+
+    Engines must not open files or connections until they're
+    first used, since they're created when the Ability class is.
+
+    The async methods are used by the async API of the Storage.
+    By default, they call the sync methods in an executor if the
+    engine is 'blocking', and right away otherwise. Engines with
+    an async driver override them to use it natively.
+    """
+
+    blocking = True
+    """
+    Whether the engine performs blocking I/O.
+    """
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}()"
+
+    @abc.abstractmethod
+    def read(self, key: Any) -> Any:
+        """
+        Read the value stored under a key.
+        :raise KeyError: Nothing is stored under the key
+        """
+        pass
+
+    @abc.abstractmethod
+    def read_all(self) -> Iterator[tuple[Any, Any]]:
+        """
+        Read all items stored in the engine.
+        :return: Iterator of (key, value) tuples
+        """
+        pass
+
+    @abc.abstractmethod
+    def write(self, key: Any, value: Any) -> None:
+        """
+        Store a value under a key.
+        """
+        pass
+
+    @abc.abstractmethod
+    def delete(self, key: Any) -> None:
+        """
+        Delete the value stored under a key, if any.
+        """
+        pass
+
+    @abc.abstractmethod
+    def clear(self) -> None:
+        """
+        Delete all items stored in the engine.
+        """
+        pass
+
+    def read_many(self, keys: Iterable[Any]) -> dict[Any, Any]:
+        """
+        Read the values stored under several keys, at once.
+        :return: dict with the keys which have a value stored
+        """
+        found = {}
+        for key in keys:
+            try:
+                found[key] = self.read(key)
+            except KeyError:
+                pass
+        return found
+
+    def write_many(self, items: Iterable[tuple[Any, Any]]) -> None:
+        """
+        Store several values, at once.
+        """
+        for key, value in items:
+            self.write(key, value)
+
+    def delete_many(self, keys: Iterable[Any]) -> None:
+        """
+        Delete the values stored under several keys, at once.
+        """
+        for key in keys:
+            self.delete(key)
+
+    def dump(self, items: Iterable[tuple[Any, Any]]) -> None:
+        """
+        Replace all items stored in the engine with 'items'.
+        """
+        self.clear()
+        self.write_many(items)
+        self.flush()
+
+    def flush(self) -> None:
+        """
+        Persist all buffered writes, blocking until they're durable.
+        """
+        pass
+
+    def close(self) -> None:
+        """
+        Flush buffered writes and release files and connections.
+        """
+        self.flush()
+
+    async def _offload(self, func: Callable, *args) -> Any:
+        """
+        Call a sync method without blocking the event loop, if
+        the engine performs blocking I/O.
+        """
+        if not self.blocking:
+            return func(*args)
+        return await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(func, *args))
+
+    async def aread(self, key: Any) -> Any:
+        """
+        Read the value stored under a key.
+        :raise KeyError: Nothing is stored under the key
+        """
+        return await self._offload(self.read, key)
+
+    async def aread_many(self, keys: Iterable[Any]) -> dict[Any, Any]:
+        """
+        Read the values stored under several keys, at once.
+        :return: dict with the keys which have a value stored
+        """
+        return await self._offload(self.read_many, keys)
+
+    async def awrite(self, key: Any, value: Any) -> None:
+        """
+        Store a value under a key.
+        """
+        await self._offload(self.write, key, value)
+
+    async def awrite_many(self, items: Iterable[tuple[Any, Any]]) -> None:
+        """
+        Store several values, at once.
+        """
+        await self._offload(self.write_many, items)
+
+    async def adelete(self, key: Any) -> None:
+        """
+        Delete the value stored under a key, if any.
+        """
+        await self._offload(self.delete, key)
+
+    async def adelete_many(self, keys: Iterable[Any]) -> None:
+        """
+        Delete the values stored under several keys, at once.
+        """
+        await self._offload(self.delete_many, keys)
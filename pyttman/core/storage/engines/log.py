@@ -0,0 +1,531 @@
+"""
+This module defines the append-only log storage engine, persisting
+Storage objects as a log of records on disk, which is compacted
+in the background as records are overwritten.
+"""
+import atexit
+import mmap
+import os
+import pickle
+import struct
+import threading
+import warnings
+import zlib
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+import pyttman
+from pyttman.core.storage.engines.base import AbstractStorageEngine
+from pyttman.core.storage.serializers import AbstractSerializer, \
+    PickleSerializer
+
+_LOG_MAGIC = b"PYTTMAN-LOG\x00"
+_HINT_MAGIC = b"PYTTMAN-HNT\x00"
+
+# magic, generation
+_FILE_HEADER = struct.Struct("<12s8s")
+# crc32, flags, key length, value length. The crc covers the
+# record from the flags to the end of the value.
+_RECORD_HEADER = struct.Struct("<IBII")
+_RECORD_BODY_HEADER = struct.Struct("<BII")
+_CRC = struct.Struct("<I")
+# magic, generation, size of the log covered by the hint file
+_HINT_HEADER = struct.Struct("<12s8sQ")
+# key length, value offset, value length
+_HINT_ENTRY = struct.Struct("<IQI")
+
+_PUT = 0
+_DELETE = 1
+
+
+class LogStorageEngine(AbstractStorageEngine):
+    """
+    Persists Storage items as records appended to a log file,
+    in the spirit of Bitcask.
+
+    Every write appends a single record to the log, and every
+    delete appends a tombstone - no matter how large the Storage
+    is. Records are written to the file right away, while fsync
+    is batched: the log is synced at most every 'sync_interval'
+    seconds by a background thread, or when 'flush' is called.
+
+    An index in memory maps each key to the position of its
+    latest value in the log, which is read through a memory map.
+    When the engine is closed, the index is saved to a hint file
+    next to the log, which is read through a memory map when the
+    engine is opened again. Only records written after the hint
+    file need to be scanned, so starting up is proportional to
+    the amount of keys, not to the history of the log.
+
+    Overwritten and deleted records are dead weight in the log.
+    When more than 'compaction_threshold' of the log is dead,
+    and the log is at least 'min_compaction_size' bytes large,
+    it's rewritten with only the live records in a background
+    thread, while writes continue.
+
+    Keys are pickled, so they should be of types with a stable
+    pickled form, such as str and int. Values are serialized by
+    the 'serializer', a PickleSerializer by default. The parts of
+    serialized values are written to the log one by one, so large
+    binary values are not copied on their way to the file.
+    """
+
+    def __init__(self,
+                 path: str | Path,
+                 sync_interval: float = 0.1,
+                 compaction_threshold: float = 0.5,
+                 min_compaction_size: int = 1 << 20,
+                 serializer: AbstractSerializer = None):
+        """
+        :param path: Directory to keep the log and hint file in.
+               It's created if needed.
+        :param sync_interval: Seconds between each fsync of the log,
+               while there are writes to sync.
+        :param compaction_threshold: Share of dead records in the log,
+               between 0 and 1, which triggers a compaction.
+        :param min_compaction_size: Size in bytes the log must reach
+               before it's compacted.
+        :param serializer: Serializer for the values
+        """
+        self.path = Path(path)
+        self.log_path = self.path / "storage.log"
+        self.hint_path = self.path / "storage.hint"
+        self.sync_interval = sync_interval
+        self.compaction_threshold = compaction_threshold
+        self.min_compaction_size = min_compaction_size
+        self.serializer = serializer or PickleSerializer()
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._compaction_lock = threading.Lock()
+        self._index: dict[bytes, tuple[int, int]] = {}
+        self._file = None
+        self._map: mmap.mmap | None = None
+        self._generation = b""
+        self._size = 0
+        self._dead_bytes = 0
+        self._dirty = False
+        self._compacting = False
+        self._closing = False
+        self._syncer: threading.Thread | None = None
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(path={self.path})"
+
+    @staticmethod
+    def _encode_key(key: Any) -> bytes:
+        return pickle.dumps(key, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _decode_key(data: bytes) -> Any:
+        return pickle.loads(data)
+
+    @staticmethod
+    def _record_size(encoded_key: bytes, value_length: int) -> int:
+        return _RECORD_HEADER.size + len(encoded_key) + value_length
+
+    def _log_error(self, exc: Exception) -> None:
+        message = f"{self} failed to maintain its log '{self.log_path}': {exc}"
+        try:
+            pyttman.logger.log(level="error", message=message)
+        except Exception:
+            warnings.warn(message)
+
+    def _open(self) -> None:
+        """
+        Open the log, recover the index and start the sync thread,
+        the first time the engine is used.
+        """
+        with self._lock:
+            if self._file is not None:
+                return
+            self.path.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.log_path, "a+b")
+            if os.fstat(self._file.fileno()).st_size < _FILE_HEADER.size:
+                self._start_log()
+            self._recover()
+            self._closing = False
+            self._syncer = threading.Thread(target=self._run_syncer,
+                                            name=f"{self!r} syncer",
+                                            daemon=True)
+            self._syncer.start()
+        atexit.register(self.close)
+
+    def _start_log(self) -> None:
+        """
+        Truncate the log and write its header, with a new generation.
+        The generation ties a hint file to the log it was made from.
+        """
+        self._file.truncate(0)
+        self._generation = os.urandom(8)
+        self._file.write(_FILE_HEADER.pack(_LOG_MAGIC, self._generation))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _remap(self) -> None:
+        """
+        Map the log in its current size, for reads.
+        """
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if os.fstat(self._file.fileno()).st_size:
+            self._map = mmap.mmap(self._file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+
+    def _recover(self) -> None:
+        """
+        Build the index from the hint file, if it matches the log,
+        and scan the records written after it. A record torn by a
+        crash at the end of the log is truncated.
+        """
+        self._remap()
+        magic, generation = _FILE_HEADER.unpack_from(self._map, 0)
+        if magic != _LOG_MAGIC:
+            raise ValueError(f"'{self.log_path}' is not a Pyttman storage log")
+        self._generation = generation
+        self._index = {}
+        position = self._load_hint() or _FILE_HEADER.size
+        end = self._scan(position)
+        if end < len(self._map):
+            self._map.close()
+            self._map = None
+            self._file.truncate(end)
+            self._remap()
+        self._size = end
+        self._dead_bytes = self._count_dead_bytes()
+
+    def _load_hint(self) -> int | None:
+        """
+        Load the index from the hint file.
+        :return: Size of the log covered by the hint file, or None
+                 if there's no hint file valid for the log.
+        """
+        index = {}
+        try:
+            with open(self.hint_path, "rb") as file, \
+                    mmap.mmap(file.fileno(), 0,
+                              access=mmap.ACCESS_READ) as hint:
+                magic, generation, size = _HINT_HEADER.unpack_from(hint, 0)
+                if magic != _HINT_MAGIC or generation != self._generation \
+                        or size > len(self._map):
+                    return None
+                position = _HINT_HEADER.size
+                while position < len(hint):
+                    key_length, offset, value_length = \
+                        _HINT_ENTRY.unpack_from(hint, position)
+                    position += _HINT_ENTRY.size
+                    index[hint[position:position + key_length]] = \
+                        (offset, value_length)
+                    position += key_length
+        except (OSError, ValueError, struct.error):
+            return None
+        self._index = index
+        return size
+
+    def _scan(self, position: int) -> int:
+        """
+        Apply the records in the log from 'position' to the index.
+        :return: Position after the last intact record
+        """
+        data, index = self._map, self._index
+        end = len(data)
+        while position + _RECORD_HEADER.size <= end:
+            crc, flags, key_length, value_length = \
+                _RECORD_HEADER.unpack_from(data, position)
+            key_start = position + _RECORD_HEADER.size
+            value_start = key_start + key_length
+            record_end = value_start + value_length
+            if record_end > end or \
+                    zlib.crc32(data[position + _CRC.size:record_end]) != crc:
+                break
+            key = data[key_start:value_start]
+            if flags == _PUT:
+                index[key] = (value_start, value_length)
+            else:
+                index.pop(key, None)
+            position = record_end
+        return position
+
+    def _count_dead_bytes(self) -> int:
+        live = sum(self._record_size(key, length)
+                   for key, (_, length) in self._index.items())
+        return self._size - _FILE_HEADER.size - live
+
+    def _write_hint(self,
+                    index: dict[bytes, tuple[int, int]],
+                    size: int,
+                    generation: bytes) -> None:
+        """
+        Save the index, valid for the first 'size' bytes of the log,
+        to the hint file. The log must be synced up to 'size'.
+        """
+        temporary_path = self.hint_path.with_suffix(".tmp")
+        with open(temporary_path, "wb") as file:
+            file.write(_HINT_HEADER.pack(_HINT_MAGIC, generation, size))
+            for key, (offset, length) in index.items():
+                file.write(_HINT_ENTRY.pack(len(key), offset, length))
+                file.write(key)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, self.hint_path)
+
+    def _append(self, records: Iterable[tuple[bytes, int, list]]) -> None:
+        """
+        Append records to the log, under a single acquisition of the lock.
+        :param records: (encoded key, flags, value parts) tuples
+        """
+        encoded = []
+        for encoded_key, flags, parts in records:
+            value_length = sum(len(part) for part in parts)
+            header = _RECORD_BODY_HEADER.pack(flags, len(encoded_key),
+                                              value_length) + encoded_key
+            crc = zlib.crc32(header)
+            for part in parts:
+                crc = zlib.crc32(part, crc)
+            encoded.append((encoded_key, flags, _CRC.pack(crc) + header,
+                            parts, value_length))
+
+        with self._wakeup:
+            write = self._file.write
+            for encoded_key, flags, header, parts, value_length in encoded:
+                position = self._size
+                write(header)
+                for part in parts:
+                    write(part)
+                record_size = len(header) + value_length
+                self._size += record_size
+                previous = self._index.pop(encoded_key, None)
+                if previous is not None:
+                    self._dead_bytes += self._record_size(encoded_key,
+                                                          previous[1])
+                if flags == _PUT:
+                    self._index[encoded_key] = (position + len(header),
+                                                value_length)
+                else:
+                    self._dead_bytes += record_size
+            if not self._dirty:
+                self._dirty = True
+                self._wakeup.notify()
+            self._maybe_compact()
+
+    def _maybe_compact(self) -> None:
+        """
+        Start a compaction in the background, if enough of the log
+        is dead. Called with the lock held.
+        """
+        if self._compacting or self._size < self.min_compaction_size or \
+                self._dead_bytes <= self._size * self.compaction_threshold:
+            return
+        self._compacting = True
+        threading.Thread(target=self._run_compaction,
+                         name=f"{self!r} compaction",
+                         daemon=True).start()
+
+    def _run_compaction(self) -> None:
+        try:
+            with self._compaction_lock:
+                if self._file is not None and not self._closing:
+                    self._compact()
+        except Exception as e:
+            self._log_error(e)
+        finally:
+            with self._lock:
+                self._compacting = False
+
+    def _run_syncer(self) -> None:
+        """
+        Sync the log at most every 'sync_interval' seconds, while
+        there are writes to sync, until the engine is closed.
+        """
+        while True:
+            with self._wakeup:
+                self._wakeup.wait_for(lambda: self._dirty or self._closing)
+                if self._closing:
+                    return
+                self._wakeup.wait_for(lambda: self._closing,
+                                      timeout=self.sync_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                self._log_error(e)
+
+    def read(self, key: Any) -> Any:
+        found = self.read_many((key,))
+        if key not in found:
+            raise KeyError(key)
+        return found[key]
+
+    def read_many(self, keys: Iterable[Any]) -> dict[Any, Any]:
+        if self._file is None:
+            self._open()
+        values = {}
+        with self._lock:
+            for key in keys:
+                location = self._index.get(self._encode_key(key))
+                if location is None:
+                    continue
+                offset, length = location
+                if self._map is None or offset + length > len(self._map):
+                    self._file.flush()
+                    self._remap()
+                values[key] = self._map[offset:offset + length]
+        return {key: self.serializer.loads(value)
+                for key, value in values.items()}
+
+    def read_all(self) -> Iterator[tuple[Any, Any]]:
+        if self._file is None:
+            self._open()
+        with self._lock:
+            self._file.flush()
+            self._remap()
+            items = [(key, self._map[offset:offset + length])
+                     for key, (offset, length) in self._index.items()]
+        for key, value in items:
+            yield self._decode_key(key), self.serializer.loads(value)
+
+    def write(self, key: Any, value: Any) -> None:
+        self.write_many(((key, value),))
+
+    def write_many(self, items: Iterable[tuple[Any, Any]]) -> None:
+        if self._file is None:
+            self._open()
+        dumps_parts = self.serializer.dumps_parts
+        self._append((self._encode_key(key), _PUT, dumps_parts(value))
+                     for key, value in items)
+
+    def delete(self, key: Any) -> None:
+        self.delete_many((key,))
+
+    def delete_many(self, keys: Iterable[Any]) -> None:
+        if self._file is None:
+            self._open()
+        encoded_keys = [self._encode_key(key) for key in keys]
+        with self._lock:
+            encoded_keys = [encoded_key for encoded_key in encoded_keys
+                            if encoded_key in self._index]
+        self._append((encoded_key, _DELETE, [])
+                     for encoded_key in encoded_keys)
+
+    def clear(self) -> None:
+        if self._file is None:
+            self._open()
+        with self._compaction_lock, self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._start_log()
+            self._remap()
+            self._index = {}
+            self._size = _FILE_HEADER.size
+            self._dead_bytes = 0
+            self._dirty = False
+            self.hint_path.unlink(missing_ok=True)
+
+    def flush(self) -> None:
+        """
+        Sync the log to disk. The file descriptor is duplicated so
+        the fsync doesn't block writes to the log meanwhile.
+        """
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.flush()
+            self._dirty = False
+            descriptor = os.dup(self._file.fileno())
+        try:
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
+
+    def compact(self) -> None:
+        """
+        Rewrite the log with only its live records. Writes made while
+        the live records are copied are carried over to the new log,
+        which then replaces the old one. This is done automatically in
+        the background, when enough of the log is dead.
+        """
+        if self._file is None:
+            self._open()
+        with self._compaction_lock:
+            self._compact()
+
+    def _compact(self) -> None:
+        with self._lock:
+            self._file.flush()
+            snapshot = dict(self._index)
+            snapshot_end = self._size
+        generation = os.urandom(8)
+        compacted_path = self.log_path.with_suffix(".compacting")
+        relocated = {}
+        with open(self.log_path, "rb") as source_file, \
+                open(compacted_path, "wb") as target:
+            source = mmap.mmap(source_file.fileno(), snapshot_end,
+                               access=mmap.ACCESS_READ)
+            try:
+                target.write(_FILE_HEADER.pack(_LOG_MAGIC, generation))
+                position = _FILE_HEADER.size
+                for key, (offset, length) in snapshot.items():
+                    record_start = offset - _RECORD_HEADER.size - len(key)
+                    target.write(source[record_start:offset + length])
+                    relocated[key] = (offset,
+                                      position + offset - record_start)
+                    position += offset + length - record_start
+            finally:
+                source.close()
+            target.flush()
+            os.fsync(target.fileno())
+
+            with self._lock:
+                # Carry over the records appended while compacting
+                self._file.flush()
+                source_file.seek(snapshot_end)
+                tail = source_file.read(self._size - snapshot_end)
+                target.write(tail)
+                target.flush()
+                os.fsync(target.fileno())
+
+                shift = position - snapshot_end
+                index = {}
+                for key, (offset, length) in self._index.items():
+                    if offset > snapshot_end:
+                        index[key] = (offset + shift, length)
+                    else:
+                        index[key] = (relocated[key][1], length)
+
+                self._map.close()
+                self._map = None
+                self._file.close()
+                os.replace(compacted_path, self.log_path)
+                self._file = open(self.log_path, "a+b")
+                self._remap()
+                self._generation = generation
+                self._index = index
+                self._size = position + len(tail)
+                self._dead_bytes = self._count_dead_bytes()
+                size = self._size
+        self._write_hint(index, size, generation)
+
+    def close(self) -> None:
+        """
+        Stop the background threads, sync the log, save the hint file
+        and close the log. The engine reopens if it's used again.
+        """
+        with self._wakeup:
+            if self._file is None:
+                return
+            self._closing = True
+            self._wakeup.notify_all()
+        if self._syncer is not threading.current_thread():
+            self._syncer.join()
+        with self._compaction_lock:
+            self.flush()
+            with self._lock:
+                self._write_hint(self._index, self._size, self._generation)
+                if self._map is not None:
+                    self._map.close()
+                    self._map = None
+                self._file.close()
+                self._file = None
+                self._syncer = None
+        atexit.unregister(self.close)
@@ -0,0 +1,283 @@
+"""
+This module defines the SQLite storage engine, persisting Storage
+objects in a local SQLite database using only the standard library.
+"""
+import atexit
+import pickle
+import sqlite3
+import threading
+import warnings
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+import pyttman
+from pyttman.core.storage.engines.base import AbstractStorageEngine
+from pyttman.core.storage.serializers import AbstractSerializer, \
+    PickleSerializer
+
+_DELETED = object()
+
+
+class SqliteStorageEngine(AbstractStorageEngine):
+    """
+    Persists Storage items in a table in an SQLite database.
+
+    Writes are buffered in memory and committed by a background
+    thread, in batches: either when 'flush_interval' seconds have
+    passed since the first buffered write, or when 'max_batch_size'
+    writes are buffered. Repeated writes to the same key between
+    two commits are coalesced to one. Reads see buffered writes
+    before they are committed.
+
+    The database runs in WAL mode, so reads are not blocked by the
+    commits of the writer thread. Buffered writes are flushed when
+    the interpreter exits, and can be flushed at any time with
+    'flush'.
+
+    Keys are pickled, so they should be of types with a stable
+    pickled form, such as str and int. Values are serialized by
+    the 'serializer', a PickleSerializer by default.
+    """
+
+    def __init__(self,
+                 path: str | Path,
+                 table: str = "storage",
+                 flush_interval: float = 0.2,
+                 max_batch_size: int = 512,
+                 serializer: AbstractSerializer = None):
+        """
+        :param path: Path to the database file. It's created if needed.
+        :param table: Name of the table to store the items in. Several
+               engines can share a database file, using different tables.
+        :param flush_interval: Seconds to buffer writes before committing
+        :param max_batch_size: Amount of buffered writes which triggers
+               a commit right away
+        :param serializer: Serializer for the values
+        """
+        if not table.isidentifier():
+            raise ValueError(f"'{table}' is not a valid table name")
+        self.path = Path(path)
+        self.table = table
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        self.serializer = serializer or PickleSerializer()
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._write_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self._pending: dict[bytes, tuple[Any, Any]] = {}
+        self._in_flight: dict[bytes, tuple[Any, Any]] = {}
+        self._write_connection: sqlite3.Connection | None = None
+        self._read_connection: sqlite3.Connection | None = None
+        self._writer: threading.Thread | None = None
+        self._closing = False
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(path={self.path}, " \
+               f"table={self.table})"
+
+    @staticmethod
+    def _encode_key(key: Any) -> bytes:
+        return pickle.dumps(key, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _decode_key(data: bytes) -> Any:
+        return pickle.loads(data)
+
+    def _connect(self) -> None:
+        """
+        Open the database, create the table and start the writer
+        thread, the first time the engine is used.
+        """
+        with self._lock:
+            if self._write_connection is not None:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connections = []
+            for _ in range(2):
+                connection = sqlite3.connect(self.path,
+                                             check_same_thread=False,
+                                             isolation_level=None)
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute("PRAGMA synchronous=NORMAL")
+                connections.append(connection)
+            self._write_connection, self._read_connection = connections
+            self._write_connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} "
+                f"(key BLOB PRIMARY KEY, value BLOB NOT NULL) WITHOUT ROWID")
+            self._closing = False
+            self._writer = threading.Thread(target=self._run_writer,
+                                            name=f"{self!r} writer",
+                                            daemon=True)
+            self._writer.start()
+        atexit.register(self.close)
+
+    def _run_writer(self) -> None:
+        """
+        Commit buffered writes in batches, until the engine is closed.
+        """
+        while True:
+            with self._wakeup:
+                self._wakeup.wait_for(lambda: self._pending or self._closing)
+                if self._closing:
+                    return
+                # Give more writes the chance to join this commit
+                self._wakeup.wait_for(
+                    lambda: len(self._pending) >= self.max_batch_size
+                    or self._closing, timeout=self.flush_interval)
+            self._commit_pending()
+
+    def _commit_pending(self) -> None:
+        """
+        Commit all buffered writes in a single transaction.
+        """
+        with self._write_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._in_flight = batch
+            if not batch:
+                return
+            writes, deletes = [], []
+            for encoded_key, (_, value) in batch.items():
+                if value is _DELETED:
+                    deletes.append((encoded_key,))
+                else:
+                    writes.append((encoded_key, self.serializer.dumps(value)))
+            connection = self._write_connection
+            try:
+                connection.execute("BEGIN")
+                connection.executemany(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value) "
+                    f"VALUES (?, ?)", writes)
+                connection.executemany(
+                    f"DELETE FROM {self.table} WHERE key = ?", deletes)
+                connection.execute("COMMIT")
+            except Exception as e:
+                if connection.in_transaction:
+                    connection.execute("ROLLBACK")
+                # Keep the writes for the next commit, unless overwritten
+                with self._lock:
+                    for encoded_key, item in batch.items():
+                        self._pending.setdefault(encoded_key, item)
+                self._log_error(e)
+            finally:
+                with self._lock:
+                    self._in_flight = {}
+
+    def _log_error(self, exc: Exception) -> None:
+        message = f"{self} could not commit writes to '{self.path}': {exc}"
+        try:
+            pyttman.logger.log(level="error", message=message)
+        except Exception:
+            warnings.warn(message)
+
+    def _buffer(self, items: Iterable[tuple[Any, Any]]) -> None:
+        self._connect()
+        encoded = [(self._encode_key(key), (key, value))
+                   for key, value in items]
+        with self._wakeup:
+            was_empty = not self._pending
+            self._pending.update(encoded)
+            if was_empty or len(self._pending) >= self.max_batch_size:
+                self._wakeup.notify()
+
+    def read(self, key: Any) -> Any:
+        found = self.read_many((key,))
+        if key not in found:
+            raise KeyError(key)
+        return found[key]
+
+    def read_many(self, keys: Iterable[Any]) -> dict[Any, Any]:
+        """
+        Read several keys, with one query per 500 keys.
+        """
+        self._connect()
+        found, unbuffered = {}, {}
+        with self._lock:
+            for key in keys:
+                encoded_key = self._encode_key(key)
+                item = self._pending.get(encoded_key) or \
+                    self._in_flight.get(encoded_key)
+                if item is None:
+                    unbuffered[encoded_key] = key
+                elif item[1] is not _DELETED:
+                    found[key] = item[1]
+
+        encoded_keys = list(unbuffered)
+        rows = []
+        with self._read_lock:
+            for i in range(0, len(encoded_keys), 500):
+                chunk = encoded_keys[i:i + 500]
+                rows += self._read_connection.execute(
+                    f"SELECT key, value FROM {self.table} WHERE key IN "
+                    f"({', '.join('?' * len(chunk))})", chunk).fetchall()
+        for encoded_key, value in rows:
+            found[unbuffered[encoded_key]] = self.serializer.loads(value)
+        return found
+
+    def read_all(self) -> Iterator[tuple[Any, Any]]:
+        self.flush()
+        with self._read_lock:
+            rows = self._read_connection.execute(
+                f"SELECT key, value FROM {self.table}").fetchall()
+        for key, value in rows:
+            yield self._decode_key(key), self.serializer.loads(value)
+
+    def write(self, key: Any, value: Any) -> None:
+        self._buffer(((key, value),))
+
+    def write_many(self, items: Iterable[tuple[Any, Any]]) -> None:
+        self._buffer(items)
+
+    def delete(self, key: Any) -> None:
+        self._buffer(((key, _DELETED),))
+
+    def delete_many(self, keys: Iterable[Any]) -> None:
+        self._buffer((key, _DELETED) for key in keys)
+
+    def clear(self) -> None:
+        self.dump(())
+
+    def dump(self, items) -> None:
+        self._connect()
+        rows = [(self._encode_key(key), self.serializer.dumps(value))
+                for key, value in items]
+        with self._write_lock:
+            with self._lock:
+                self._pending = {}
+            connection = self._write_connection
+            connection.execute("BEGIN")
+            try:
+                connection.execute(f"DELETE FROM {self.table}")
+                connection.executemany(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value) "
+                    f"VALUES (?, ?)", rows)
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    def flush(self) -> None:
+        self._connect()
+        self._commit_pending()
+
+    def close(self) -> None:
+        """
+        Stop the writer thread, commit buffered writes and close
+        the database. The engine reconnects if it's used again.
+        """
+        with self._wakeup:
+            if self._write_connection is None:
+                return
+            self._closing = True
+            self._wakeup.notify_all()
+        if self._writer is not threading.current_thread():
+            self._writer.join()
+        self._commit_pending()
+        with self._lock:
+            self._write_connection.close()
+            self._read_connection.close()
+            self._write_connection = self._read_connection = None
+            self._writer = None
+        atexit.unregister(self.close)
@@ -0,0 +1,441 @@
+"""
+This module defines the EvictingStorage, a Storage bounded in
+memory, for Abilities which use their Storage as a cache.
+"""
+import heapq
+import itertools
+import sys
+from collections import OrderedDict, defaultdict, deque
+from dataclasses import dataclass
+from time import monotonic
+from typing import Any, Callable, Mapping
+
+from pyttman.core.storage.basestorage import Storage, _MISSING
+from pyttman.core.storage.engines.base import AbstractStorageEngine
+
+
+def _approximate_size(obj: Any, _seen: set = None) -> int:
+    """
+    Approximate the memory used by an object, following the
+    items of containers and the attributes of objects.
+    """
+    size = sys.getsizeof(obj)
+    if obj is None or isinstance(obj, (str, bytes, bytearray,
+                                       int, float, bool)):
+        return size
+    _seen = set() if _seen is None else _seen
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+    if isinstance(obj, Mapping):
+        size += sum(_approximate_size(key, _seen) +
+                    _approximate_size(value, _seen)
+                    for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        size += sum(_approximate_size(i, _seen) for i in obj)
+    elif hasattr(obj, "__dict__"):
+        size += _approximate_size(vars(obj), _seen)
+    return size
+
+
+class _LeastRecentlyUsed:
+    """
+    Evicts the key which was used the longest time ago.
+    """
+    def __init__(self):
+        self._order = OrderedDict()
+
+    def add(self, key: Any) -> None:
+        self._order[key] = None
+
+    def touch(self, key: Any) -> None:
+        self._order.move_to_end(key)
+
+    def remove(self, key: Any) -> None:
+        self._order.pop(key, None)
+
+    def victim(self) -> Any:
+        return next(iter(self._order))
+
+
+class _LeastFrequentlyUsed:
+    """
+    Evicts the key which was used the fewest times, and the
+    longest time ago among those. Keys are kept in buckets
+    by their use count, so that every operation is O(1).
+    """
+    def __init__(self):
+        self._counts: dict[Any, int] = {}
+        self._buckets: dict[int, OrderedDict] = defaultdict(OrderedDict)
+        self._min_count = 0
+
+    def add(self, key: Any) -> None:
+        self._counts[key] = 1
+        self._buckets[1][key] = None
+        self._min_count = 1
+
+    def touch(self, key: Any) -> None:
+        count = self._counts[key]
+        self._remove_from_bucket(key, count)
+        if self._min_count == count and count not in self._buckets:
+            self._min_count = count + 1
+        self._counts[key] = count + 1
+        self._buckets[count + 1][key] = None
+
+    def remove(self, key: Any) -> None:
+        if (count := self._counts.pop(key, None)) is not None:
+            self._remove_from_bucket(key, count)
+
+    def victim(self) -> Any:
+        if self._min_count not in self._buckets:
+            # The least used keys were removed
+            self._min_count = min(self._buckets)
+        return next(iter(self._buckets[self._min_count]))
+
+    def _remove_from_bucket(self, key: Any, count: int) -> None:
+        bucket = self._buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[count]
+
+
+@dataclass(frozen=True, slots=True)
+class StorageStats:
+    """
+    Counters of an EvictingStorage, to help sizing it.
+
+    :field hits: Lookups of keys which were in memory.
+    :field misses: Lookups of keys which were not in memory.
+    :field evictions: Items evicted to stay within the bounds.
+    :field expirations: Items removed since their ttl passed.
+    :field entries: Items currently in memory.
+    :field bytes: Approximate size of the items in memory.
+    """
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    entries: int
+    bytes: int
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class EvictingStorage(Storage):
+    """
+    A Storage bounded in memory, for Abilities which use their
+    Storage as a cache. Configure it for an Ability with:
+
+        class WeatherAbility(Ability):
+            storage_class = EvictingStorage
+            storage_options = {"max_entries": 10_000, "ttl": 3600}
+
+    Items are evicted when the Storage holds more than
+    'max_entries' items, or more than approximately 'max_bytes'
+    bytes, by the 'policy': "lru" evicts the least recently used
+    item, and "lfu" the least frequently used one. Items stored
+    with a ttl, in seconds, expire once it has passed. The ttl is
+    given per item to 'put', or for all items with 'ttl'.
+
+    The 'on_evict' callback is called with the key and value of
+    every item evicted or expired.
+
+    With a storage engine, evicted items are only dropped from
+    memory, and read from the engine again when accessed, while
+    expired items are deleted from the engine too. The deadline of
+    an evicted item is kept in memory, so that it expires as it
+    would have, had it not been evicted. Iterating over the Storage
+    and getting its length covers the items in memory.
+    """
+    policies = {
+        "lru": _LeastRecentlyUsed,
+        "lfu": _LeastFrequentlyUsed
+    }
+
+    def __init__(self,
+                 engine: AbstractStorageEngine = None,
+                 max_entries: int = None,
+                 max_bytes: int = None,
+                 ttl: float = None,
+                 policy: str = "lru",
+                 on_evict: Callable[[Any, Any], Any] = None,
+                 sizeof: Callable[[Any], int] = _approximate_size,
+                 **kwargs):
+        """
+        :param engine: Optional storage engine
+        :param max_entries: Max amount of items in memory
+        :param max_bytes: Max approximate size of the items in memory
+        :param ttl: Default seconds until items expire
+        :param policy: "lru" or "lfu"
+        :param on_evict: Callable called with key and value of every
+               item which is evicted or expires
+        :param sizeof: Callable returning the approximate size in bytes
+               of a key or value
+        """
+        if policy not in self.policies:
+            raise ValueError(f"Unknown eviction policy '{policy}'. "
+                             f"Choose from {tuple(self.policies)}")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.policy = policy
+        self.on_evict = on_evict
+        self.sizeof = sizeof
+        self._reset()
+        super().__init__(engine=engine, **kwargs)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(entries={len(self.data)}, " \
+               f"policy={self.policy})"
+
+    def __contains__(self, item):
+        return self._lookup(item, record=False) is not _MISSING
+
+    def __getitem__(self, item):
+        if (value := self._lookup(item)) is not _MISSING:
+            return value
+        raise KeyError("Pyttman.Storage: No item stored "
+                       f"under key which matches '{item}'")
+
+    def __len__(self):
+        self.purge_expired()
+        return len(self.data)
+
+    @property
+    def stats(self) -> StorageStats:
+        return StorageStats(hits=self._hits,
+                            misses=self._misses,
+                            evictions=self._evictions,
+                            expirations=self._expirations,
+                            entries=len(self.data),
+                            bytes=self._bytes)
+
+    def put(self, key: Any, item: Any, ttl: float | None = _MISSING):
+        """
+        Store an object in the Storage object.
+        :param key: Any, key for the stored object
+        :param item: Any, the actual object to store
+        :param ttl: Seconds until the item expires, or None if
+                    it should never expire. Defaults to the 'ttl'
+                    of the Storage.
+        :return: None
+        """
+        self._admit(key, item, self.ttl if ttl is _MISSING else ttl)
+        if self.engine is not None:
+            self.engine.write(key, item)
+
+    def get(self, key) -> Any:
+        if (value := self._lookup(key)) is not _MISSING:
+            return value
+        return None
+
+    def dump(self):
+        """
+        Write the items in memory to the storage engine. Items
+        which were evicted from memory are kept in the engine.
+        """
+        self._assert_engine()
+        self.engine.write_many(self.data.items())
+        self.engine.flush()
+
+    def synchronize(self):
+        """
+        Drop the items in memory, so that they are read from
+        the storage engine again as they're accessed.
+        """
+        self._assert_engine()
+        self.engine.flush()
+        # Items read again keep the deadlines they were stored with
+        expiry = {**self._evicted_expiry,
+                  **{key: self._expiry.get(key) for key in self.data}}
+        self._reset()
+        self._evicted_expiry = {key: deadline
+                                for key, deadline in expiry.items()
+                                if self._keeps_deadline(deadline)}
+        for key, deadline in self._evicted_expiry.items():
+            if deadline is not None:
+                self._push_deadline(deadline, key)
+
+    def purge_expired(self) -> None:
+        """
+        Remove all items whose ttl has passed. This is also done
+        as items are stored, so expired items don't pile up.
+        """
+        now = monotonic()
+        deadlines = self._deadlines
+        while deadlines and deadlines[0][0] <= now:
+            deadline, _, key = heapq.heappop(deadlines)
+            # Entries for items stored again since are stale
+            if self._expiry.get(key) == deadline:
+                self._evict(key, expired=True)
+            elif self._evicted_expiry.get(key) == deadline:
+                self._expire_evicted(key)
+
+    def _load_all(self) -> None:
+        """
+        Items are read from the engine as they're accessed, since the
+        Storage may not be able to hold all of them - what's in memory
+        is all there is to iterate over, or take a snapshot of.
+        """
+        self.purge_expired()
+
+    def _reset(self) -> None:
+        self.data = {}
+        self._shared = False
+        self._reindex()
+        self._order = self.policies[self.policy]()
+        self._sizes: dict[Any, int] = {}
+        self._expiry: dict[Any, float] = {}
+        # Deadlines of items evicted to the engine, unless they are
+        # the default, see '_keeps_deadline'
+        self._evicted_expiry: dict[Any, float | None] = {}
+        self._deadlines: list[tuple[float, int, Any]] = []
+        self._sequence = itertools.count()
+        self._bytes = 0
+        self._hits = self._misses = self._evictions = self._expirations = 0
+
+    def _lookup(self, key: Any, record: bool = True) -> Any:
+        """
+        Get an item from memory, or from the engine. Expired items
+        are removed when found.
+        :param record: Count the lookup in the stats, and as a use
+                       of the item for the eviction policy.
+        """
+        if key in self.data:
+            deadline = self._expiry.get(key)
+            if deadline is None or deadline > monotonic():
+                if record:
+                    self._hits += 1
+                    self._order.touch(key)
+                return self.data[key]
+            self._evict(key, expired=True)
+        elif (deadline := self._evicted_expiry.get(key)) is not None \
+                and deadline <= monotonic():
+            self._expire_evicted(key)
+        if record:
+            self._misses += 1
+        return self._read_through(key)
+
+    def _remember(self, key: Any, value: Any) -> Any:
+        if key not in self.data:
+            ttl = self.ttl
+            if key in self._evicted_expiry:
+                deadline = self._evicted_expiry[key]
+                if deadline is not None and deadline <= monotonic():
+                    self._expire_evicted(key)
+                    return value
+                ttl = None if deadline is None else deadline - monotonic()
+            self._admit(key, value, ttl)
+        return self.data.get(key, value)
+
+    def _store(self, key: Any, item: Any) -> None:
+        self._admit(key, item, self.ttl)
+
+    def _discard(self, key: Any) -> None:
+        if key in self.data:
+            self._forget(key)
+        self._evicted_expiry.pop(key, None)
+
+    def _admit(self, key: Any, value: Any, ttl: float | None) -> None:
+        """
+        Store an item in memory, evicting items as needed to stay
+        within the bounds. Items are evicted before a new item is
+        stored, so that it's not evicted itself by the policy.
+        """
+        size = self.sizeof(key) + self.sizeof(value)
+        self.purge_expired()
+        # Items which can't be indexed raise in '_set', before they
+        # are accounted for
+        if key in self.data:
+            self._set(key, value)
+            self._bytes += size - self._sizes[key]
+            self._order.touch(key)
+        else:
+            while self.data and self._exceeds(1, size):
+                self._evict(self._order.victim(), expired=False)
+            self._set(key, value)
+            self._bytes += size
+            self._order.add(key)
+        self._sizes[key] = size
+        self._evicted_expiry.pop(key, None)
+        if ttl is None:
+            self._expiry.pop(key, None)
+        else:
+            deadline = monotonic() + ttl
+            self._expiry[key] = deadline
+            self._push_deadline(deadline, key)
+        # An item stored again may have grown
+        while len(self.data) > 1 and self._exceeds(0, 0):
+            self._evict(self._order.victim(), expired=False)
+
+    def _keeps_deadline(self, deadline: float | None) -> bool:
+        """
+        Whether the deadline of an evicted item is kept. Items
+        read from the engine again, without one kept, get the
+        'ttl' of the Storage, so only items which never expire,
+        in a Storage whose items do by default, need None kept.
+        """
+        return deadline is not None or self.ttl is not None
+
+    def _push_deadline(self, deadline: float, key: Any) -> None:
+        """
+        Push the deadline of an item on to the heap. The entries
+        of items stored again, or deleted, are left on the heap
+        until popped, unless they outnumber the live ones, when
+        the heap is rebuilt from the live entries.
+        """
+        deadlines = self._deadlines
+        heapq.heappush(deadlines, (deadline, next(self._sequence), key))
+        if len(deadlines) > 2 * (len(self._expiry)
+                                 + len(self._evicted_expiry)) + 16:
+            self._deadlines = [
+                entry for entry in deadlines
+                if self._expiry.get(entry[2]) == entry[0]
+                or self._evicted_expiry.get(entry[2]) == entry[0]]
+            heapq.heapify(self._deadlines)
+
+    def _exceeds(self, entries: int, size: int) -> bool:
+        """
+        Whether 'entries' more items of 'size' bytes in total would
+        exceed the bounds of the Storage.
+        """
+        return (self.max_entries is not None
+                and len(self.data) + entries > self.max_entries) or \
+               (self.max_bytes is not None
+                and self._bytes + size > self.max_bytes)
+
+    def _forget(self, key: Any) -> Any:
+        """
+        Remove an item from memory, and from the accounting.
+        """
+        value = self._unset(key)
+        self._order.remove(key)
+        self._bytes -= self._sizes.pop(key)
+        self._expiry.pop(key, None)
+        return value
+
+    def _evict(self, key: Any, expired: bool) -> None:
+        deadline = self._expiry.get(key)
+        value = self._forget(key)
+        if expired:
+            self._expirations += 1
+            if self.engine is not None:
+                self.engine.delete(key)
+        else:
+            self._evictions += 1
+            if self.engine is not None and self._keeps_deadline(deadline):
+                self._evicted_expiry[key] = deadline
+        if self.on_evict is not None:
+            self.on_evict(key, value)
+
+    def _expire_evicted(self, key: Any) -> None:
+        """
+        Delete an item from the engine, which expired after it was
+        evicted from memory.
+        """
+        del self._evicted_expiry[key]
+        self._expirations += 1
+        self.engine.delete(key)
@@ -0,0 +1,145 @@
+"""
+This module defines secondary indexes for Storage objects, to
+find stored items by something else than their key.
+"""
+import bisect
+import itertools
+import threading
+from typing import Any, Callable
+
+
+class StorageIndex:
+    """
+    An ordered index of the items in a Storage, by the value the
+    'extractor' returns for each item - such as the due time of
+    a reminder, or the channel of a user.
+
+    Items are kept sorted by their indexed value, so that looking
+    up the items with a value, or with values in a range, is done
+    by binary search. Items for which the extractor returns None,
+    or raises AttributeError, KeyError or TypeError, are not
+    indexed. The indexed values must be comparable to each other;
+    an item whose value is not raises TypeError when added, and
+    the index is left as it was.
+
+    The entries are kept in a sorted list. Finding where an entry
+    goes is O(log n), while inserting or removing it shifts the
+    entries after it, which is O(n) - though a single memmove, fast
+    for indexes of up to some million items.
+
+    The index is kept up to date as items are stored and deleted.
+    Items changed in place must be stored again for their new
+    value to be indexed.
+    """
+
+    def __init__(self, name: str, extractor: Callable[[Any], Any]):
+        """
+        :param name: Name of the index
+        :param extractor: Callable taking a stored item, returning the
+               value to index it by
+        """
+        self.name = name
+        self.extractor = extractor
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+        # Sorted (value, sequence) entries, and what they refer to
+        self._entries: list[tuple[Any, int]] = []
+        self._keys: dict[int, Any] = {}
+        self._entry_of: dict[Any, tuple[Any, int]] = {}
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(name={self.name}, " \
+               f"entries={len(self._entries)})"
+
+    def __len__(self):
+        return len(self._entries)
+
+    def extract(self, item: Any) -> Any:
+        try:
+            return self.extractor(item)
+        except (AttributeError, KeyError, TypeError):
+            return None
+
+    def add(self, key: Any, item: Any) -> None:
+        """
+        Index an item stored under a key, replacing the entry of
+        an item stored under it before.
+        """
+        value = self.extract(item)
+        with self._lock:
+            if value is None:
+                self._remove(key)
+                return
+            entry = (value, next(self._sequence))
+            # Values which are not comparable raise here, before the
+            # index is changed
+            position = bisect.bisect_right(self._entries, entry)
+            if (previous := self._remove(key)) is not None \
+                    and previous < position:
+                position -= 1
+            self._entries.insert(position, entry)
+            self._keys[entry[1]] = key
+            self._entry_of[key] = entry
+
+    def remove(self, key: Any) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys.clear()
+            self._entry_of.clear()
+
+    def equal(self, value: Any) -> list:
+        """
+        Keys of the items indexed by a value.
+        """
+        return self.range(value, value, include_high=True)
+
+    def range(self,
+              low: Any = None,
+              high: Any = None,
+              include_low: bool = True,
+              include_high: bool = False) -> list:
+        """
+        Keys of the items indexed by values between 'low' and
+        'high', in order of their indexed value.
+        :param low: Lowest value, or None for no lower bound
+        :param high: Highest value, or None for no upper bound
+        :param include_low: Whether items indexed by 'low' are included
+        :param include_high: Whether items indexed by 'high' are included
+        """
+        with self._lock:
+            entries = self._entries
+            if low is None:
+                start = 0
+            elif include_low:
+                start = bisect.bisect_left(entries, low,
+                                           key=lambda entry: entry[0])
+            else:
+                start = bisect.bisect_right(entries, low,
+                                            key=lambda entry: entry[0])
+            if high is None:
+                stop = len(entries)
+            elif include_high:
+                stop = bisect.bisect_right(entries, high, lo=start,
+                                           key=lambda entry: entry[0])
+            else:
+                stop = bisect.bisect_left(entries, high, lo=start,
+                                          key=lambda entry: entry[0])
+            return [self._keys[sequence]
+                    for _, sequence in entries[start:stop]]
+
+    def _remove(self, key: Any) -> int | None:
+        """
+        Remove the entry of a key.
+        :return: The position the entry had, if the key had one
+        """
+        if (entry := self._entry_of.pop(key, None)) is None:
+            return None
+        position = bisect.bisect_left(self._entries, entry)
+        del self._entries[position]
+        del self._keys[entry[1]]
+        return position
+
@@ -0,0 +1,200 @@
+"""
+This module defines the serializers used by storage engines to
+turn stored values in to bytes, and back.
+"""
+import abc
+import io
+import lzma
+import pickle
+import struct
+import zlib
+from typing import Any
+
+# Format flags, and the amount of out-of-band buffers from pickle
+# and from the serializer
+_HEADER = struct.Struct("<BII")
+_BUFFER_LENGTH = struct.Struct("<Q")
+
+_RAW = 1
+_ZLIB = 2
+_LZMA = 4
+
+
+class _OutOfBandPickler(pickle.Pickler):
+    """
+    Places large bytes and bytearray objects out-of-band, which
+    pickle only does for objects using PickleBuffer by itself.
+    They're referred to by persistent ids, since pickle writes
+    bytes and bytearray objects without calling any hook else.
+    """
+    def __init__(self, *args, min_out_of_band_size: int, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.min_out_of_band_size = min_out_of_band_size
+        self.out_of_band: list[memoryview] = []
+
+    def persistent_id(self, obj):
+        if type(obj) in (bytes, bytearray) and \
+                len(obj) >= self.min_out_of_band_size:
+            self.out_of_band.append(memoryview(obj))
+            return type(obj) is bytearray, len(self.out_of_band) - 1
+        return None
+
+
+class _OutOfBandUnpickler(pickle.Unpickler):
+    def __init__(self, *args, out_of_band: list[memoryview], **kwargs):
+        super().__init__(*args, **kwargs)
+        self.out_of_band = out_of_band
+
+    def persistent_load(self, pid):
+        is_bytearray, index = pid
+        return (bytearray if is_bytearray else bytes)(self.out_of_band[index])
+
+
+class AbstractSerializer(abc.ABC):
+    """
+    Abstract serializer class.
+
+    Serializers turn values in to bytes and back. Large values
+    can be returned from 'dumps_parts' as several bytes-like
+    parts, which engines write one after another, so that they
+    are not copied in to a single bytes object first.
+    """
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}()"
+
+    @abc.abstractmethod
+    def dumps(self, obj: Any) -> bytes:
+        """
+        Serialize an object.
+        """
+        pass
+
+    @abc.abstractmethod
+    def loads(self, data: bytes | memoryview) -> Any:
+        """
+        Deserialize an object serialized with 'dumps', or with
+        the parts from 'dumps_parts' written one after another.
+        """
+        pass
+
+    def dumps_parts(self, obj: Any) -> list[bytes | memoryview]:
+        """
+        Serialize an object in to parts, which are the serialized
+        object when joined.
+        """
+        return [self.dumps(obj)]
+
+
+class PickleSerializer(AbstractSerializer):
+    """
+    Serializes values with pickle, protocol 5 by default.
+
+    Large bytes and bytearray objects in values, and objects which
+    support out-of-band buffers in pickle such as numpy arrays,
+    have their data placed after the pickle stream as is, instead
+    of being copied in to it. Values which are bytes, bytearray or
+    memoryview objects themselves are not pickled at all.
+    In both cases, 'dumps_parts' returns the data of the value as
+    a part of its own, without copying it.
+
+    Serialized values are optionally compressed with "zlib" or
+    "lzma", which requires the parts to be joined.
+    """
+
+    compressions = {
+        "zlib": (_ZLIB, zlib.compress, zlib.decompress),
+        "lzma": (_LZMA, lzma.compress, lzma.decompress)
+    }
+
+    def __init__(self,
+                 protocol: int = 5,
+                 compression: str = None,
+                 min_compression_size: int = 512,
+                 min_out_of_band_size: int = 4096):
+        """
+        :param protocol: Pickle protocol to use
+        :param compression: None, "zlib" or "lzma"
+        :param min_compression_size: Values serialized to fewer bytes
+               than this are not compressed
+        :param min_out_of_band_size: Size of bytes and bytearray objects
+               from which they're placed out-of-band
+        """
+        if compression is not None and compression not in self.compressions:
+            raise ValueError(f"Unknown compression '{compression}'. Choose "
+                             f"from {tuple(self.compressions)}")
+        self.protocol = protocol
+        self.compression = compression
+        self.min_compression_size = min_compression_size
+        self.min_out_of_band_size = min_out_of_band_size
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(protocol={self.protocol}, " \
+               f"compression={self.compression})"
+
+    def dumps(self, obj: Any) -> bytes:
+        return b"".join(self.dumps_parts(obj))
+
+    def dumps_parts(self, obj: Any) -> list[bytes | memoryview]:
+        pickle_buffers = []
+        if isinstance(obj, (bytes, bytearray, memoryview)):
+            flags = _RAW
+            buffers = [memoryview(obj).cast("B")]
+            stream = bytes((type(obj) is bytes, type(obj) is bytearray))
+        else:
+            flags = 0
+            file = io.BytesIO()
+            pickler = _OutOfBandPickler(
+                file, protocol=self.protocol,
+                buffer_callback=pickle_buffers.append
+                if self.protocol >= 5 else None,
+                min_out_of_band_size=self.min_out_of_band_size)
+            pickler.dump(obj)
+            stream = file.getvalue()
+            pickle_buffers = [buffer.raw() for buffer in pickle_buffers]
+            buffers = pickler.out_of_band
+
+        counts = len(pickle_buffers), len(buffers)
+        buffers = pickle_buffers + buffers
+        lengths = b"".join(_BUFFER_LENGTH.pack(len(buffer))
+                           for buffer in buffers)
+        parts = [stream, *buffers]
+        if self.compression is not None and \
+                sum(map(len, parts)) >= self.min_compression_size:
+            flag, compress, _ = self.compressions[self.compression]
+            return [_HEADER.pack(flags | flag, *counts),
+                    compress(lengths + b"".join(parts))]
+        return [_HEADER.pack(flags, *counts) + lengths, *parts]
+
+    def loads(self, data: bytes | memoryview) -> Any:
+        flags, pickle_buffer_count, buffer_count = \
+            _HEADER.unpack_from(data, 0)
+        view = memoryview(data)[_HEADER.size:]
+        for flag, _, decompress in self.compressions.values():
+            if flags & flag:
+                view = memoryview(decompress(view))
+
+        lengths_size = (pickle_buffer_count + buffer_count) * \
+            _BUFFER_LENGTH.size
+        lengths = [length for length, in
+                   _BUFFER_LENGTH.iter_unpack(view[:lengths_size])]
+        end = len(view)
+        buffers = []
+        for length in reversed(lengths):
+            buffers.append(view[end - length:end])
+            end -= length
+        buffers.reverse()
+        stream = view[lengths_size:end]
+
+        if flags & _RAW:
+            is_bytes, is_bytearray = stream
+            if is_bytes:
+                return bytes(buffers[0])
+            if is_bytearray:
+                return bytearray(buffers[0])
+            return buffers[0]
+        unpickler = _OutOfBandUnpickler(
+            io.BytesIO(stream),
+            buffers=buffers[:pickle_buffer_count],
+            out_of_band=buffers[pickle_buffer_count:])
+        return unpickler.load()
@@ -0,0 +1,281 @@
+"""
+This module defines the ShardedStorage, a Storage which keeps
+the items of each author, or other namespace, apart in shards.
+"""
+import threading
+import zlib
+from typing import Any, Callable, Iterator, Type
+
+from pyttman.core.storage.basestorage import BaseStorage, Storage, \
+    StorageSnapshot
+from pyttman.core.storage.engines.base import AbstractStorageEngine
+
+
+class NamespacedStorage(BaseStorage):
+    """
+    The items of one namespace in a ShardedStorage, such as the
+    items of one author. It's used like any other Storage, while
+    its items are kept in the shard of the namespace.
+
+    Each item is stored in the shard under a (namespace, key) pair,
+    so that storing an item writes that item alone. The keys of the
+    namespace are kept by the ShardedStorage, in a set guarded by
+    the lock of the shard, to find its items without going through
+    those of other namespaces. The sets are not kept in the shard,
+    which could evict them, or let them expire, before the items.
+    """
+    def __init__(self, shard: BaseStorage, namespace: Any,
+                 keys: dict[Any, set], lock: threading.Lock):
+        """
+        :param shard: The shard holding the items of the namespace
+        :param namespace: The namespace
+        :param keys: The sets of keys of the namespaces in the shard
+        :param lock: The lock guarding 'keys'
+        """
+        # The items live in the shard, so the UserDict is not set up
+        self.shard = shard
+        self.namespace = namespace
+        self._namespace_keys = keys
+        self._lock = lock
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(namespace={self.namespace}, " \
+               f"keys={list(self)})"
+
+    def __contains__(self, item):
+        return (self.namespace, item) in self.shard
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def __getitem__(self, item):
+        try:
+            return self.shard[(self.namespace, item)]
+        except KeyError:
+            raise KeyError("Pyttman.Storage: No item stored "
+                           f"under key which matches '{item}'") from None
+
+    @property
+    def data(self) -> dict:
+        found = self.shard.get_many((self.namespace, key)
+                                    for key in self._keys())
+        return {key: item for (_, key), item in found.items()}
+
+    def get(self, key) -> Any:
+        return self.shard.get((self.namespace, key))
+
+    def put(self, key: Any, item: Any):
+        # The key is added first, to be listed once the item is stored,
+        # and again after, had it been dropped as gone meanwhile
+        self._add_key(key)
+        self.shard.put((self.namespace, key), item)
+        self._add_key(key)
+
+    def delete(self, key: Any):
+        if key not in self:
+            raise KeyError("Pyttman.Storage: No item stored "
+                           f"under key which matches '{key}'")
+        self.shard.delete((self.namespace, key))
+        with self._lock:
+            self._discard_keys({key})
+
+    def clear(self):
+        """
+        Delete all items in the namespace at once.
+        """
+        with self._lock:
+            keys = self._namespace_keys.pop(self.namespace, set())
+        self.shard.delete_many([(self.namespace, key) for key in keys])
+
+    def copy(self) -> dict:
+        """
+        A copy of the items in the namespace, as a dict.
+        """
+        return self.data
+
+    def snapshot(self) -> StorageSnapshot:
+        """
+        Take a snapshot of the items in the namespace, which are
+        copied from the shard.
+        """
+        return StorageSnapshot(self.data)
+
+    def dump(self):
+        self.shard.dump()
+
+    def synchronize(self):
+        self.shard.synchronize()
+
+    def _keys(self) -> list:
+        """
+        The keys of the items in the namespace. Keys of items
+        which the shard has evicted, or let expire, since they
+        were stored are dropped.
+        """
+        with self._lock:
+            keys = list(self._namespace_keys.get(self.namespace, ()))
+        gone = {key for key in keys if (self.namespace, key) not in self.shard}
+        if gone:
+            with self._lock:
+                # Unless stored again meanwhile
+                self._discard_keys({key for key in gone
+                                    if (self.namespace, key)
+                                    not in self.shard})
+        return [key for key in keys if key not in gone]
+
+    def _add_key(self, key: Any) -> None:
+        with self._lock:
+            self._namespace_keys.setdefault(self.namespace, set()).add(key)
+
+    def _discard_keys(self, keys: set) -> None:
+        # Called holding the lock
+        if (current := self._namespace_keys.get(self.namespace)) is None:
+            return
+        current -= keys
+        if not current:
+            del self._namespace_keys[self.namespace]
+
+
+class ShardedStorage(Storage):
+    """
+    A Storage for Abilities which keep items per author, or per
+    any other namespace. Instead of keying the items of every
+    author in to the same Storage, Intents use the items of the
+    author of the message:
+
+        self.storage.for_author(message.author)["last_seen"] = now
+
+    Configure it for an Ability with:
+
+        class ProfileAbility(Ability):
+            storage_class = ShardedStorage
+            storage_options = {"shards": 16,
+                               "shard_class": EvictingStorage,
+                               "shard_options": {"max_entries": 1000}}
+
+    Namespaces are spread over 'shards' Storage objects of the
+    'shard_class', each created with 'shard_options' and with an
+    engine from the 'shard_engine' callable, called with the index
+    of the shard. Every shard can thereby evict and persist the
+    items of its namespaces on its own. Finding, and clearing, the items of a
+    namespace does not depend on the amount of other namespaces.
+
+    The keys of the namespaces in a shard are kept in memory, and
+    found in the shard, and its engine, when it's first used.
+
+    The shard of a namespace is chosen by a checksum of its str,
+    which is the same in every process, so that namespaces can be
+    routed to processes by their shard with 'shard_of'.
+
+    Items stored in the ShardedStorage directly, and not in a
+    namespace, are kept like in any other Storage.
+    """
+
+    def __init__(self,
+                 engine: AbstractStorageEngine = None,
+                 shards: int = 16,
+                 shard_class: Type[BaseStorage] = Storage,
+                 shard_options: dict = None,
+                 shard_engine: Callable[[int], AbstractStorageEngine] = None,
+                 **kwargs):
+        """
+        :param engine: Optional storage engine, for items not
+               stored in a namespace
+        :param shards: Amount of shards
+        :param shard_class: Storage class of the shards
+        :param shard_options: Keyword arguments for the shards
+        :param shard_engine: Optional callable, called with the index
+               of each shard, returning the storage engine for the shard
+        """
+        self.shards = tuple(
+            shard_class(engine=shard_engine(i) if shard_engine else None,
+                        **(shard_options or {}))
+            for i in range(shards))
+        # The keys of each namespace, per shard, found when first used
+        self._namespace_keys: list[dict[Any, set] | None] = \
+            [None] * shards
+        self._shard_locks = tuple(threading.Lock() for _ in range(shards))
+        super().__init__(engine=engine, **kwargs)
+
+    def shard_of(self, namespace: Any) -> int:
+        """
+        The index of the shard which holds a namespace.
+        """
+        return zlib.crc32(str(namespace).encode()) % len(self.shards)
+
+    def namespace(self, namespace: Any) -> NamespacedStorage:
+        """
+        The items stored in a namespace.
+        :param namespace: Any, with a str which is unique to it
+        """
+        index = self.shard_of(namespace)
+        return NamespacedStorage(self.shards[index], namespace,
+                                 self._keys_in(index),
+                                 self._shard_locks[index])
+
+    def for_author(self, author: Any) -> NamespacedStorage:
+        """
+        The items stored for an author. Authors are told apart by
+        their 'id' attribute, if they have one, such as users in
+        Discord, or else by the author itself.
+        :param author: The author of a Message
+        """
+        return self.namespace(getattr(author, "id", author))
+
+    def namespaces(self) -> Iterator[Any]:
+        """
+        Iterate over the namespaces which have items stored.
+        """
+        for index in range(len(self.shards)):
+            keys = self._keys_in(index)
+            with self._shard_locks[index]:
+                namespaces = list(keys)
+            for namespace in namespaces:
+                if len(self.namespace(namespace)):
+                    yield namespace
+
+    def _keys_in(self, index: int) -> dict[Any, set]:
+        """
+        The keys of the namespaces in a shard, by namespace. They
+        are found among the items in memory, and in the engine, of
+        the shard the first time it's used.
+        """
+        with self._shard_locks[index]:
+            if (keys := self._namespace_keys[index]) is None:
+                shard = self.shards[index]
+                found = set(shard.data)
+                if (engine := getattr(shard, "engine", None)) is not None:
+                    found.update(key for key, _ in engine.read_all())
+                keys = {}
+                for key in found:
+                    # Items of a namespace are stored under (namespace, key)
+                    if isinstance(key, tuple) and len(key) == 2:
+                        keys.setdefault(key[0], set()).add(key[1])
+                self._namespace_keys[index] = keys
+            return keys
+
+    def dump(self):
+        """
+        Dump the items, and every shard which has a storage engine.
+        """
+        shards = [shard for shard in self.shards
+                  if getattr(shard, "engine", None) is not None]
+        if self.engine is not None or not shards:
+            super().dump()
+        for shard in shards:
+            shard.dump()
+
+    def synchronize(self):
+        """
+        Synchronize the items, and every shard which has a
+        storage engine.
+        """
+        shards = [shard for shard in self.shards
+                  if getattr(shard, "engine", None) is not None]
+        if self.engine is not None or not shards:
+            super().synchronize()
+        for shard in shards:
+            shard.synchronize()
@@ -0,0 +1,352 @@
+"""
+This module defines the SharedStorage, a Storage shared by several
+processes of an app on the same machine.
+"""
+import asyncio
+import contextlib
+import functools
+import os
+import pickle
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Mapping
+
+from pyttman.core.storage.basestorage import BaseStorage, StorageSnapshot, \
+    _MISSING
+from pyttman.core.storage.serializers import AbstractSerializer, \
+    PickleSerializer
+
+
+class SharedStorage(BaseStorage):
+    """
+    A Storage shared by several processes on the same machine, such
+    as worker processes of one app. Configure it for an Ability with:
+
+        class CounterAbility(Ability):
+            storage_class = SharedStorage
+            storage_options = {"path": "shared.sqlite3",
+                               "table": "counter_ability"}
+
+    The items are not kept in memory, but in an SQLite database
+    which every process reads from and writes to, so that all of
+    them see the same items. Every read is consistent: it sees all
+    writes completed before it, in any process.
+
+    The same atomic operations as in ConcurrentStorage are offered,
+    atomic across processes: 'incr', 'setdefault', 'pop',
+    'compare_and_set' and 'update_with'. They hold the write lock
+    of the database, so that read-modify-write sequences don't race.
+    'locked' holds it around custom sequences, for all keys at once.
+
+    Keys are pickled, so they should be of types with a stable
+    pickled form, such as str and int. Values are serialized by the
+    'serializer', a PickleSerializer by default. Since values are
+    copies, objects changed in place must be stored again.
+    """
+
+    def __init__(self,
+                 path: str | Path,
+                 table: str = "storage",
+                 timeout: float = 30.0,
+                 serializer: AbstractSerializer = None,
+                 engine: None = None):
+        """
+        :param path: Path to the database file, which is created if
+               needed. All processes sharing the Storage use the same.
+        :param table: Name of the table to store the items in
+        :param timeout: Seconds to wait for the write lock, when other
+               processes hold it, before raising sqlite3.OperationalError
+        :param serializer: Serializer for the values
+        """
+        if engine is not None:
+            raise ValueError("SharedStorage stores its items itself, and "
+                             "can't be used with a storage engine")
+        if not table.isidentifier():
+            raise ValueError(f"'{table}' is not a valid table name")
+        # The items are in the database, so the UserDict is not set up
+        self.path = Path(path)
+        self.table = table
+        self.timeout = timeout
+        self.serializer = serializer or PickleSerializer()
+        self._local = threading.local()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(path={self.path}, " \
+               f"table={self.table})"
+
+    @property
+    def data(self) -> dict:
+        """
+        A copy of all items, read in one query.
+        """
+        return dict(self._read_all())
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        The connection of the current thread. Connections are not
+        shared between threads, nor inherited by forked processes.
+        """
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path,
+                                         timeout=self.timeout,
+                                         isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} "
+                f"(key BLOB PRIMARY KEY, value BLOB NOT NULL) WITHOUT ROWID")
+            local.connection, local.pid = connection, os.getpid()
+        return local.connection
+
+    @contextlib.contextmanager
+    def _transaction(self, write: bool = True
+                     ) -> Iterator[sqlite3.Connection]:
+        """
+        Hold the write lock of the database, in a transaction which
+        is committed on exit, or rolled back on exceptions. Nested
+        transactions join the outer one.
+        :param write: Whether to take the write lock. Transactions
+               which only read see the database as of their first
+               read, without waiting for, or blocking, writers.
+        """
+        connection = self._connection()
+        if connection.in_transaction:
+            yield connection
+            return
+        connection.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def locked(self, key: Any = None) -> contextlib.AbstractContextManager:
+        """
+        Hold the write lock of the database around a sequence of
+        operations, which then happen atomically. The lock is for
+        all keys, in every process.
+        """
+        return self._transaction()
+
+    @staticmethod
+    def _encode_key(key: Any) -> bytes:
+        return pickle.dumps(key, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _read(self, connection: sqlite3.Connection, key: Any) -> Any:
+        row = connection.execute(
+            f"SELECT value FROM {self.table} WHERE key = ?",
+            (self._encode_key(key),)).fetchone()
+        return _MISSING if row is None else self.serializer.loads(row[0])
+
+    def _write(self, connection: sqlite3.Connection,
+               key: Any, item: Any) -> None:
+        connection.execute(
+            f"INSERT OR REPLACE INTO {self.table} (key, value) VALUES (?, ?)",
+            (self._encode_key(key), self.serializer.dumps(item)))
+
+    def _read_all(self) -> list[tuple[Any, Any]]:
+        rows = self._connection().execute(
+            f"SELECT key, value FROM {self.table}").fetchall()
+        return [(pickle.loads(key), self.serializer.loads(value))
+                for key, value in rows]
+
+    def __contains__(self, item):
+        return self._connection().execute(
+            f"SELECT 1 FROM {self.table} WHERE key = ?",
+            (self._encode_key(item),)).fetchone() is not None
+
+    def __getitem__(self, item):
+        if (value := self._read(self._connection(), item)) is _MISSING:
+            raise KeyError("Pyttman.Storage: No item stored "
+                           f"under key which matches '{item}'")
+        return value
+
+    def __iter__(self):
+        rows = self._connection().execute(
+            f"SELECT key FROM {self.table}").fetchall()
+        return iter([pickle.loads(key) for key, in rows])
+
+    def __len__(self):
+        return self._connection().execute(
+            f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def put(self, key: Any, item: Any):
+        self._write(self._connection(), key, item)
+
+    def get(self, key, default: Any = None) -> Any:
+        value = self._read(self._connection(), key)
+        return default if value is _MISSING else value
+
+    def delete(self, key: Any):
+        cursor = self._connection().execute(
+            f"DELETE FROM {self.table} WHERE key = ?",
+            (self._encode_key(key),))
+        if cursor.rowcount == 0:
+            raise KeyError("Pyttman.Storage: No item stored "
+                           f"under key which matches '{key}'")
+
+    def get_many(self, keys: Iterable[Any]) -> dict[Any, Any]:
+        with self._transaction(write=False) as connection:
+            found = {key: self._read(connection, key) for key in keys}
+        return {key: value for key, value in found.items()
+                if value is not _MISSING}
+
+    def put_many(self, items: Mapping[Any, Any] | Iterable[tuple[Any, Any]]):
+        rows = [(self._encode_key(key), self.serializer.dumps(item))
+                for key, item in dict(items).items()]
+        with self._transaction() as connection:
+            connection.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, value) "
+                f"VALUES (?, ?)", rows)
+
+    def delete_many(self, keys: Iterable[Any]):
+        rows = [(self._encode_key(key),) for key in keys]
+        with self._transaction() as connection:
+            connection.executemany(
+                f"DELETE FROM {self.table} WHERE key = ?", rows)
+
+    def pop(self, key: Any, default: Any = _MISSING) -> Any:
+        """
+        Atomically delete and return the object stored under
+        a key, or return 'default' if nothing is stored under it.
+        :raises: KeyError if key not present, and no default is given
+        """
+        with self._transaction() as connection:
+            if (value := self._read(connection, key)) is _MISSING:
+                if default is _MISSING:
+                    raise KeyError("Pyttman.Storage: No item stored "
+                                   f"under key which matches '{key}'")
+                return default
+            connection.execute(f"DELETE FROM {self.table} WHERE key = ?",
+                               (self._encode_key(key),))
+            return value
+
+    def setdefault(self, key: Any, default: Any = None) -> Any:
+        """
+        Atomically store 'default' under a key if nothing is
+        stored under it yet.
+        :return: The object stored under the key
+        """
+        with self._transaction() as connection:
+            if (value := self._read(connection, key)) is not _MISSING:
+                return value
+            self._write(connection, key, default)
+            return default
+
+    def incr(self, key: Any, amount: int | float = 1,
+             initial: int | float = 0) -> int | float:
+        """
+        Atomically increment the number stored under a key.
+        :param amount: Amount to add, which may be negative
+        :param initial: Number to start from if nothing is stored
+        :return: The incremented number
+        """
+        with self._transaction() as connection:
+            value = self._read(connection, key)
+            value = (initial if value is _MISSING else value) + amount
+            self._write(connection, key, value)
+            return value
+
+    def compare_and_set(self, key: Any, expected: Any, new: Any) -> bool:
+        """
+        Atomically store 'new' under a key, if the object stored
+        under it equals 'expected'. A key with nothing stored under
+        it equals None.
+        :return: True if 'new' was stored, else False
+        """
+        with self._transaction() as connection:
+            value = self._read(connection, key)
+            if (None if value is _MISSING else value) != expected:
+                return False
+            self._write(connection, key, new)
+            return True
+
+    def update_with(self, key: Any, func: Callable[[Any], Any],
+                    default: Any = None) -> Any:
+        """
+        Atomically replace the object stored under a key with
+        the return value of 'func', called with the object.
+        :param func: Callable taking the stored object, or 'default'
+                     if nothing is stored, and returning the new one
+        :return: The new object
+        """
+        with self._transaction() as connection:
+            value = self._read(connection, key)
+            value = func(default if value is _MISSING else value)
+            self._write(connection, key, value)
+            return value
+
+    def snapshot(self) -> StorageSnapshot:
+        """
+        Take a snapshot of the items, read in one transaction. Unlike
+        for Storage objects in memory, this takes time linear to the
+        amount of items.
+        """
+        return StorageSnapshot(self.data)
+
+    def copy(self) -> dict:
+        """
+        A copy of all items, as a dict. The items are in the
+        database, which another SharedStorage would share.
+        """
+        return self.data
+
+    def add_index(self, name: str, extractor: Callable[[Any], Any]) -> None:
+        """
+        SharedStorage can't keep secondary indexes, since they would
+        not see the writes of other processes.
+        :raises: ValueError
+        """
+        raise ValueError("SharedStorage can't keep secondary indexes, "
+                         "since they would not see the writes of other "
+                         "processes")
+
+    def dump(self):
+        """
+        Items are written to the database as they're stored,
+        so there's nothing to dump.
+        """
+        pass
+
+    def synchronize(self):
+        """
+        Items are read from the database as they're accessed,
+        so there's nothing to synchronize.
+        """
+        pass
+
+    def close(self) -> None:
+        """
+        Close the connection of the current thread. It's opened
+        again if the Storage is used.
+        """
+        if getattr(self._local, "pid", None) == os.getpid():
+            self._local.connection.close()
+        self._local.__dict__.clear()
+
+    async def _run_in_executor(self, func: Callable, *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(func, *args))
+
+    async def aget(self, key) -> Any:
+        return await self._run_in_executor(self.get, key)
+
+    async def aput(self, key: Any, item: Any):
+        await self._run_in_executor(self.put, key, item)
+
+    async def adelete(self, key: Any):
+        await self._run_in_executor(self.delete, key)
+
+    async def aget_many(self, keys: Iterable[Any]) -> dict[Any, Any]:
+        return await self._run_in_executor(self.get_many, list(keys))
+
+    async def aput_many(self, items: Mapping[Any, Any]
+                                     | Iterable[tuple[Any, Any]]):
+        await self._run_in_executor(self.put_many, dict(items))
+
+    async def adelete_many(self, keys: Iterable[Any]):
+        await self._run_in_executor(self.delete_many, list(keys))
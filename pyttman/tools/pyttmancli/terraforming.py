@@ -1,3 +1,4 @@
+import atexit
 import logging
 import os
 import shutil
@@ -13,9 +14,13 @@ import requests
 import pyttman
 from pyttman.clients.builtin.cli import CliClient
 from pyttman.core.ability import Ability
+from pyttman.core.containers import MessageMixin
 from pyttman.core.exceptions import PyttmanProjectInvalidException
 from pyttman.core.internals import Settings, PyttmanApp, depr_raise
 from pyttman.core.middleware.routing import AbstractMessageRouter
+from pyttman.tools.scheduling.leases import SqliteLeaseManager
+from pyttman.tools.scheduling.schedule import schedule
+from pyttman.tools.scheduling.store import SqliteJobStore
 
 
 class TerraFormer:
@@ -153,6 +158,9 @@ def bootstrap_app(module: str = None, devmode: bool = False,
     # Set the configured instance of logger to the pyttman.PyttmanLogger object
     pyttman.logger.LOG_INSTANCE = logger
 
+    # Configure the job store and leases before any Job is scheduled
+    configure_schedule(settings)
+
     # Import the router defined in MIDDLEWARE in settings.py
     try:
         message_router_config = settings.MIDDLEWARE.get(
@@ -173,6 +181,22 @@ def bootstrap_app(module: str = None, devmode: bool = False,
                           f"{message_router_class_name}. "
                           f"Verify the MESSAGE_ROUTER setting in settings.py.")
 
+    # Import the tokenizer defined in MIDDLEWARE in settings.py, if any.
+    # All messages in the app are tokenized by it.
+    if tokenizer_config := settings.MIDDLEWARE.get("TOKENIZER_CLASS"):
+        tokenizer_config = tokenizer_config.split(".")
+        tokenizer_class_name = tokenizer_config.pop()
+        tokenizer_module = import_module(".".join(tokenizer_config))
+        if not (tokenizer_class := getattr(tokenizer_module,
+                                           tokenizer_class_name, None)):
+            raise ImportError(f"Pyttman could not find the tokenizer "
+                              f"'{tokenizer_class_name}'. Verify the "
+                              f"TOKENIZER_CLASS setting in settings.py.")
+        MessageMixin.tokenizer = tokenizer_class()
+
+    # Limit the cost of routing very large messages, if configured
+    MessageMixin.max_tokens = settings.MIDDLEWARE.get("MAX_ROUTING_TOKENS")
+
     # Retrieve the help keyword from settings
     if not (help_keyword := settings.MIDDLEWARE.get("HELP_KEYWORD")):
         raise AttributeError("'HELP_KEYWORD' not defined in settings.py. "
@@ -201,7 +225,11 @@ def bootstrap_app(module: str = None, devmode: bool = False,
     message_router: AbstractMessageRouter = message_router_class(
         abilities=None,
         intent_unknown_responses=command_unknown_responses,
-        help_keyword=help_keyword)
+        help_keyword=help_keyword,
+        entity_parsing_window=settings.MIDDLEWARE.get(
+            "ENTITY_PARSING_WINDOW"),
+        max_entity_parsing_tokens=settings.MIDDLEWARE.get(
+            "MAX_ENTITY_PARSING_TOKENS"))
 
     # If devmode is active, return only one CliClient in a runner.
     if devmode:
@@ -213,6 +241,7 @@ def bootstrap_app(module: str = None, devmode: bool = False,
         app.abilities = load_abilities(settings)
         message_router.abilities = app.abilities
         prepare_app(module)
+        schedule.load_jobs()
         del settings.CLIENT
         return app
 
@@ -251,6 +280,7 @@ def bootstrap_app(module: str = None, devmode: bool = False,
     pyttman.app = app
     app.abilities = load_abilities(settings)
     prepare_app(module)
+    schedule.load_jobs()
     message_router.abilities = app.abilities
     del settings.CLIENT
     return app
@@ -264,6 +294,16 @@ def prepare_app(module):
         pass
 
 
+def configure_schedule(settings: Settings) -> None:
+    # Persist Jobs in JOB_STORE, and lease them with JOB_LEASES, if set
+    base_dir = Path(settings.APP_BASE_DIR or "")
+    if settings.JOB_STORE is not None:
+        schedule.store = SqliteJobStore(base_dir / settings.JOB_STORE)
+    if settings.JOB_LEASES is not None:
+        schedule.leases = SqliteLeaseManager(base_dir / settings.JOB_LEASES)
+        atexit.register(schedule.leases.release_all)
+
+
 def load_abilities(settings: Settings) -> set:
     # Set the abilities of the router to the abilities from settings.py
     ability_objects_set = set()
@@ -0,0 +1,157 @@
+"""
+This module defines the clocks the scheduler tells time by, the
+system clock by default, or a virtual clock which is advanced at
+will, to run days of scheduled Jobs in milliseconds.
+"""
+import abc
+import threading
+import time
+import weakref
+from datetime import datetime, timedelta, tzinfo
+
+
+class Clock(abc.ABC):
+    """
+    Abstract clock class.
+
+    Scheduler engines, and the triggers of the Jobs they run,
+    tell the time by the clock in 'engine.clock'. Engines with
+    a dispatcher thread 'watch' their condition, and wait for
+    the next Job with 'wait'.
+    """
+
+    def watch(self, condition: threading.Condition) -> None:
+        """
+        Notify a condition whenever the clock is changed, other
+        than by time passing.
+        """
+        pass
+
+    @abc.abstractmethod
+    def now(self, tz: tzinfo = None) -> datetime:
+        """
+        The current point in time, like 'datetime.now'.
+        """
+        pass
+
+    @abc.abstractmethod
+    def time(self) -> float:
+        """
+        The current point in time as a timestamp, like 'time.time'.
+        """
+        pass
+
+    @abc.abstractmethod
+    def wait(self, condition: threading.Condition,
+             timeout: float | None) -> None:
+        """
+        Wait on a condition, whose lock is held, until it's
+        notified or 'timeout' seconds have passed on the clock.
+        """
+        pass
+
+
+class SystemClock(Clock):
+    """
+    The wall clock of the system.
+    """
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}()"
+
+    def now(self, tz: tzinfo = None) -> datetime:
+        return datetime.now(tz)
+
+    def time(self) -> float:
+        return time.time()
+
+    def wait(self, condition: threading.Condition,
+             timeout: float | None) -> None:
+        condition.wait(timeout)
+
+
+system_clock = SystemClock()
+
+
+class VirtualClock(Clock):
+    """
+    A clock which stands still, until it's advanced. Use it to
+    test Jobs which run daily, or to benchmark the scheduler
+    without waiting for the Jobs to be due:
+
+        clock = VirtualClock(datetime(2024, 1, 1))
+        engine = HeapSchedulerEngine(clock=clock)
+        job = schedule.method(func=report, every="day", at="09:00",
+                              engine=engine)
+
+        for _ in range(7):
+            clock.advance(timedelta(days=1))
+            engine.settle()
+
+    Dispatchers waiting for a Job to be due are woken when the
+    clock is advanced, instead of after a timeout. Advancing the
+    clock past several points in time a Job with a TimeTrigger is
+    due at, runs it once for each of them, right away.
+
+    The AsyncioSchedulerEngine sets timers in the event loop, which
+    keeps the time of the system, and can't use a VirtualClock.
+    """
+
+    def __init__(self, start: datetime | float = None):
+        """
+        :param start: Point in time, or timestamp, the clock starts
+               at. Defaults to the time of the system clock.
+        """
+        if start is None:
+            start = time.time()
+        elif isinstance(start, datetime):
+            start = start.timestamp()
+        self._time = float(start)
+        self._lock = threading.Lock()
+        self._watching: weakref.WeakSet[threading.Condition] = \
+            weakref.WeakSet()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(now={self.now()})"
+
+    def now(self, tz: tzinfo = None) -> datetime:
+        return datetime.fromtimestamp(self._time, tz)
+
+    def time(self) -> float:
+        return self._time
+
+    def watch(self, condition: threading.Condition) -> None:
+        with self._lock:
+            self._watching.add(condition)
+
+    def wait(self, condition: threading.Condition,
+             timeout: float | None) -> None:
+        if timeout is not None and timeout <= 0:
+            return
+        # Woken by 'advance', since no time passes until then
+        condition.wait()
+
+    def advance(self, seconds: float | timedelta) -> None:
+        """
+        Move the clock forward, and wake the dispatchers
+        waiting on it.
+        :raises: ValueError, if 'seconds' is negative
+        """
+        if isinstance(seconds, timedelta):
+            seconds = seconds.total_seconds()
+        if seconds < 0:
+            raise ValueError("A VirtualClock can't be moved backwards")
+        with self._lock:
+            self._time += seconds
+            watching = tuple(self._watching)
+        for condition in watching:
+            with condition:
+                condition.notify_all()
+
+    def advance_to(self, moment: datetime | float) -> None:
+        """
+        Move the clock forward to a point in time, or timestamp.
+        """
+        if isinstance(moment, datetime):
+            moment = moment.timestamp()
+        self.advance(moment - self._time)
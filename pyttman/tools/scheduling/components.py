@@ -1,11 +1,18 @@
 import asyncio
+import calendar
 import inspect
+import itertools
 import time
-from datetime import datetime, timedelta
-from threading import Thread
-from typing import Callable, Any
+from concurrent.futures import Executor
+from datetime import datetime, timedelta, tzinfo
+from typing import Callable, Any, Coroutine
+
+import pytz
 
 import pyttman
+from pyttman.tools.scheduling.clock import Clock, system_clock
+from pyttman.tools.scheduling.engines.base import AbstractSchedulerEngine
+from pyttman.tools.scheduling.metrics import JobMetrics
 
 
 class TimeTrigger:
@@ -39,7 +46,8 @@ class TimeTrigger:
     }
 
     def __init__(self, at: str = None, every: str = None,
-                 delay=None, exactly_at: datetime = None):
+                 delay=None, exactly_at: datetime = None,
+                 clock: Clock = system_clock):
         """
         Configures the TimeTrigger object according
         to provided arguments.
@@ -61,10 +69,15 @@ class TimeTrigger:
                            object is created outside by the creator
                            for a specific day and time when the job
                            is to be run.
+        :param clock: Clock to tell the time by, the one of the
+                      scheduler engine of the Job
         """
+        self.clock = clock
         self.amount_of_runs = 0
-        self.next_trigger: datetime = datetime.now()
+        self.next_trigger: datetime = clock.now()
         self.last_trigger: datetime = None
+        # The point in time the trigger was due, when last pulled
+        self.last_due: datetime = None
         self.reoccurring: bool = False
         self.timedelta_interval: timedelta = None
         self.days_to_run: tuple[int] = None
@@ -119,12 +132,21 @@ class TimeTrigger:
             return f"{timestr}:00"
         return timestr
 
+    def _is_due(self) -> bool:
+        """
+        Whether next_trigger has passed. Compared as timestamps,
+        like the scheduler engines order Jobs by, which tell the
+        hour repeated when daylight saving time ends apart.
+        """
+        return self.clock.time() >= self.next_trigger.timestamp()
+
     def is_pulled(self):
-        if datetime.now() >= self.next_trigger:
+        if self._is_due():
+            self.last_due = self.next_trigger
             if self.reoccurring:
                 self.reset()
             self.amount_of_runs += 1
-            self.last_trigger = datetime.now()
+            self.last_trigger = self.clock.now()
             return True
         return False
 
@@ -144,28 +166,297 @@ class TimeTrigger:
         :returns: None
         """
         if self.days_to_run:
-            if datetime.now() >= self.next_trigger:
-                self.next_trigger += timedelta(days=1)
-            while not self.next_trigger.weekday() in self.days_to_run:
+            if self._is_due():
                 self.next_trigger += timedelta(days=1)
+            weekday = self.next_trigger.weekday()
+            self.next_trigger += timedelta(days=min(
+                (day - weekday) % 7 for day in self.days_to_run))
         elif self.timedelta_interval:
             self.next_trigger += self.timedelta_interval
         if self.delay:
             self.next_trigger += self.delay
 
+    def following(self, moment: datetime) -> datetime | None:
+        """
+        The point in time the trigger fires at after
+        firing at 'moment', or None if it's not
+        reoccurring.
+        """
+        if not self.reoccurring:
+            return None
+        if self.days_to_run:
+            moment += timedelta(days=1)
+            weekday = moment.weekday()
+            moment += timedelta(days=min(
+                (day - weekday) % 7 for day in self.days_to_run))
+        elif self.timedelta_interval:
+            moment += self.timedelta_interval
+        if self.delay:
+            moment += self.delay
+        return moment
+
 
-class Job(Thread):
+def _next_bit(mask: int, value: int) -> int | None:
+    """
+    The lowest set bit in 'mask' from bit 'value' and up.
     """
-    Class subclassing Thread, representing a scheduled
-    function, class or other callable.
+    if not (mask := mask >> value):
+        return None
+    return value + (mask & -mask).bit_length() - 1
+
+
+def _run_async(func: Callable) -> Any:
+    """
+    Run an async callable in a new loop, in an executor.
+    """
+    return asyncio.run(func())
+
+
+class CronTrigger:
+    """
+    CronTrigger class
+
+    A trigger which fires at the points in time matching
+    a cron expression, of five fields:
+
+        minute hour day-of-month month day-of-week
+
+    Fields accept '*', values, ranges ('1-5'), steps ('*/15',
+    '8-18/2') and lists of them ('0,30'). Months and days of
+    the week can be given by name ('jan', 'mon'), and sunday
+    is both 0 and 7. Like in cron, a day matches if either the
+    day of the month or the day of the week does, when both are
+    restricted. '@hourly', '@daily', '@weekly', '@monthly' and
+    '@yearly' are accepted too.
+
+    The fields are parsed to bitmasks when created, so that
+    the next point in time is found by looking up the next set
+    bit in each field, instead of stepping through time.
+
+    Like in cron, points in time passed while a Job executed, or
+    while the app was down, are skipped - unless 'catch_up' is set,
+    in which case the trigger fires for each of them in turn.
+    """
+    macros = {
+        "@yearly": "0 0 1 1 *",
+        "@annually": "0 0 1 1 *",
+        "@monthly": "0 0 1 * *",
+        "@weekly": "0 0 * * 0",
+        "@daily": "0 0 * * *",
+        "@midnight": "0 0 * * *",
+        "@hourly": "0 * * * *",
+    }
+    fields = (("minute", 0, 59),
+              ("hour", 0, 23),
+              ("day of month", 1, 31),
+              ("month", 1, 12),
+              ("day of week", 0, 7))
+    names = {
+        "month": {name: number for number, name in enumerate(
+            ("jan", "feb", "mar", "apr", "may", "jun", "jul",
+             "aug", "sep", "oct", "nov", "dec"), start=1)},
+        "day of week": {name: number for number, name in enumerate(
+            ("sun", "mon", "tue", "wed", "thu", "fri", "sat"))}
+    }
+    # Months searched for a matching day before giving up, which
+    # covers the weekdays of february 29th
+    max_months = 12 * 28
+
+    def __init__(self, expression: str, timezone: str | tzinfo = None,
+                 clock: Clock = system_clock):
+        """
+        :param expression: str, the cron expression
+        :param timezone: Optional timezone of the expression, as a
+                         name such as "Europe/Stockholm", or a tzinfo
+                         from pytz. Defaults to the local time.
+        :param clock: Clock to tell the time by, the one of the
+                      scheduler engine of the Job
+        :raises: ValueError, if the expression is invalid or never
+                 matches any point in time
+        """
+        self.expression = expression
+        self.clock = clock
+        if isinstance(timezone, str):
+            timezone = pytz.timezone(timezone)
+        self.timezone = timezone
+        self.amount_of_runs = 0
+        self.last_trigger: datetime = None
+        # The point in time the trigger was due, when last pulled
+        self.last_due: datetime = None
+        self.reoccurring: bool = True
+        self.catch_up = False
+
+        fields = self.macros.get(expression.strip(), expression).split()
+        if len(fields) != len(self.fields):
+            raise ValueError(f"'{expression}' is not a cron expression of "
+                             f"{len(self.fields)} fields")
+        (self._minutes, self._hours, days, self._months,
+         weekdays) = (self._parse(field, *spec)
+                      for field, spec in zip(fields, self.fields))
+        # Sunday is both 0 and 7
+        weekdays = (weekdays | weekdays >> 7) & 0b1111111
+
+        # The days of a month matching the day of the week, for each
+        # day of the week the month can start on
+        weekday_days = tuple(
+            sum(1 << day for day in range(1, 32)
+                if weekdays >> (first + day - 1) % 7 & 1)
+            for first in range(7))
+        # Like vixie cron, days match either field when both are
+        # restricted, and both fields when one starts with '*', such
+        # as '*/2' - a bare '*' matching every day
+        if fields[2].startswith("*") or fields[4].startswith("*"):
+            self._days = tuple(days & mask for mask in weekday_days)
+        else:
+            self._days = tuple(days | mask for mask in weekday_days)
+
+        self.next_trigger: datetime = None
+        self.reset()
+
+    def __repr__(self):
+        return f"CronTrigger(" \
+               f"expression='{self.expression}', " \
+               f"timezone={self.timezone}, " \
+               f"next_trigger={self.next_trigger}, " \
+               f"last_trigger={self.last_trigger}, " \
+               f"amount_of_runs={self.amount_of_runs})"
+
+    def _parse(self, field: str, name: str, low: int, high: int) -> int:
+        """
+        Parse a field of the expression to a bitmask of the
+        values it matches.
+        """
+        mask = 0
+        try:
+            for part in field.lower().split(","):
+                part, _, step = part.partition("/")
+                step = int(step) if step else 1
+                if part == "*":
+                    start, stop = low, high
+                elif "-" in part:
+                    start, stop = (self._value(value, name)
+                                   for value in part.split("-"))
+                else:
+                    # A value with a step starts a range to the end
+                    start = self._value(part, name)
+                    stop = high if step > 1 else start
+                if not low <= start <= stop <= high or step < 1:
+                    raise ValueError
+                for value in range(start, stop + 1, step):
+                    mask |= 1 << value
+        except ValueError:
+            raise ValueError(f"'{field}' is an invalid value for the "
+                             f"{name} field in '{self.expression}'") \
+                from None
+        return mask
+
+    def _value(self, value: str, name: str) -> int:
+        if names := self.names.get(name):
+            if value in names:
+                return names[value]
+        return int(value)
+
+    def _days_of(self, year: int, month: int) -> int:
+        """
+        Bitmask of the matching days in a month.
+        """
+        first, length = calendar.monthrange(year, month)
+        # Python counts weekdays from monday, cron from sunday
+        return self._days[(first + 1) % 7] & (1 << length + 1) - 2
+
+    def next_after(self, moment: datetime) -> datetime:
+        """
+        The first point in time matching the expression,
+        after 'moment'. Both are local to the timezone of
+        the trigger, without tzinfo.
+        :raises: ValueError, if no point in time matches
+        """
+        year, month, day = moment.year, moment.month, moment.day
+        hour, minute = moment.hour, moment.minute + 1
+        for _ in range(self.max_months * 4):
+            if (found := _next_bit(self._months, month)) is None:
+                year, month, day, hour, minute = year + 1, 1, 1, 0, 0
+                continue
+            if found != month:
+                month, day, hour, minute = found, 1, 0, 0
+            if (found := _next_bit(self._days_of(year, month), day)) is None:
+                month, day, hour, minute = month + 1, 1, 0, 0
+                continue
+            if found != day:
+                day, hour, minute = found, 0, 0
+            if (found := _next_bit(self._hours, hour)) is None:
+                day, hour, minute = day + 1, 0, 0
+                continue
+            if found != hour:
+                hour, minute = found, 0
+            if (found := _next_bit(self._minutes, minute)) is None:
+                hour, minute = hour + 1, 0
+                continue
+            return datetime(year, month, day, hour, found)
+        raise ValueError(f"The cron expression '{self.expression}' "
+                         f"never matches any point in time")
+
+    def _now(self) -> datetime:
+        return self.clock.now(self.timezone)
+
+    def is_pulled(self):
+        # Compared as timestamps, like the scheduler engines order
+        # Jobs by, which tell repeated hours apart
+        if self.clock.time() >= self.next_trigger.timestamp():
+            now = self._now()
+            self.last_due = self.next_trigger
+            following = self.following(self.next_trigger)
+            if self.catch_up and following <= now:
+                self.next_trigger = following
+            else:
+                self.catch_up = False
+                self.reset()
+            self.amount_of_runs += 1
+            self.last_trigger = now
+            return True
+        return False
+
+    def reset(self) -> None:
+        """
+        Reset itself to the next point in time
+        matching the expression, from now.
+
+        In a timezone, points in time skipped when
+        daylight saving time starts are moved
+        forward by the skipped hour, while repeated
+        ones run at the latter of the two.
+        :returns: None
+        """
+        self.next_trigger = self._localize(
+            self.next_after(self._now().replace(tzinfo=None)))
+
+    def following(self, moment: datetime) -> datetime:
+        """
+        The point in time the trigger fires at after
+        firing at 'moment'.
+        """
+        if self.timezone is not None:
+            moment = moment.astimezone(self.timezone).replace(tzinfo=None)
+        return self._localize(self.next_after(moment))
+
+    def _localize(self, moment: datetime) -> datetime:
+        if self.timezone is None:
+            return moment
+        return self.timezone.normalize(self.timezone.localize(moment))
+
+
+class Job:
+    """
+    Class representing a scheduled function, class
+    or other callable.
 
     The Job class is not designed to be accessed by
     users but is internally managed in the schedule
     API using Pyttman's scheduler.
 
-    The Job class is runnable as a separate
-    thread, thus leaving any function that it's
-    calling non-blocking.
+    Started Jobs are run by the scheduler engine of
+    the schedule API, in its worker threads, thus
+    leaving any function that it's calling non-blocking.
 
     The Job can run both async and sync functions
     both as the main callable and recipients.
@@ -179,26 +470,62 @@ class Job(Thread):
     is omitted - provide the loop for where to schedule
     the recipient coroutine.
     """
+    _ids = itertools.count(1)
+
+    overlap_policies = ("queue", "skip", "allow")
+    """
+    What to do when a reoccurring Job is due while it's still
+    executing: 'queue' the run until the previous one finished,
+    'skip' the run, or 'allow' the runs to execute at once.
+    """
 
     def __init__(self, func: Callable,
                  is_async: bool,
-                 trigger: TimeTrigger,
+                 trigger: TimeTrigger | CronTrigger,
                  recipient: Callable,
                  func_name: str,
+                 engine: AbstractSchedulerEngine,
                  async_loop: Any =None,
-                 return_self: bool = False):
-        super().__init__()
+                 return_self: bool = False,
+                 executor: Executor = None,
+                 overlap: str = "queue",
+                 executor_name: str = None,
+                 store: Any = None,
+                 misfire: str = "once",
+                 leases: Any = None,
+                 lease: str = None):
+        if overlap not in self.overlap_policies:
+            raise ValueError(f"'{overlap}' is an invalid value for "
+                             f"'overlap'. Choose from "
+                             f"{self.overlap_policies}")
         self.kwargs = None
         self.func = func
         self.is_async = is_async
         self.func_name = func_name
         self.trigger = trigger
         self.recipient = recipient
+        self.engine = engine
         self.return_self = return_self
         self.time_to_die = False
         self.error = None
         self.result = None
         self.async_loop = async_loop
+        self.native_id: int | None = None
+        self.executor = executor
+        self.executor_name = executor_name
+        self.overlap = overlap
+        self.store = store
+        self.store_key: str | None = None
+        self.misfire = misfire
+        self.leases = leases
+        self.lease = lease
+        self.executions = 0
+        self.skipped_runs = 0
+        # Runs left to another process, holding the lease
+        self.standby_runs = 0
+        self.metrics = JobMetrics()
+        # Called with the Job once it's no longer scheduled
+        self.on_stopped: Callable[[Job], None] | None = None
         self._running = False
 
     def __repr__(self):
@@ -216,73 +543,220 @@ class Job(Thread):
                f"result='{self.result}', " \
                f"error={error_str}"
 
-    def run(self) -> None:
+    def start(self) -> None:
         """
-        Thread overloaded method
-        Await the TimeTrigger object to fire on
-        it's point in time, and call the callable
-        passed as self.func.
+        Start the Job, by handing it to the scheduler engine
+        which executes it when its TimeTrigger is due.
+        :raises: RuntimeError, if the Job was started before
         """
+        if self.native_id is not None:
+            raise RuntimeError(f"Job '{self.func_name}' can only be "
+                               f"started once")
+        if self.store is not None:
+            self.store.save(self)
+        self.native_id = next(self._ids)
         self._running = True
+        self.engine.submit(self)
 
-        while True:
-            if self.time_to_die:
-                pyttman.logger.log(
-                    f"Job '{self.native_id}' got a "
-                    f"graceful kill signal, shutting "
-                    f"down.")
-                break
-
-            # Evaluate if self.func and / or recipient is async or not
-            if self.trigger.is_pulled():
-                try:
-                    # Evaluate whether main callable and/or recipient is async
-                    # Run it with async.run if no loop is defined, otherwise
-                    # add it to existing loop as a created task
-                    if self.is_async:
-                        if not self.async_loop:
-                            self.result = asyncio.run(self.func())
-                        else:
-                            self.async_loop.create_task(self.func())
-                    else:
-                        self.result = self.func()
-                except Exception as e:
-                    pyttman.logger.log(f"The schedule job '{self.name}' "
-                                       f"raised {type(e).__name__}"
-                                       f"('{str(e)}') upon executing it",
-                                       level="error")
-                    self.error = e
-                    break
-
-                # Call the recipient function with the job output
-                output = self if self.return_self else self.result
-                try:
-                    if inspect.iscoroutinefunction(self.recipient):
-                        if self.async_loop:
-                            self.async_loop.create_task(self.recipient(output))
-                        else:
-                            asyncio.run(self.recipient(output))
-                    else:
-                        self.recipient(output)
-                except Exception as e:
-                    pyttman.logger.log(f"The schedule job '{self.name}' "
-                                       f"ran OK but the recipient function "
-                                       f"{self.recipient} raised "
-                                       f"{type(e).__name__}"
-                                       f"('{str(e)}') ", level="error")
-                    break
-            if not self.trigger.reoccurring and self.trigger.amount_of_runs > 0:
-                break
-            time.sleep(0.01)
-        self._running = False
+    def execute(self) -> bool:
+        """
+        Call the callable passed as self.func, and pass
+        the output to the recipient. Called by scheduler
+        engines executing Jobs in threads, when the
+        TimeTrigger is pulled. If the Job has an executor,
+        self.func is called in it, and awaited.
+        :returns: Whether the Job is to run again
+        """
+        if not self._holds_lease():
+            return self.trigger.reoccurring
+        started = self._started()
+        try:
+            # Evaluate whether main callable and/or recipient is async
+            # Run it in the loop if one is defined, otherwise with
+            # asyncio.run
+            if self.is_async and self.executor is not None:
+                self.result = self.executor.submit(
+                    _run_async, self.func).result()
+            elif self.executor is not None:
+                self.result = self.executor.submit(self.func).result()
+            elif self.is_async:
+                self.result = self._run_coroutine(self.func())
+            else:
+                self.result = self.func()
+        except Exception as e:
+            self._log_func_error(e)
+            if self.return_self:
+                # Errors are kept in schedule.outputs as well
+                self.recipient(self)
+            return self._executed(False, started, failed=True)
+
+        # Call the recipient function with the job output
+        output = self if self.return_self else self.result
+        try:
+            if inspect.iscoroutinefunction(self.recipient):
+                self._run_coroutine(self.recipient(output))
+            else:
+                self.recipient(output)
+        except Exception as e:
+            self._log_recipient_error(e)
+            return self._executed(False, started, failed=True)
+        return self._executed(self.trigger.reoccurring, started)
+
+    async def aexecute(self) -> bool:
+        """
+        Like 'execute', for scheduler engines running Jobs
+        in an event loop. Coroutines are awaited in the
+        running loop, while sync callables are called in
+        the executor of the Job, or the default executor
+        of the loop, to not block the loop.
+        :returns: Whether the Job is to run again
+        """
+        loop = asyncio.get_running_loop()
+        if self.leases is not None and \
+                not await loop.run_in_executor(None, self._holds_lease):
+            return self.trigger.reoccurring
+        started = self._started()
+        try:
+            if self.is_async and self.executor is not None:
+                self.result = await loop.run_in_executor(
+                    self.executor, _run_async, self.func)
+            elif self.is_async:
+                self.result = await self.func()
+            else:
+                self.result = await loop.run_in_executor(self.executor,
+                                                         self.func)
+        except Exception as e:
+            self._log_func_error(e)
+            if self.return_self:
+                # Errors are kept in schedule.outputs as well
+                self.recipient(self)
+            return self._executed(False, started, failed=True)
+
+        output = self if self.return_self else self.result
+        try:
+            if inspect.iscoroutinefunction(self.recipient):
+                await self.recipient(output)
+            else:
+                await loop.run_in_executor(None, self.recipient, output)
+        except Exception as e:
+            self._log_recipient_error(e)
+            return self._executed(False, started, failed=True)
+        return self._executed(self.trigger.reoccurring, started)
+
+    def _run_coroutine(self, coroutine: Coroutine) -> Any:
+        """
+        Run a coroutine from a thread other than the one of
+        self.async_loop. The coroutine is handed to the loop
+        thread safely, and awaited if the loop is running.
+        Without a loop, it runs in a new one with asyncio.run.
+        """
+        if not self.async_loop:
+            return asyncio.run(coroutine)
+        future = asyncio.run_coroutine_threadsafe(coroutine,
+                                                  self.async_loop)
+        if self.async_loop.is_running():
+            return future.result()
+        return None
+
+    def _holds_lease(self) -> bool:
+        """
+        Take, or renew, the lease of the Job, if it has one,
+        before executing it. Jobs whose lease is held by
+        another process are left to it.
+        """
+        if self.leases is None or self.leases.acquire(self.lease):
+            return True
+        self.standby_runs += 1
+        return False
+
+    def _started(self) -> float:
+        """
+        Update the metrics of the Job as it starts executing,
+        with how late it was fired, and how long it waited to
+        execute since.
+        :returns: The time it started, for '_executed'
+        """
+        trigger = self.trigger
+        if trigger.last_trigger is not None and trigger.last_due is not None:
+            fired = trigger.last_trigger.timestamp()
+            self.metrics.started(lateness=fired - trigger.last_due.timestamp(),
+                                 queue_wait=self.engine.clock.time() - fired)
+        return time.perf_counter()
+
+    def _executed(self, again: bool, started: float,
+                  failed: bool = False) -> bool:
+        """
+        Persist the state of the Job if it has a job store, or
+        delete it once done, and update the metrics of the Job.
+        Killed Jobs are deleted when killed instead.
+        """
+        if self.store is not None:
+            if not again:
+                self.store.delete(self)
+            elif not self.time_to_die:
+                self.store.save(self)
+        self.metrics.finished(time.perf_counter() - started, failed)
+        return again
+
+    def _log_func_error(self, e: Exception) -> None:
+        pyttman.logger.log(f"The schedule job '{self.func_name}' "
+                           f"raised {type(e).__name__}"
+                           f"('{str(e)}') upon executing it",
+                           level="error")
+        self.error = e
+
+    def _log_recipient_error(self, e: Exception) -> None:
+        pyttman.logger.log(f"The schedule job '{self.func_name}' "
+                           f"ran OK but the recipient function "
+                           f"{self.recipient} raised "
+                           f"{type(e).__name__}"
+                           f"('{str(e)}') ", level="error")
 
     @property
     def running(self) -> bool:
         return self._running
 
+    def mark_failed(self, e: Exception) -> None:
+        """
+        Called by the scheduler engine if executing the Job raised
+        outside of its function and recipient, such as in its job
+        store or lease manager. The Job is not scheduled again.
+        """
+        pyttman.logger.log(f"The schedule job '{self.func_name}' "
+                           f"failed to execute, since "
+                           f"{type(e).__name__}('{str(e)}') was raised. "
+                           f"It is not scheduled again.", level="error")
+        self.error = e
+        self.metrics.finished(0.0, failed=True)
+
+    def mark_stopped(self) -> None:
+        """
+        Called by the scheduler engine once the Job
+        is no longer scheduled.
+        """
+        self._running = False
+        if self.on_stopped is not None:
+            self.on_stopped(self)
+
     def kill_gracefully(self) -> None:
         """
         Provices a method to set the self.time_to_die
-        to True to signal it's time to check out
+        to True to signal it's time to check out.
+        The Job is not scheduled again, but finishes
+        if it is executing at the moment.
         """
         self.time_to_die = True
+        if self.store is not None:
+            self.store.delete(self)
+        if self.leases is not None:
+            # Another process may fire it at once
+            self.leases.release(self.lease)
+        if self.native_id is not None:
+            pyttman.logger.log(
+                f"Job '{self.native_id}' got a "
+                f"graceful kill signal, shutting "
+                f"down.")
+            self.engine.cancel(self)
+        if self.on_stopped is not None:
+            # Forgotten at once, even if executing at the moment
+            self.on_stopped(self)
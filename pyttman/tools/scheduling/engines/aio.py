@@ -0,0 +1,186 @@
+"""
+This module defines the AsyncioSchedulerEngine, which runs Jobs
+in the event loop of the client.
+"""
+import asyncio
+import threading
+from typing import Any, Callable
+
+from pyttman.tools.scheduling.engines.base import AbstractSchedulerEngine
+
+
+class AsyncioSchedulerEngine(AbstractSchedulerEngine):
+    """
+    Runs Jobs in a running event loop, such as the one of the
+    DiscordClient, which attaches its loop once it's online.
+    Configure it in settings.py with:
+
+        from pyttman import schedule
+        from pyttman.tools.scheduling.engines.aio import \
+            AsyncioSchedulerEngine
+
+        schedule.engine = AsyncioSchedulerEngine()
+
+    Every Job is a timer of the loop, set with 'loop.call_at' for
+    the point in time the Job is due. Async Jobs and recipients
+    are awaited in the loop, instead of in a new loop each time
+    with asyncio.run, while sync ones are called in the default
+    executor of the loop. No threads are used for scheduling.
+
+    Jobs may be started, and killed, from any thread - calls from
+    other threads are handed to the loop with
+    'loop.call_soon_threadsafe'. Jobs started before a loop is
+    attached are scheduled once it is. Since the TimeTrigger of
+    a Job is in wall clock time, and the loop keeps monotonic
+    time, timers are set at most 'max_sleep' seconds ahead, and
+    set again until the Job is due, to notice if the system clock
+    is changed.
+    """
+
+    native_async = True
+
+    def __init__(self, loop: asyncio.AbstractEventLoop = None,
+                 max_sleep: float = 60.0):
+        """
+        :param loop: Optional event loop to run Jobs in. By default,
+               the loop attached by the client is used.
+        :param max_sleep: Longest time in seconds a timer is set ahead
+        """
+        self.loop = loop
+        self.max_sleep = max_sleep
+        self._lock = threading.Lock()
+        self._pending: list[tuple[Callable, tuple]] = []
+        # Timers and executing tasks, only used in the loop
+        self._timers: dict[Any, asyncio.TimerHandle] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(loop={self.loop}, " \
+               f"scheduled={len(self._timers)}, executing={len(self._tasks)})"
+
+    def attach(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Run Jobs in a loop, if no loop was given to the engine.
+        Jobs started before are scheduled in it.
+        :raises: RuntimeError, if attached to another loop before
+        """
+        with self._lock:
+            if self.loop is loop:
+                return
+            if self.loop is not None and not self.loop.is_closed():
+                raise RuntimeError(f"{self} is already attached to a loop")
+            self.loop = loop
+            pending, self._pending = self._pending, []
+        for func, args in pending:
+            loop.call_soon_threadsafe(func, *args)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            pending = len(self._pending)
+        return {"scheduled": len(self._timers),
+                "executing": len(self._tasks),
+                "pending": pending}
+
+    def submit(self, job) -> None:
+        self._call(self._schedule, job)
+
+    def cancel(self, job) -> None:
+        self._call(self._cancel, job)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop scheduling all Jobs. Waiting for executing Jobs is
+        only possible from threads other than the one of the loop.
+        """
+        with self._lock:
+            loop, self._pending = self.loop, []
+        if loop is None or loop.is_closed():
+            return
+        if self._in_loop(loop) or not loop.is_running():
+            self._cancel_all()
+            return
+        future = asyncio.run_coroutine_threadsafe(self._drain(wait), loop)
+        future.result()
+
+    def _call(self, func: Callable, *args) -> None:
+        """
+        Call 'func' in the loop, or once a loop is attached.
+        """
+        with self._lock:
+            if (loop := self.loop) is None:
+                self._pending.append((func, args))
+                return
+        if self._in_loop(loop):
+            func(*args)
+        else:
+            loop.call_soon_threadsafe(func, *args)
+
+    @staticmethod
+    def _in_loop(loop: asyncio.AbstractEventLoop) -> bool:
+        try:
+            return asyncio.get_running_loop() is loop
+        except RuntimeError:
+            return False
+
+    def _schedule(self, job) -> None:
+        if job.time_to_die:
+            job.mark_stopped()
+            return
+        delay = job.trigger.next_trigger.timestamp() - self.clock.time()
+        when = self.loop.time() + min(max(delay, 0), self.max_sleep)
+        self._timers[job] = self.loop.call_at(when, self._fire, job)
+
+    def _cancel(self, job) -> None:
+        if (timer := self._timers.pop(job, None)) is not None:
+            timer.cancel()
+            job.mark_stopped()
+
+    def _cancel_all(self) -> None:
+        for job, timer in self._timers.items():
+            timer.cancel()
+            job.time_to_die = True
+            job.mark_stopped()
+        self._timers.clear()
+
+    async def _drain(self, wait: bool) -> None:
+        self._cancel_all()
+        if wait and self._tasks:
+            await asyncio.wait(self._tasks)
+
+    def _fire(self, job) -> None:
+        """
+        Called by the timer of a Job. Executes it, if it's due.
+        """
+        del self._timers[job]
+        if not job.trigger.is_pulled():
+            # Set ahead at most 'max_sleep' seconds, or changed
+            self._schedule(job)
+            return
+        if job.overlap != "queue" and job.trigger.reoccurring:
+            # Scheduled right away, to be due while executing
+            self._schedule(job)
+            if job.overlap == "skip" and job.executions:
+                job.skipped_runs += 1
+                return
+        job.executions += 1
+        task = self.loop.create_task(self._execute(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _execute(self, job) -> None:
+        again = False
+        try:
+            again = await job.aexecute()
+        except Exception as e:
+            job.mark_failed(e)
+        finally:
+            job.executions -= 1
+            if not again:
+                # Finished, or failed, Jobs are not scheduled again
+                job.time_to_die = True
+                # Stopped once, whether scheduled by its overlap or not
+                if (timer := self._timers.pop(job, None)) is not None:
+                    timer.cancel()
+                job.mark_stopped()
+            elif job.overlap == "queue":
+                self._schedule(job)
@@ -0,0 +1,296 @@
+"""
+This module defines the base class for scheduler engines, which
+run the Jobs of the schedule API when their TimeTrigger is due.
+"""
+import abc
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from pyttman.tools.scheduling.clock import Clock, system_clock
+
+
+class AbstractSchedulerEngine(abc.ABC):
+    """
+    Abstract scheduler engine class.
+
+    A scheduler engine keeps the started Jobs of the schedule API,
+    and runs each of them when its TimeTrigger is due, by calling
+    'Job.execute' - or awaiting 'Job.aexecute', if it has an event
+    loop. A Job which is to run again is scheduled anew once it
+    has executed, for its next point in time, so that the same Job
+    never runs twice at once.
+
+    The engine used by the schedule API is configured with:
+
+        schedule.engine = HeapSchedulerEngine(max_workers=8)
+
+    Engines must not start threads until the first Job is
+    submitted, since they're created when the module is imported.
+    """
+
+    native_async = False
+    """
+    Whether the engine awaits coroutines in an event loop of its
+    own, instead of executing Jobs in threads.
+    """
+
+    clock: Clock = system_clock
+    """
+    The clock the engine, and the triggers of its Jobs created
+    with schedule.method, tell the time by.
+    """
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}()"
+
+    @abc.abstractmethod
+    def submit(self, job) -> None:
+        """
+        Schedule a started Job, to be executed when its
+        TimeTrigger is due.
+        """
+        pass
+
+    @abc.abstractmethod
+    def cancel(self, job) -> None:
+        """
+        Stop scheduling a Job. A Job executing at the moment
+        is not interrupted, but not scheduled again.
+        """
+        pass
+
+    def attach(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Called by clients running an event loop, with the loop,
+        once it's running. Engines with 'native_async' run Jobs in
+        it, others ignore it.
+        """
+        pass
+
+    @abc.abstractmethod
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop scheduling all Jobs.
+        :param wait: Wait for Jobs executing at the moment to finish
+        """
+        pass
+
+    def stats(self) -> dict[str, int]:
+        """
+        Gauges of the engine, such as the amount of scheduled
+        and executing Jobs, exported with the Job metrics.
+        """
+        return {}
+
+
+class ThreadedSchedulerEngine(AbstractSchedulerEngine):
+    """
+    Base class for engines running Jobs with a single dispatcher
+    thread and a bounded pool of worker threads.
+
+    Subclasses keep the scheduled Jobs in a structure of their
+    choice, and find the ones which are due. The dispatcher sleeps
+    until the next Job is due, or until a Job is submitted, and
+    hands the due Jobs to the pool to execute. Idle schedules
+    thereby cost no CPU time, regardless of the amount of Jobs, and
+    no more than 'max_workers' Jobs execute at once. The structure
+    is only used while holding the lock of '_condition'.
+
+    The dispatcher thread is started with the first Job, and ends
+    when no Job is scheduled or executing, so that it does not
+    keep an app from exiting once its Jobs are done. Since the
+    TimeTrigger of a Job is in wall clock time, the dispatcher
+    sleeps at most 'max_sleep' seconds at a time, to notice if
+    the system clock is changed.
+
+    With a VirtualClock, the dispatcher sleeps until the clock is
+    advanced, and 'settle' waits for the Jobs due by then to run.
+    """
+
+    def __init__(self, max_workers: int = 8, max_sleep: float = 1.0,
+                 clock: Clock = None):
+        """
+        :param max_workers: Amount of worker threads executing Jobs
+        :param max_sleep: Longest time in seconds the dispatcher
+               sleeps before checking the clock again
+        :param clock: Clock to tell the time by, such as a
+               VirtualClock. Defaults to the system clock.
+        """
+        self.max_workers = max_workers
+        self.max_sleep = max_sleep
+        self._condition = threading.Condition()
+        if clock is not None:
+            self.clock = clock
+        self.clock.watch(self._condition)
+        self._executing = 0
+        # The clock time the dispatcher last found no Job due at
+        self._checked: float | None = None
+        self._dispatcher: threading.Thread | None = None
+        self._pool: ThreadPoolExecutor | None = None
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(max_workers={self.max_workers}, " \
+               f"scheduled={self._scheduled()}, executing={self._executing})"
+
+    @abc.abstractmethod
+    def _push(self, job) -> None:
+        """
+        Schedule a Job for the point in time of its TimeTrigger.
+        """
+        pass
+
+    @abc.abstractmethod
+    def _remove(self, job) -> None:
+        """
+        Stop scheduling a Job, which has been killed, or is done.
+        Killed Jobs must be removed at once, not to keep the
+        dispatcher running until they'd be due.
+        """
+        pass
+
+    @abc.abstractmethod
+    def _pop_due(self, now: float) -> tuple[list, float | None]:
+        """
+        Take the Jobs which are due, from the scheduled ones.
+        :param now: The current time, as a timestamp
+        :return: The due Jobs, and the seconds until the next
+                 scheduled Job is due, or None if none is scheduled
+        """
+        pass
+
+    @abc.abstractmethod
+    def _scheduled(self) -> int:
+        """
+        The amount of scheduled Jobs.
+        """
+        pass
+
+    @abc.abstractmethod
+    def _clear(self) -> list:
+        """
+        Stop scheduling all Jobs.
+        :return: The Jobs which were scheduled
+        """
+        pass
+
+    def stats(self) -> dict[str, int]:
+        with self._condition:
+            return {"scheduled": self._scheduled(),
+                    "executing": self._executing,
+                    "max_workers": self.max_workers}
+
+    def submit(self, job) -> None:
+        with self._condition:
+            self._push(job)
+            self._checked = None
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="pyttman-schedule")
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(
+                    target=self._dispatch, name="pyttman-schedule-dispatcher")
+                self._dispatcher.start()
+
+    def cancel(self, job) -> None:
+        with self._condition:
+            self._remove(job)
+            self._condition.notify_all()
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._condition:
+            for job in self._clear():
+                job.time_to_die = True
+                job.mark_stopped()
+            dispatcher, pool = self._dispatcher, self._pool
+            self._pool = None
+            self._condition.notify_all()
+        if dispatcher is not None and wait:
+            dispatcher.join()
+        if pool is not None:
+            pool.shutdown(wait=wait)
+
+    def _dispatch(self) -> None:
+        """
+        Target of the dispatcher thread. Sleeps until the next
+        Job is due, and hands the due Jobs to the pool.
+        """
+        with self._condition:
+            while self._scheduled() or self._executing:
+                now = self.clock.time()
+                due, timeout = self._pop_due(now)
+                for job in due:
+                    if job.time_to_die:
+                        job.mark_stopped()
+                    elif not job.trigger.is_pulled():
+                        # Changed, or woken a moment before it is due
+                        self._push(job)
+                    else:
+                        self._fire(job)
+                if not due:
+                    self._checked = now
+                    self._condition.notify_all()
+                    self.clock.wait(self._condition,
+                                    self.max_sleep if timeout is None
+                                    else min(timeout, self.max_sleep))
+            self._dispatcher = None
+            self._condition.notify_all()
+
+    def settle(self, timeout: float = None) -> bool:
+        """
+        Wait until the Jobs due at the current time of the
+        clock have executed, after advancing a VirtualClock.
+        With the system clock, time doesn't stand still, and
+        it waits until no Job is scheduled or executing.
+        :param timeout: Seconds to wait at most, or None
+        :return: False if the timeout passed first, else True
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not self._executing and (
+                    self._dispatcher is None
+                    or self._checked == self.clock.time()),
+                timeout)
+
+    def _fire(self, job) -> None:
+        """
+        Execute a Job which is due, by its overlap policy.
+        """
+        if job.overlap != "queue" and job.trigger.reoccurring:
+            # Scheduled right away, to be due while executing
+            self._push(job)
+            if job.overlap == "skip" and job.executions:
+                job.skipped_runs += 1
+                return
+        job.executions += 1
+        self._executing += 1
+        self._pool.submit(self._execute, job)
+
+    def _execute(self, job) -> None:
+        """
+        Execute a Job in a worker thread, and schedule it again
+        if it is to run again, and wasn't scheduled when due.
+        """
+        again = False
+        try:
+            again = job.execute()
+        except Exception as e:
+            job.mark_failed(e)
+        finally:
+            with self._condition:
+                self._executing -= 1
+                job.executions -= 1
+                if not again:
+                    # Finished, or failed, Jobs are not scheduled again
+                    job.time_to_die = True
+                    self._remove(job)
+                    job.mark_stopped()
+                elif job.overlap != "queue":
+                    pass
+                elif not job.time_to_die and self._pool is not None:
+                    self._push(job)
+                    self._checked = None
+                else:
+                    job.mark_stopped()
+                self._condition.notify_all()
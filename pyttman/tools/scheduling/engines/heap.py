@@ -0,0 +1,85 @@
+"""
+This module defines the HeapSchedulerEngine, the default engine
+of the schedule API.
+"""
+import heapq
+import itertools
+
+from pyttman.tools.scheduling.clock import Clock
+from pyttman.tools.scheduling.engines.base import ThreadedSchedulerEngine
+
+
+class HeapSchedulerEngine(ThreadedSchedulerEngine):
+    """
+    Runs Jobs with a single dispatcher thread and a bounded pool
+    of worker threads, keeping the started Jobs in a min-heap by
+    the point in time they are due.
+
+    Killed Jobs are no longer scheduled as soon as they're killed,
+    while their entries are left in the heap and skipped once they
+    are the earliest. The heap is rebuilt without them when they
+    make up more than half of it.
+    """
+
+    def __init__(self, max_workers: int = 8, max_sleep: float = 1.0,
+                 clock: Clock = None):
+        """
+        :param max_workers: Amount of worker threads executing Jobs
+        :param max_sleep: Longest time in seconds the dispatcher
+               sleeps before checking the clock again
+        :param clock: Clock to tell the time by, such as a
+               VirtualClock. Defaults to the system clock.
+        """
+        super().__init__(max_workers=max_workers, max_sleep=max_sleep,
+                         clock=clock)
+        self._sequence = itertools.count()
+        # (due timestamp, sequence, job) entries
+        self._heap: list[tuple[float, int, object]] = []
+        # The scheduled Jobs, whose entries in the heap are not skipped
+        self._queued: set = set()
+
+    def _push(self, job) -> None:
+        deadline = job.trigger.next_trigger.timestamp()
+        heapq.heappush(self._heap, (deadline, next(self._sequence), job))
+        self._queued.add(job)
+        # Wake the dispatcher if the job is due before it wakes
+        if self._heap[0][2] is job:
+            self._condition.notify_all()
+
+    def _remove(self, job) -> None:
+        if job in self._queued:
+            self._queued.discard(job)
+            job.mark_stopped()
+            self._drop_removed()
+
+    def _drop_removed(self) -> None:
+        """
+        Drop the entries of removed Jobs from the top of the heap,
+        or rebuild it if they make up more than half of it.
+        """
+        queued = self._queued
+        if len(self._heap) > 2 * len(queued):
+            self._heap = [entry for entry in self._heap
+                          if entry[2] in queued]
+            heapq.heapify(self._heap)
+        while self._heap and self._heap[0][2] not in queued:
+            heapq.heappop(self._heap)
+
+    def _pop_due(self, now: float) -> tuple[list, float | None]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            job = heapq.heappop(self._heap)[2]
+            if job in self._queued:
+                self._queued.discard(job)
+                due.append(job)
+        self._drop_removed()
+        return due, self._heap[0][0] - now if self._heap else None
+
+    def _scheduled(self) -> int:
+        return len(self._queued)
+
+    def _clear(self) -> list:
+        jobs = list(self._queued)
+        self._heap.clear()
+        self._queued.clear()
+        return jobs
@@ -0,0 +1,157 @@
+"""
+This module defines the TimingWheelSchedulerEngine, for large
+amounts of pending Jobs, such as one-shot reminders.
+"""
+import math
+
+from pyttman.tools.scheduling.clock import Clock
+from pyttman.tools.scheduling.engines.base import ThreadedSchedulerEngine
+
+
+class TimingWheelSchedulerEngine(ThreadedSchedulerEngine):
+    """
+    Runs Jobs with a single dispatcher thread and a bounded pool
+    of worker threads, keeping the started Jobs in a hierarchical
+    timing wheel. Use it for Abilities which start a Job for every
+    request, such as reminders:
+
+        reminders = TimingWheelSchedulerEngine()
+
+        schedule.method(func=remind, exactly_at=due,
+                        engine=reminders, user=message.author)
+
+    Time is divided in ticks of 'tick' seconds. The wheel has
+    'levels' levels of 'slots' slots each - a slot in the first
+    level holds the Jobs due in one tick, and a slot in every
+    next level spans all slots of the level below. Jobs are put in
+    the slot of the lowest level which spans their point in time,
+    and moved down a level when the time of their slot has come,
+    until they're due. Jobs further ahead than the wheel spans
+    are kept in its last slot, and put in the wheel again from
+    there. With the defaults, the wheel spans almost ten days.
+
+    Starting and killing a Job takes constant time, regardless of
+    the amount of pending Jobs, and every pending Job takes one
+    entry in a slot. Jobs are executed with a precision of one
+    tick. Killed Jobs are removed from the wheel right away, so
+    killing Jobs by name or id with the schedule API frees them.
+    """
+
+    def __init__(self,
+                 tick: float = 0.05,
+                 slots: int = 64,
+                 levels: int = 4,
+                 max_workers: int = 8,
+                 max_sleep: float = 1.0,
+                 clock: Clock = None):
+        """
+        :param tick: Seconds of a tick, the precision of the wheel
+        :param slots: Amount of slots in each level
+        :param levels: Amount of levels
+        :param max_workers: Amount of worker threads executing Jobs
+        :param max_sleep: Longest time in seconds the dispatcher
+               sleeps before checking the clock again
+        :param clock: Clock to tell the time by, such as a
+               VirtualClock. Defaults to the system clock.
+        """
+        super().__init__(max_workers=max_workers, max_sleep=max_sleep,
+                         clock=clock)
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        # Ticks spanned by a slot in each level
+        self._spans = tuple(slots ** level for level in range(levels))
+        # Slots of each level, with the due tick of their Jobs
+        self._wheel: list[list[dict]] = [[{} for _ in range(slots)]
+                                         for _ in range(levels)]
+        self._locations: dict[object, tuple[int, int]] = {}
+        self._due: list = []
+        self._now: int | None = None
+
+    def _push(self, job) -> None:
+        if self._now is None:
+            self._now = math.floor(self.clock.time() / self.tick)
+        due_tick = math.ceil(job.trigger.next_trigger.timestamp() / self.tick)
+        self._insert(job, due_tick)
+        self._condition.notify_all()
+
+    def _insert(self, job, due_tick: int) -> None:
+        if due_tick <= self._now:
+            self._due.append(job)
+            return
+        for level, span in enumerate(self._spans):
+            if due_tick // span - self._now // span < self.slots:
+                slot = due_tick // span % self.slots
+                break
+        else:
+            # Beyond the wheel, it's put in again from its last slot
+            slot = (self._now // span + self.slots - 1) % self.slots
+        self._wheel[level][slot][job] = due_tick
+        self._locations[job] = (level, slot)
+
+    def _remove(self, job) -> None:
+        if (location := self._locations.pop(job, None)) is not None:
+            level, slot = location
+            del self._wheel[level][slot][job]
+            job.mark_stopped()
+
+    def _pop_due(self, now: float) -> tuple[list, float | None]:
+        current_tick = math.floor(now / self.tick)
+        while (next_tick := self._next_tick()) is not None \
+                and next_tick <= current_tick:
+            self._now = next_tick
+            self._turn()
+        if self._now is not None:
+            self._now = max(self._now, current_tick)
+        due, self._due = self._due, []
+        if next_tick is None:
+            return due, None
+        return due, next_tick * self.tick - now
+
+    def _next_tick(self) -> int | None:
+        """
+        The next tick at which Jobs are due, or moved down a level.
+        """
+        if not self._locations:
+            return None
+        ticks = []
+        for level, span in enumerate(self._spans):
+            slots = self._wheel[level]
+            current = self._now // span
+            for ahead in range(1, self.slots):
+                if slots[(current + ahead) % self.slots]:
+                    ticks.append((current + ahead) * span)
+                    break
+        return min(ticks)
+
+    def _turn(self) -> None:
+        """
+        Move the Jobs of the slots whose time has come down a
+        level, and take the Jobs due in the current tick.
+        """
+        for level in range(self.levels - 1, 0, -1):
+            span = self._spans[level]
+            if self._now % span:
+                continue
+            slot = self._now // span % self.slots
+            jobs, self._wheel[level][slot] = self._wheel[level][slot], {}
+            for job, due_tick in jobs.items():
+                del self._locations[job]
+                self._insert(job, due_tick)
+        slot = self._now % self.slots
+        jobs, self._wheel[0][slot] = self._wheel[0][slot], {}
+        for job in jobs:
+            del self._locations[job]
+        self._due.extend(jobs)
+
+    def _scheduled(self) -> int:
+        return len(self._locations) + len(self._due)
+
+    def _clear(self) -> list:
+        jobs = [*self._locations, *self._due]
+        for slots in self._wheel:
+            for slot in slots:
+                slot.clear()
+        self._locations.clear()
+        self._due.clear()
+        return jobs
@@ -0,0 +1,180 @@
+"""
+This module defines the leases, which make scheduled Jobs fire in
+a single process when an app runs in more than one process.
+"""
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import uuid
+from datetime import date, time
+from pathlib import Path
+from typing import Any, Callable
+
+from pyttman.tools.scheduling.clock import Clock, system_clock
+from pyttman.tools.scheduling.store import callable_name
+
+
+def default_lease_name(func: Callable, kwargs: dict[str, Any],
+                       rules: tuple) -> str:
+    """
+    The name of the lease of a Job, which is the same in every
+    process scheduling the same function, with the same keyword
+    arguments and rules for when to execute it. These are
+    serialized as JSON, not by their repr, which may differ by
+    process, such as for objects with a memory address in it.
+    :raises: ValueError, if the function can't be imported by name,
+             or the keyword arguments aren't JSON serializable
+    """
+    otherwise = "Otherwise, pass the name of its lease as 'lease', or " \
+                "lease=False to fire it in every process."
+    try:
+        name = callable_name(func)
+    except ValueError as e:
+        raise ValueError(f"{e} {otherwise}") from None
+    try:
+        definition = json.dumps([kwargs, rules], sort_keys=True,
+                                default=_serialize_time)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"The keyword arguments of '{name}' don't name "
+                         f"its lease the same in every process: {e}. "
+                         f"{otherwise}") from None
+    return f"{name}:{hashlib.sha1(definition.encode()).hexdigest()[:12]}"
+
+
+def _serialize_time(value: Any) -> str:
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class SqliteLeaseManager:
+    """
+    Hands out leases on Jobs to the processes of an app on the same
+    host, through a table in an SQLite database, so that each Job
+    fires in one process only. Configure it in settings.py with:
+
+        JOB_LEASES = "leases.sqlite3"
+
+    Every time a Job is due, the process takes, or renews, the
+    lease of the Job before executing it. The lease is held for
+    'ttl' seconds, and a Job due in another process while it's
+    held is left to the process holding it. If that process dies,
+    the Job fires in another process once the lease has expired,
+    which is at most 'ttl' seconds after it was last renewed.
+    Leases are released when the app exits, so that a process
+    replacing it takes over at once.
+
+    Jobs are given a lease by the name of their function, their
+    keyword arguments and when they execute, which is the same in
+    every process - unless named with 'lease' in schedule.method.
+    Choose a 'ttl' longer than the Jobs take to execute, and
+    longer than processes drift apart in firing them.
+    """
+
+    def __init__(self, path: str | Path, ttl: float = 30.0,
+                 table: str = "leases", clock: Clock = system_clock):
+        """
+        :param path: Path to the database file, which is created
+               if needed
+        :param ttl: Seconds a lease is held after taken or renewed
+        :param table: Name of the table to keep the leases in
+        :param clock: Clock to tell the time by, the system clock
+               shared by the processes, or a VirtualClock in tests
+        """
+        if not table.isidentifier():
+            raise ValueError(f"'{table}' is not a valid table name")
+        self.path = Path(path)
+        self.ttl = ttl
+        self.table = table
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._connection: sqlite3.Connection | None = None
+        self._pid: int | None = None
+        self._owner: str | None = None
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(path={self.path}, " \
+               f"ttl={self.ttl}, owner={self.owner})"
+
+    @property
+    def owner(self) -> str:
+        """
+        Identifies this process as the holder of leases, anew
+        in processes forked from it.
+        """
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._owner = f"{socket.gethostname()}:{self._pid}:" \
+                          f"{uuid.uuid4().hex[:8]}"
+            self._connection = None
+        return self._owner
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections aren't shared with forked processes
+        self.owner
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, timeout=10,
+                                               check_same_thread=False,
+                                               isolation_level=None)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} "
+                f"(name TEXT PRIMARY KEY, owner TEXT NOT NULL, "
+                f"expires REAL NOT NULL)")
+        return self._connection
+
+    def acquire(self, name: str) -> bool:
+        """
+        Take the lease with a name, or renew it if held by this
+        process already.
+        :return: Whether this process holds the lease
+        """
+        now = self.clock.time()
+        with self._lock:
+            cursor = self._connect().execute(
+                f"INSERT INTO {self.table} (name, owner, expires) "
+                f"VALUES (:name, :owner, :expires) "
+                f"ON CONFLICT (name) DO UPDATE SET "
+                f"owner = excluded.owner, expires = excluded.expires "
+                f"WHERE owner = excluded.owner OR expires <= :now",
+                {"name": name, "owner": self.owner,
+                 "expires": now + self.ttl, "now": now})
+            return cursor.rowcount == 1
+
+    def holder(self, name: str) -> str | None:
+        """
+        The owner holding the lease with a name, if it's held.
+        """
+        with self._lock:
+            row = self._connect().execute(
+                f"SELECT owner FROM {self.table} "
+                f"WHERE name = ? AND expires > ?",
+                (name, self.clock.time())).fetchone()
+        return row[0] if row else None
+
+    def release(self, name: str) -> None:
+        """
+        Release the lease with a name, if held by this process.
+        """
+        with self._lock:
+            self._connect().execute(
+                f"DELETE FROM {self.table} WHERE name = ? AND owner = ?",
+                (name, self.owner))
+
+    def release_all(self) -> None:
+        """
+        Release all leases held by this process.
+        """
+        with self._lock:
+            self._connect().execute(
+                f"DELETE FROM {self.table} WHERE owner = ?", (self.owner,))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
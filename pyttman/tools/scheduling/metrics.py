@@ -0,0 +1,171 @@
+"""
+This module defines the metrics kept for scheduled Jobs, of how
+late they fire, how long they wait to execute and how long they
+take.
+"""
+import bisect
+import math
+import threading
+from typing import Any
+
+
+class Histogram:
+    """
+    Counts observed values, in seconds, in buckets by upper
+    bound, like a Prometheus histogram. Buckets are not
+    cumulative here, but are exported cumulatively.
+    """
+
+    default_bounds = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                      0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self, bounds: tuple[float, ...] = default_bounds):
+        """
+        :param bounds: Ascending upper bounds of the buckets. A
+               last bucket for larger values is added.
+        """
+        self.bounds = tuple(bounds)
+        self.buckets = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(count={self.count}, " \
+               f"mean={self.mean:.6f}, max={self.max:.6f})"
+
+    def observe(self, value: float) -> None:
+        self.buckets[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile, such as 0.99, as the upper bound
+        of the bucket it's in. Values in the last bucket are
+        estimated as the largest value observed.
+        """
+        if not self.count:
+            return 0.0
+        rank = math.ceil(q * self.count)
+        seen = 0
+        for bound, amount in zip(self.bounds, self.buckets):
+            seen += amount
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self) -> dict[str, Any]:
+        cumulative, seen = {}, 0
+        for bound, amount in zip((*self.bounds, math.inf), self.buckets):
+            seen += amount
+            cumulative[str(bound) if bound != math.inf else "+Inf"] = seen
+        return {"count": self.count,
+                "sum": self.sum,
+                "max": self.max,
+                "mean": self.mean,
+                "p50": self.quantile(0.5),
+                "p99": self.quantile(0.99),
+                "buckets": cumulative}
+
+
+class JobMetrics:
+    """
+    Metrics of a Job, updated each time it executes:
+
+        lateness: Seconds from the point in time the Job was
+                  due until it was fired by the engine
+        queue_wait: Seconds from being fired until it started
+                    executing, waiting for a worker
+        duration: Seconds executing the function and recipient
+        failures: Executions where the function or recipient
+                  raised an exception, or the Job failed to
+                  execute, such as when its job store raised
+
+    A lateness, or queue wait, growing over time tells that the
+    engine is saturated - increase 'max_workers', or execute
+    slow Jobs in a pool of their own.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.failures = 0
+        self.lateness = Histogram()
+        self.queue_wait = Histogram()
+        self.duration = Histogram()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(runs={self.runs}, " \
+               f"failures={self.failures}, lateness={self.lateness}, " \
+               f"queue_wait={self.queue_wait}, duration={self.duration})"
+
+    def started(self, lateness: float, queue_wait: float) -> None:
+        with self._lock:
+            self.lateness.observe(max(lateness, 0.0))
+            self.queue_wait.observe(max(queue_wait, 0.0))
+
+    def finished(self, duration: float, failed: bool) -> None:
+        with self._lock:
+            self.runs += 1
+            self.failures += failed
+            self.duration.observe(duration)
+
+    def as_dict(self) -> dict[str, Any]:
+        with self._lock:
+            return {"runs": self.runs,
+                    "failures": self.failures,
+                    "lateness": self.lateness.as_dict(),
+                    "queue_wait": self.queue_wait.as_dict(),
+                    "duration": self.duration.as_dict()}
+
+
+def to_prometheus(jobs: list[dict[str, Any]],
+                  engines: list[dict[str, Any]]) -> str:
+    """
+    Format metrics from 'schedule.get_metrics' in the Prometheus
+    text exposition format.
+    """
+    lines = []
+
+    def labels(**values) -> str:
+        escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"')
+                   for value in values.values())
+        return ",".join(f'{key}="{value}"'
+                        for key, value in zip(values, escaped))
+
+    for name in ("runs", "failures", "skipped_runs", "standby_runs"):
+        lines.append(f"# TYPE pyttman_schedule_job_{name}_total counter")
+        for job in jobs:
+            job_labels = labels(job=job["name"], id=job["id"])
+            lines.append(f"pyttman_schedule_job_{name}_total{{{job_labels}}} "
+                         f"{job[name]}")
+
+    for name in ("lateness", "queue_wait", "duration"):
+        metric = f"pyttman_schedule_job_{name}_seconds"
+        lines.append(f"# TYPE {metric} histogram")
+        for job in jobs:
+            job_labels = labels(job=job["name"], id=job["id"])
+            histogram = job[name]
+            for bound, amount in histogram["buckets"].items():
+                lines.append(f'{metric}_bucket{{{job_labels},le="{bound}"}} '
+                             f'{amount}')
+            lines.append(f"{metric}_sum{{{job_labels}}} {histogram['sum']}")
+            lines.append(f"{metric}_count{{{job_labels}}} "
+                         f"{histogram['count']}")
+
+    gauges = dict.fromkeys(name for engine in engines
+                           for name in engine if name != "engine")
+    for name in gauges:
+        lines.append(f"# TYPE pyttman_schedule_engine_{name} gauge")
+        for engine in engines:
+            if name in engine:
+                engine_labels = labels(engine=engine["engine"])
+                lines.append(f"pyttman_schedule_engine_{name}"
+                             f"{{{engine_labels}}} {engine[name]}")
+    return "\n".join(lines) + "\n"
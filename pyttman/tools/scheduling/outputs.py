@@ -0,0 +1,174 @@
+"""
+This module defines the retention of outputs from Jobs without
+a recipient, in 'schedule.outputs'.
+"""
+import itertools
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+
+@dataclass(frozen=True, slots=True)
+class JobOutput:
+    """
+    The output of one execution of a Job.
+
+    :field job: The Job which executed.
+    :field result: What the function of the Job returned, or None
+                   if it raised an exception.
+    :field error: The exception raised by the function, if any.
+    :field finished_at: When the execution finished.
+    :field sequence: The order in which the outputs were kept.
+    """
+    job: Any
+    result: Any
+    error: Exception | None
+    finished_at: datetime
+    sequence: int = field(repr=False)
+
+    @property
+    def job_id(self) -> int:
+        return self.job.native_id
+
+    @property
+    def job_name(self) -> str:
+        return self.job.func_name
+
+
+class JobOutputs:
+    """
+    Keeps the outputs of Jobs without a recipient, in a ring
+    buffer of the last 'per_job' outputs for each Job. No more
+    than 'max_outputs' outputs are kept in all, by evicting the
+    oldest ones first. A Job executing every second thereby
+    doesn't fill the memory, if its outputs are never read.
+
+    Configure the bounds with:
+
+        schedule.outputs = JobOutputs(per_job=10, max_outputs=1000)
+
+    Outputs are queried by the name or id of the Job, without
+    taking them from the buffers:
+
+        for output in schedule.outputs.get(job_name="check_feeds"):
+            print(output.finished_at, output.result, output.error)
+
+    The outputs not read with 'next_unread' are kept in order as
+    well, bound by 'max_outputs' - for 'schedule.get_latest_output'.
+    """
+
+    def __init__(self, per_job: int = 10, max_outputs: int = 1000):
+        """
+        :param per_job: Outputs kept for each Job
+        :param max_outputs: Outputs kept in all
+        """
+        if per_job < 1 or max_outputs < 1:
+            raise ValueError("'per_job' and 'max_outputs' must be "
+                             "at least 1")
+        self.per_job = per_job
+        self.max_outputs = max_outputs
+        self._condition = threading.Condition()
+        self._sequence = itertools.count()
+        self._by_job: dict[int, deque[JobOutput]] = {}
+        self._outputs: OrderedDict[int, JobOutput] = OrderedDict()
+        self._unread: deque[JobOutput] = deque(maxlen=max_outputs)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(per_job={self.per_job}, " \
+               f"max_outputs={self.max_outputs}, outputs={len(self)})"
+
+    def __len__(self):
+        return len(self._outputs)
+
+    def add(self, job) -> JobOutput:
+        """
+        Keep the output of a Job, which has just executed.
+        """
+        error = job.error
+        output = JobOutput(job=job,
+                           result=None if error is not None else job.result,
+                           error=error,
+                           finished_at=job.engine.clock.now(),
+                           sequence=next(self._sequence))
+        with self._condition:
+            outputs = self._by_job.setdefault(job.native_id, deque())
+            if len(outputs) == self.per_job:
+                del self._outputs[outputs.popleft().sequence]
+            outputs.append(output)
+            self._outputs[output.sequence] = output
+            while len(self._outputs) > self.max_outputs:
+                _, oldest = self._outputs.popitem(last=False)
+                self._drop(oldest)
+            self._unread.append(output)
+            self._condition.notify_all()
+        return output
+
+    def _drop(self, output: JobOutput) -> None:
+        # The oldest output kept overall, is the oldest of its Job
+        outputs = self._by_job[output.job_id]
+        outputs.popleft()
+        if not outputs:
+            del self._by_job[output.job_id]
+
+    def get(self, job_name: str = None, job_id: int = None) -> \
+            list[JobOutput]:
+        """
+        The outputs kept, oldest first, of the Jobs with a name
+        or id - or of all Jobs.
+        """
+        with self._condition:
+            if job_id is not None:
+                return list(self._by_job.get(int(job_id), ()))
+            if job_name is None:
+                return list(self._outputs.values())
+            return [output for output in self._outputs.values()
+                    if output.job_name == job_name]
+
+    def latest(self, job_name: str = None, job_id: int = None) -> \
+            JobOutput | None:
+        """
+        The most recent output of the Jobs with a name or id,
+        or of any Job. None if there is none.
+        """
+        with self._condition:
+            if job_id is not None:
+                outputs = self._by_job.get(int(job_id))
+                return outputs[-1] if outputs else None
+            for output in reversed(self._outputs.values()):
+                if job_name is None or output.job_name == job_name:
+                    return output
+        return None
+
+    def has_unread(self) -> bool:
+        return bool(self._unread)
+
+    def next_unread(self, timeout: float = None) -> JobOutput:
+        """
+        The oldest output not read with this method before,
+        waiting for one if there is none.
+        :param timeout: Seconds to wait, or None to wait until
+               there is one
+        :raises: TimeoutError, if there was none within 'timeout'
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._unread, timeout):
+                raise TimeoutError("No job output within the timeout")
+            return self._unread.popleft()
+
+    def clear(self, job_id: int = None) -> None:
+        """
+        Drop the outputs of a Job, or of all Jobs.
+        """
+        with self._condition:
+            if job_id is None:
+                self._by_job.clear()
+                self._outputs.clear()
+                self._unread.clear()
+                return
+            for output in self._by_job.pop(int(job_id), ()):
+                del self._outputs[output.sequence]
+            self._unread = deque((output for output in self._unread
+                                  if output.job_id != int(job_id)),
+                                 maxlen=self.max_outputs)
@@ -1,14 +1,27 @@
 import asyncio
 import functools
 import inspect
+import json
+import os
+import threading
 import warnings
-from datetime import datetime
-from queue import Queue
+from concurrent.futures import Executor, ProcessPoolExecutor, \
+    ThreadPoolExecutor
+from datetime import datetime, tzinfo
 from typing import Dict, Generator, Any, Callable, Tuple
 
 from multidict import MultiDict
 
-from pyttman.tools.scheduling.components import Job, TimeTrigger
+from pyttman.tools.scheduling.components import CronTrigger, Job, \
+    TimeTrigger
+from pyttman.tools.scheduling.engines.base import AbstractSchedulerEngine
+from pyttman.tools.scheduling.engines.heap import HeapSchedulerEngine
+from pyttman.tools.scheduling.leases import SqliteLeaseManager, \
+    default_lease_name
+from pyttman.tools.scheduling.metrics import to_prometheus
+from pyttman.tools.scheduling.outputs import JobOutput, JobOutputs
+from pyttman.tools.scheduling.store import SqliteJobStore, \
+    apply_misfire_policy, resolve_callable
 
 
 # noinspection PyPep8Naming
@@ -22,16 +35,41 @@ class schedule:
     'method' method as @Schedule.method,
     or by calling Schedule.run() with
     provided args.
+
+    Jobs are run by the scheduler engine in
+    'engine', which can be replaced before any
+    Job is started, to configure it:
+
+        schedule.engine = HeapSchedulerEngine(max_workers=16)
+
+    The function of a Job can be executed in a pool
+    of its own instead, such as a process pool for
+    CPU-heavy jobs, with 'executor'. The shared
+    pools "threads" and "processes" are created when
+    first used, while named pools with a max
+    concurrency are created with 'create_pool'.
+
+    Jobs are kept in 'id_job_map' and 'name_job_map'
+    until they're done or killed.
     """
+    engine: AbstractSchedulerEngine = HeapSchedulerEngine()
+    pools: Dict[str, Executor] = {}
     id_job_map: Dict[int, Job] = {}
     name_job_map: MultiDict[str, Job] = MultiDict()
-    outputs: Queue[Job] = Queue()
+    outputs: JobOutputs = JobOutputs()
+    store: SqliteJobStore | None = None
+    leases: SqliteLeaseManager | None = None
+    _lock = threading.RLock()
 
     @staticmethod
     def method(func, at: str = None, every: str = None,
                delay=None, exactly_at: datetime = None,
                recipient: Callable = None, start_now=True,
-               async_loop=None, **kwargs) -> Job:
+               async_loop=None, engine: AbstractSchedulerEngine = None,
+               cron: str = None, timezone: str | tzinfo = None,
+               executor: str | Executor = None, overlap: str = "queue",
+               persist: bool = False, misfire: str = "once",
+               lease: bool | str = True, **kwargs) -> Job:
         """
         Registers a new schedule Job. Provide strings
         to define when to execute the job, if it is
@@ -69,9 +107,41 @@ class schedule:
         @param start_now: Start the job now, default: True. If not,
                           see schedule.unstarted
         @param async_loop: optional loop to schedule job and/or recipient in
+        @param engine: optional scheduler engine to run the job, instead
+                       of schedule.engine
+        @param cron: str, cron expression for execution, such as
+                     "*/15 9-17 * * mon-fri", instead of every, at,
+                     delay and exactly_at
+        @param timezone: optional timezone name or pytz tzinfo for 'cron',
+                         defaults to local time
+        @param executor: optional pool to execute 'func' in: "threads",
+                         "processes", the name of a pool created with
+                         schedule.create_pool, or an Executor. Functions
+                         executed in processes must be picklable.
+        @param overlap: str, when a reoccurring job is due while still
+                        executing: "queue" the run until the previous
+                        one finished (default), "skip" it, or "allow"
+                        both to execute at once
+        @param persist: Persist the job in schedule.store, configured
+                        with JOB_STORE in settings.py, to start it
+                        again when the app restarts
+        @param misfire: str, for persisted jobs whose time passed while
+                        the app was down: fire "once" (default), fire
+                        for "all" passed points in time, or "skip" them
+        @param lease: With schedule.leases, configured with JOB_LEASES
+                      in settings.py, the job fires in the one process
+                      of the app holding its lease. Optionally the name
+                      of the lease, or False to fire it in every process.
+                      Jobs whose lease can't be named by their function
+                      and kwargs, such as bound methods, fire in every
+                      process, with a warning, unless given a name
         @param kwargs: kwargs, passed to the function in 'func' when creating
-                       the partial function which is then passed to the Job
+                       the partial function which is then passed to the Job.
+                       Arguments of the function named like the options
+                       above are passed with functools.partial instead
         @return: Job instance
+        @raises: ValueError, if an option is given which the function
+                 takes an argument by the name of, too
 
         """
         async_warn = "\nThe callable '{0}' is asynchronous but the " \
@@ -80,10 +150,31 @@ class schedule:
                      "executed through 'asyncio.run().'\n"
         return_self = False
 
-        # Create a TimeTrigger for the Job
-        trigger = TimeTrigger(every=every, at=at,
-                              delay=delay,
-                              exactly_at=exactly_at)
+        schedule._assert_no_collisions(
+            func, engine=engine, cron=cron, timezone=timezone,
+            executor=executor, overlap=overlap, persist=persist,
+            misfire=misfire, lease=lease)
+        if misfire not in SqliteJobStore.misfire_policies:
+            raise ValueError(f"'{misfire}' is not a misfire policy, use one "
+                             f"of {SqliteJobStore.misfire_policies}")
+        if persist and schedule.store is None:
+            raise ValueError("Jobs can't be persisted without a job store. "
+                             "Set JOB_STORE in settings.py.")
+
+        # Create a TimeTrigger, or a CronTrigger, for the Job, telling
+        # the time by the clock of the engine
+        engine = schedule.engine if engine is None else engine
+        if cron is None:
+            trigger = TimeTrigger(every=every, at=at,
+                                  delay=delay,
+                                  exactly_at=exactly_at,
+                                  clock=engine.clock)
+        elif any((at, every, delay, exactly_at)):
+            raise ValueError("'cron' can't be combined with 'every', "
+                             "'at', 'delay' or 'exactly_at'")
+        else:
+            trigger = CronTrigger(cron, timezone=timezone,
+                                  clock=engine.clock)
 
         if not (recipient := recipient):
             recipient = schedule.schedule_default_catcher
@@ -91,7 +182,10 @@ class schedule:
 
         func_is_async = inspect.iscoroutinefunction(func)
         recipient_is_async = inspect.iscoroutinefunction(recipient)
-        if func_is_async or recipient_is_async:
+        # Engines with native async support await them in their loop
+        if engine.native_async:
+            pass
+        elif func_is_async or recipient_is_async:
             if async_loop is None:
                 try:
                     async_loop = asyncio.get_running_loop()
@@ -99,26 +193,190 @@ class schedule:
                 except RuntimeError:
                     warnings.warn(async_warn.format(func))
 
-        if inspect.iscoroutinefunction(recipient) and async_loop is None:
-            warnings.warn(async_warn.format(recipient))
+            if recipient_is_async and async_loop is None:
+                warnings.warn(async_warn.format(recipient))
 
         job = Job(func=functools.partial(func, **kwargs),
                   is_async=func_is_async,
                   trigger=trigger,
                   recipient=recipient,
                   func_name=repr(func),
+                  engine=engine,
                   async_loop=async_loop,
-                  return_self=return_self)
+                  return_self=return_self,
+                  executor=schedule.get_pool(executor)
+                  if isinstance(executor, str) else executor,
+                  executor_name=executor
+                  if isinstance(executor, str) else None,
+                  overlap=overlap,
+                  store=schedule.store if persist else None,
+                  misfire=misfire)
+        if persist:
+            # Raises ValueError if the job can't be persisted
+            job.store_key = schedule.store.record(job)["key"]
+        if schedule.leases is not None and lease:
+            if isinstance(lease, str):
+                job.lease = lease
+            elif persist:
+                # Loaded with the same lease, by every process
+                job.lease = f"job-store:{job.store_key}"
+            else:
+                try:
+                    job.lease = default_lease_name(
+                        func, kwargs, (at, every, delay, exactly_at, cron))
+                except ValueError as e:
+                    warnings.warn(f"\nThe job is not given a lease, and "
+                                  f"fires in every process: {e}\n")
+            if job.lease is not None:
+                job.leases = schedule.leases
+        return schedule._add_job(job, start_now)
 
+    @staticmethod
+    def _assert_no_collisions(func: Callable, **options) -> None:
+        """
+        Raise if a scheduler option, added to 'method' after jobs
+        could pass a keyword argument by its name to their function,
+        is given while the function takes an argument by its name.
+        The argument would silently be taken as the option.
+        """
+        try:
+            arguments = inspect.signature(func).parameters
+        except (TypeError, ValueError):
+            return
+        # Arguments given with functools.partial already are not taken
+        bound = func.keywords if isinstance(func, functools.partial) else {}
+        defaults = inspect.signature(schedule.method).parameters
+        collisions = [name for name, value in options.items()
+                      if name in arguments and name not in bound
+                      and value is not defaults[name].default]
+        if collisions:
+            raise ValueError(
+                f"{func} takes {collisions} as arguments, which are "
+                f"options of the job. Pass them to the function with "
+                f"functools.partial, such as "
+                f"func=functools.partial(func, {collisions[0]}=...)")
+
+    @staticmethod
+    def _add_job(job: Job, start_now: bool) -> Job:
         # Map job in schedule and start it
-        schedule.name_job_map.add(job.func_name, job)
+        job.on_stopped = schedule._remove_job
+        with schedule._lock:
+            schedule.name_job_map.add(job.func_name, job)
 
         # Start the job, or add it to unstarted for later starts
         if start_now:
-            job.start()
-            schedule.id_job_map[job.native_id] = job
+            schedule._start(job)
         return job
 
+    @staticmethod
+    def _start(job: Job) -> None:
+        # Not holding the lock, which engines take in reverse order
+        job.start()
+        with schedule._lock:
+            # Unless it finished in a worker already
+            if job.running:
+                schedule.id_job_map[job.native_id] = job
+
+    @staticmethod
+    def _remove_job(job: Job) -> None:
+        """
+        Forget a Job which is done, or killed, called by
+        the Job once it's no longer scheduled.
+        """
+        with schedule._lock:
+            if schedule.id_job_map.get(job.native_id) is job:
+                del schedule.id_job_map[job.native_id]
+            # MultiDict can't remove a single value of a key
+            for other in schedule.name_job_map.popall(job.func_name, []):
+                if other is not job:
+                    schedule.name_job_map.add(job.func_name, other)
+
+    @staticmethod
+    def load_jobs() -> list[Job]:
+        """
+        Start the Jobs persisted in schedule.store again,
+        such as when the app restarts. The misfire policy
+        of each Job decides whether it fires for the points
+        in time which passed while the app was down. Jobs
+        which won't fire again are deleted from the store.
+        @return: The started Jobs
+        """
+        if schedule.store is None:
+            return []
+        loaded = {job.store_key for job in schedule.get_all_jobs()}
+        jobs = []
+        for record in schedule.store.load():
+            if record["key"] in loaded:
+                continue
+            func = resolve_callable(record["func"])
+            if record["recipient"] is None:
+                recipient = schedule.schedule_default_catcher
+            else:
+                recipient = resolve_callable(record["recipient"])
+            executor = record["executor"]
+            record["trigger"].clock = schedule.engine.clock
+            job = Job(func=functools.partial(func, **record["kwargs"]),
+                      is_async=inspect.iscoroutinefunction(func),
+                      trigger=record["trigger"],
+                      recipient=recipient,
+                      func_name=repr(func),
+                      engine=schedule.engine,
+                      return_self=record["recipient"] is None,
+                      executor=None if executor is None
+                      else schedule.get_pool(executor),
+                      executor_name=executor,
+                      overlap=record["overlap"],
+                      store=schedule.store,
+                      misfire=record["misfire"])
+            job.store_key = record["key"]
+            if schedule.leases is not None:
+                job.leases = schedule.leases
+                job.lease = f"job-store:{job.store_key}"
+            if not apply_misfire_policy(job.trigger, job.misfire):
+                schedule.store.delete(job)
+                continue
+            jobs.append(schedule._add_job(job, start_now=True))
+        return jobs
+
+    @staticmethod
+    def create_pool(name: str, max_workers: int,
+                    processes: bool = False) -> Executor:
+        """
+        Create a named pool to execute the functions of
+        Jobs in, by passing its name as 'executor' to
+        schedule.method. No more than 'max_workers' Jobs
+        execute in the pool at once.
+        @param name: Name of the pool
+        @param max_workers: Max amount of Jobs executing at once
+        @param processes: Execute the Jobs in processes, not threads
+        @return: The pool
+        @raises: ValueError, if a pool with the name exists
+        """
+        if name in schedule.pools:
+            raise ValueError(f"A pool named '{name}' already exists")
+        executor_class = ProcessPoolExecutor if processes \
+            else ThreadPoolExecutor
+        pool = executor_class(max_workers=max_workers)
+        schedule.pools[name] = pool
+        return pool
+
+    @staticmethod
+    def get_pool(name: str) -> Executor:
+        """
+        Returns the pool with a name, creating the shared
+        "threads" and "processes" pools when first used.
+        @param name: Name of the pool
+        @raises: ValueError, if no pool with the name exists
+        """
+        if name not in schedule.pools and name in ("threads", "processes"):
+            schedule.create_pool(name, max_workers=os.cpu_count() or 1,
+                                 processes=name == "processes")
+        try:
+            return schedule.pools[name]
+        except KeyError:
+            raise ValueError(f"No pool named '{name}' exists. Create it "
+                             f"with schedule.create_pool") from None
+
     @staticmethod
     def schedule_default_catcher(job: Job) -> None:
         """
@@ -127,15 +385,15 @@ class schedule:
         by the creator of a schedule job.
 
         All Jobs without a designated recipient
-        callable will have their return value end
-        up in this method which maps their return
-        value with themselves as source, in a dict object
-        and stored in the public accessible queue "outputs".
+        callable will have their return value, or
+        error, end up in this method which keeps
+        it with the Job as source in the bounded
+        buffers of "schedule.outputs", see JobOutputs.
 
         :param job: Job instance which has been executed
                     at least once
         """
-        schedule.outputs.put(job)
+        schedule.outputs.add(job)
 
     @staticmethod
     def get_jobs(job_name: str = None, job_id: int = None) -> \
@@ -157,11 +415,12 @@ class schedule:
             raise ValueError("either job_name or job_id must be specified")
 
         if job_name:
-            try:
-                for job in schedule.name_job_map.getall(job_name):
-                    yield job
-            except KeyError:
+            with schedule._lock:
+                jobs = schedule.name_job_map.getall(job_name, None)
+            if jobs is None:
                 yield
+            else:
+                yield from jobs
         elif job_id:
             try:
                 yield schedule.id_job_map[int(job_id)]
@@ -175,8 +434,10 @@ class schedule:
         :param job_name: str, name of the job
         :param job_id: int, id of the job
         """
-        for job in schedule.get_jobs(job_name, job_id):
-            job.kill_gracefully()
+        # Killed Jobs are removed from the maps iterated
+        for job in list(schedule.get_jobs(job_name, job_id)):
+            if job is not None:
+                job.kill_gracefully()
 
     @staticmethod
     def get_all_jobs() -> Generator[Job, Any, None]:
@@ -185,20 +446,96 @@ class schedule:
         combined.
         :rtype: Job
         """
-        for i in schedule.name_job_map.values():
-            yield i
+        with schedule._lock:
+            jobs = list(schedule.name_job_map.values())
+        yield from jobs
+
+    @staticmethod
+    def get_outputs(job_name: str = None, job_id: int = None) -> \
+            list[JobOutput]:
+        """
+        Returns the outputs kept of Jobs without a
+        recipient, oldest first, without removing them.
+        @param job_name: Name of the jobs (optional)
+        @param job_id: Id of the job (optional)
+        @return: JobOutputs with result, error and time
+        """
+        return schedule.outputs.get(job_name=job_name, job_id=job_id)
 
     @staticmethod
     def has_outputs() -> bool:
         """
         Returns whether there are outputs in
-        the output queue 'schedule.outputs'
+        'schedule.outputs' not read with
+        'get_latest_output'
+        """
+        return schedule.outputs.has_unread()
+
+    @staticmethod
+    def get_latest_output(timeout: float = None) -> Job:
+        """
+        Returns the Job of the oldest output not read
+        with this method before, waiting for one if
+        there is none. The output is kept.
+        @param timeout: Seconds to wait, or None to wait
+        @raises: TimeoutError, if none was within 'timeout'
         """
-        return bool(schedule.outputs.qsize())
+        return schedule.outputs.next_unread(timeout).job
 
     @staticmethod
-    def get_latest_output():
-        return schedule.outputs.get()
+    def get_metrics(job_name: str = None, job_id: int = None) -> \
+            list[dict[str, Any]]:
+        """
+        Returns the metrics of Jobs: how many times they
+        ran, failed, were skipped and were left to another
+        process holding their lease, and histograms of how
+        late they fired, how long they waited for a worker
+        and how long they took, in seconds. See JobMetrics.
+        @param job_name: Name of the jobs (optional)
+        @param job_id: Id of the job (optional)
+        @return: dicts with the metrics, name and id of each job
+        """
+        if job_name is None and job_id is None:
+            jobs = schedule.get_all_jobs()
+        else:
+            jobs = schedule.get_jobs(job_name, job_id)
+        return [{"name": job.func_name,
+                 "id": job.native_id,
+                 "running": job.running,
+                 "skipped_runs": job.skipped_runs,
+                 "standby_runs": job.standby_runs,
+                 **job.metrics.as_dict()}
+                for job in jobs if job is not None]
+
+    @staticmethod
+    def export_metrics(fmt: str = "json") -> str:
+        """
+        Export the metrics of all Jobs, and the gauges of the
+        engines running them, such as the amount of executing
+        Jobs, to tell when the scheduler is saturated.
+        @param fmt: "json", or "prometheus" for the Prometheus
+                    text exposition format
+        @return: str with the metrics
+        @raises: ValueError, if the format is unknown
+        """
+        engines = [schedule.engine]
+        for job in schedule.get_all_jobs():
+            if all(job.engine is not engine for engine in engines):
+                engines.append(job.engine)
+        engine_stats, names = [], MultiDict()
+        for engine in engines:
+            name = type(engine).__name__
+            names.add(name, engine)
+            if (amount := len(names.getall(name))) > 1:
+                name = f"{name}-{amount}"
+            engine_stats.append({"engine": name, **engine.stats()})
+        jobs = schedule.get_metrics()
+        if fmt == "json":
+            return json.dumps({"jobs": jobs, "engines": engine_stats})
+        if fmt == "prometheus":
+            return to_prometheus(jobs, engine_stats)
+        raise ValueError(f"'{fmt}' is not a metrics format, use "
+                         f"'json' or 'prometheus'")
 
     @staticmethod
     def get_unstarted_jobs(name: str = None) -> Tuple[Job]:
@@ -222,6 +559,5 @@ class schedule:
         @param name: Name of the job to start (may start multiple)
         @return: None
         """
-        for job in schedule.get_jobs(job_name=name):
-            job.start()
-            schedule.id_job_map[job.native_id] = job
+        for job in list(schedule.get_jobs(job_name=name)):
+            schedule._start(job)
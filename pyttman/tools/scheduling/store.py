@@ -0,0 +1,210 @@
+"""
+This module defines the job store, which persists scheduled Jobs
+so that they survive a restart of the app.
+"""
+import importlib
+import pickle
+import sqlite3
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Callable
+
+import pytz
+
+from pyttman.tools.scheduling.components import CronTrigger, TimeTrigger
+
+
+def callable_name(func: Callable) -> str:
+    """
+    The name a callable is imported by again, as
+    "module:qualname".
+    :raises: ValueError, if the callable can't be imported by name,
+             such as lambdas, nested functions and bound methods
+    """
+    name = f"{getattr(func, '__module__', None)}:" \
+           f"{getattr(func, '__qualname__', None)}"
+    try:
+        if resolve_callable(name) == func:
+            return name
+    except (AttributeError, ImportError, ValueError):
+        pass
+    raise ValueError(f"{func} can't be persisted, since it can't be "
+                     f"imported by name. Use a function or class defined "
+                     f"at the top level of a module.")
+
+
+def resolve_callable(name: str) -> Callable:
+    """
+    Import a callable by a name from 'callable_name'.
+    """
+    module_name, qualname = name.split(":")
+    obj = importlib.import_module(module_name)
+    for attribute in qualname.split("."):
+        obj = getattr(obj, attribute)
+    return obj
+
+
+def apply_misfire_policy(trigger: TimeTrigger | CronTrigger,
+                         misfire: str) -> bool:
+    """
+    Adjust a trigger, whose points in time may have passed while
+    the app was down, by a misfire policy:
+
+        "once": Fire once for the passed points in time
+        "all": Fire once for each of the passed points in time
+        "skip": Don't fire for the passed points in time
+
+    :return: False if the trigger won't fire again, else True
+    """
+    next_trigger = trigger.next_trigger
+    now = trigger.clock.now(pytz.utc if next_trigger.tzinfo else None)
+    if next_trigger > now:
+        return True
+    if misfire == "all":
+        # TimeTriggers fire for each passed point in time by themselves
+        if isinstance(trigger, CronTrigger):
+            trigger.catch_up = True
+        return True
+
+    last = next_trigger
+    while (following := trigger.following(last)) is not None \
+            and following <= now:
+        last = following
+    if following is None:
+        return misfire != "skip"
+    trigger.next_trigger = last if misfire == "once" else following
+    return True
+
+
+class SqliteJobStore:
+    """
+    Persists scheduled Jobs in an SQLite database, so that they
+    are loaded again when the app restarts. Configure it in
+    settings.py with:
+
+        JOB_STORE = "jobs.sqlite3"
+
+    and persist Jobs with:
+
+        schedule.method(func=remind, exactly_at=due, persist=True,
+                        misfire="once", text="Water the plants")
+
+    The function, recipient and keyword arguments of a Job are
+    persisted with its trigger, when started and each time it has
+    executed. Jobs are deleted from the store once they're done,
+    failed or killed - but not when the app shuts down.
+
+    Functions and recipients are persisted by name, and must be
+    importable by it, while keyword arguments are pickled. Persist
+    Jobs created while the app runs, such as reminders - Jobs
+    created when the app starts are created again anyway.
+    """
+
+    misfire_policies = ("once", "all", "skip")
+
+    def __init__(self, path: str | Path, table: str = "jobs"):
+        """
+        :param path: Path to the database file, which is created
+               if needed
+        :param table: Name of the table to store the Jobs in
+        """
+        if not table.isidentifier():
+            raise ValueError(f"'{table}' is not a valid table name")
+        self.path = Path(path)
+        self.table = table
+        self._lock = threading.Lock()
+        self._connection: sqlite3.Connection | None = None
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(path={self.path}, " \
+               f"table={self.table})"
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.path,
+                                               check_same_thread=False,
+                                               isolation_level=None)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} "
+                f"(key TEXT PRIMARY KEY, func TEXT NOT NULL, "
+                f"recipient TEXT, kwargs BLOB NOT NULL, "
+                f"trigger BLOB NOT NULL, options BLOB NOT NULL)")
+        return self._connection
+
+    @staticmethod
+    def record(job) -> dict[str, Any]:
+        """
+        The persisted form of a Job.
+        :raises: ValueError, if the Job can't be persisted
+        """
+        recipient = None if job.return_self else \
+            callable_name(job.recipient)
+        if job.executor is not None and job.executor_name is None:
+            raise ValueError("Jobs executing in an Executor object can't "
+                             "be persisted. Pass the name of the pool.")
+        try:
+            kwargs = pickle.dumps(job.func.keywords)
+            trigger = pickle.dumps(job.trigger)
+        except (pickle.PicklingError, AttributeError, TypeError) as e:
+            raise ValueError(f"The job '{job.func_name}' can't be "
+                             f"persisted: {e}") from e
+        options = {"misfire": job.misfire, "overlap": job.overlap,
+                   "executor": job.executor_name}
+        return {"key": job.store_key or uuid.uuid4().hex,
+                "func": callable_name(job.func.func),
+                "recipient": recipient,
+                "kwargs": kwargs,
+                "trigger": trigger,
+                "options": pickle.dumps(options)}
+
+    def save(self, job) -> None:
+        """
+        Insert, or update, a Job in the store.
+        """
+        record = self.record(job)
+        job.store_key = record["key"]
+        with self._lock:
+            self._connect().execute(
+                f"INSERT OR REPLACE INTO {self.table} "
+                f"(key, func, recipient, kwargs, trigger, options) VALUES "
+                f"(:key, :func, :recipient, :kwargs, :trigger, :options)",
+                record)
+
+    def delete(self, job) -> None:
+        """
+        Delete a Job from the store, if it's in it.
+        """
+        if job.store_key is None:
+            return
+        with self._lock:
+            self._connect().execute(
+                f"DELETE FROM {self.table} WHERE key = ?", (job.store_key,))
+
+    def load(self) -> list[dict[str, Any]]:
+        """
+        Load the persisted Jobs, with their function, recipient,
+        keyword arguments and trigger.
+        :return: dicts with the keys of the table, and the options
+        """
+        with self._lock:
+            rows = self._connect().execute(
+                f"SELECT key, func, recipient, kwargs, trigger, options "
+                f"FROM {self.table}").fetchall()
+        records = []
+        for key, func, recipient, kwargs, trigger, options in rows:
+            records.append({"key": key,
+                            "func": func,
+                            "recipient": recipient,
+                            "kwargs": pickle.loads(kwargs),
+                            "trigger": pickle.loads(trigger),
+                            **pickle.loads(options)})
+        return records
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
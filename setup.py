@@ -40,6 +40,7 @@ setup(
         "requests",
         "py7zr",
         "ordered_set",
+        "pytz",
     ],
     entry_points={
         "console_scripts": [
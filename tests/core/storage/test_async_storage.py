@@ -0,0 +1,112 @@
+import threading
+from unittest import IsolatedAsyncioTestCase
+
+from pyttman.core.storage.basestorage import Storage
+from pyttman.core.storage.concurrent import ConcurrentStorage
+from pyttman.core.storage.engines.base import AbstractStorageEngine
+from pyttman.core.storage.evicting import EvictingStorage
+
+
+class RecordingStorageEngine(AbstractStorageEngine):
+    """
+    Keeps items in a dict, and records the threads it's used from.
+    """
+    def __init__(self, blocking=True):
+        self.blocking = blocking
+        self.items = {}
+        self.threads = []
+
+    def read(self, key):
+        self.threads.append(threading.get_ident())
+        return self.items[key]
+
+    def read_all(self):
+        return iter(self.items.items())
+
+    def write(self, key, value):
+        self.threads.append(threading.get_ident())
+        self.items[key] = value
+
+    def delete(self, key):
+        self.threads.append(threading.get_ident())
+        self.items.pop(key, None)
+
+    def clear(self):
+        self.items.clear()
+
+
+class NativeAsyncStorageEngine(RecordingStorageEngine):
+    def __init__(self):
+        super().__init__(blocking=False)
+        self.awaited = []
+
+    async def aread(self, key):
+        self.awaited.append(key)
+        return self.items[key]
+
+
+def complete_without_suspending(coroutine):
+    try:
+        coroutine.send(None)
+    except StopIteration as e:
+        return e.value
+    coroutine.close()
+    raise AssertionError("The coroutine was suspended")
+
+
+class TestAsyncStorage(IsolatedAsyncioTestCase):
+
+    def test_storage_in_memory_completes_right_away(self):
+        storage = Storage()
+        complete_without_suspending(storage.aput("a", 1))
+        self.assertEqual(complete_without_suspending(storage.aget("a")), 1)
+        complete_without_suspending(storage.adelete("a"))
+        self.assertIsNone(complete_without_suspending(storage.aget("a")))
+
+    async def test_blocking_engine_is_offloaded(self):
+        engine = RecordingStorageEngine()
+        engine.items["stored"] = "value"
+        storage = Storage(engine=engine)
+
+        self.assertEqual(await storage.aget("stored"), "value")
+        await storage.aput("new", 1)
+        await storage.adelete("new")
+        self.assertNotIn(threading.get_ident(), engine.threads)
+        self.assertEqual(engine.items, {"stored": "value"})
+        with self.assertRaises(KeyError):
+            await storage.adelete("new")
+
+        # Served from memory, without reading the engine again
+        reads = len(engine.threads)
+        self.assertEqual(await storage.aget("stored"), "value")
+        self.assertEqual(len(engine.threads), reads)
+
+    async def test_native_async_engine(self):
+        engine = NativeAsyncStorageEngine()
+        engine.items["stored"] = "value"
+        storage = Storage(engine=engine)
+        self.assertEqual(await storage.aget("stored"), "value")
+        self.assertEqual(engine.awaited, ["stored"])
+
+    async def test_bulk_operations(self):
+        engine = RecordingStorageEngine()
+        engine.items.update({"a": 1, "b": 2})
+        storage = Storage(engine=engine)
+        self.assertEqual(await storage.aget_many(["a", "b", "c"]),
+                         {"a": 1, "b": 2})
+        await storage.aput_many({"c": 3, "d": 4})
+        await storage.adelete_many(["a", "missing"])
+        self.assertEqual(engine.items, {"b": 2, "c": 3, "d": 4})
+        self.assertEqual(set(storage), {"b", "c", "d"})
+
+    async def test_subclasses_keep_their_semantics(self):
+        storage = EvictingStorage(engine=RecordingStorageEngine(),
+                                  max_entries=2)
+        await storage.aput_many([("a", 1), ("b", 2), ("c", 3)])
+        self.assertEqual(storage.stats.evictions, 1)
+        self.assertEqual(await storage.aget("a"), 1)
+
+        storage = ConcurrentStorage()
+        await storage.aput("counter", 1)
+        self.assertEqual(storage.incr("counter"), 2)
+        self.assertEqual(await storage.aget_many(["counter"]), {"counter": 2})
@@ -0,0 +1,63 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+from pyttman.core.ability import Ability
+from pyttman.core.storage.concurrent import ConcurrentStorage
+
+
+class TestConcurrentStorage(TestCase):
+
+    def setUp(self) -> None:
+        self.storage = ConcurrentStorage(stripes=8)
+
+    def run_concurrently(self, func, times=2000, workers=8):
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(lambda i: func(i), range(times)))
+
+    def test_incr_does_not_lose_updates(self):
+        self.run_concurrently(lambda i: self.storage.incr(f"counter{i % 3}"))
+        self.assertEqual(sum(self.storage[f"counter{i}"] for i in range(3)),
+                         2000)
+        self.assertEqual(self.storage.incr("float", 0.5, initial=1), 1.5)
+
+    def test_update_with_does_not_lose_updates(self):
+        self.run_concurrently(lambda i: self.storage.update_with(
+            "seen", lambda seen: seen | {i}, default=frozenset()))
+        self.assertEqual(len(self.storage["seen"]), 2000)
+
+    def test_compare_and_set(self):
+        self.assertTrue(self.storage.compare_and_set("state", None, "idle"))
+        self.assertFalse(self.storage.compare_and_set("state", "busy", "idle"))
+        winners = []
+
+        def acquire(i):
+            if self.storage.compare_and_set("state", "idle", "busy"):
+                winners.append(i)
+
+        self.run_concurrently(acquire, times=200)
+        self.assertEqual(len(winners), 1)
+        self.assertEqual(self.storage["state"], "busy")
+
+    def test_setdefault_and_pop(self):
+        created = self.storage.setdefault("users", {})
+        self.assertIs(self.storage.setdefault("users", []), created)
+        self.assertIs(self.storage.pop("users"), created)
+        self.assertIsNone(self.storage.pop("users", None))
+        with self.assertRaises(KeyError):
+            self.storage.pop("users")
+
+    def test_locked_key(self):
+        self.storage["balance"] = 0
+
+        def deposit(i):
+            with self.storage.locked("balance"):
+                self.storage["balance"] = self.storage["balance"] + 1
+
+        self.run_concurrently(deposit)
+        self.assertEqual(self.storage["balance"], 2000)
+
+    def test_configured_per_ability(self):
+        class CounterAbility(Ability):
+            storage_class = ConcurrentStorage
+
+        self.assertIsInstance(CounterAbility().storage, ConcurrentStorage)
@@ -0,0 +1,160 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from pyttman.core.ability import Ability
+from pyttman.core.storage.engines.base import AbstractStorageEngine
+from pyttman.core.storage.evicting import EvictingStorage
+
+
+class DictStorageEngine(AbstractStorageEngine):
+    def __init__(self):
+        self.items = {}
+
+    def read(self, key):
+        return self.items[key]
+
+    def read_all(self):
+        return iter(self.items.items())
+
+    def write(self, key, value):
+        self.items[key] = value
+
+    def delete(self, key):
+        self.items.pop(key, None)
+
+    def clear(self):
+        self.items.clear()
+
+
+class TestEvictingStorage(TestCase):
+
+    def test_least_recently_used_item_is_evicted(self):
+        evicted = []
+        storage = EvictingStorage(max_entries=3,
+                                  on_evict=lambda k, v: evicted.append(k))
+        for key in "abc":
+            storage[key] = key.upper()
+        storage.get("a")
+        storage["d"] = "D"
+        self.assertEqual(evicted, ["b"])
+        self.assertEqual(set(storage), {"a", "c", "d"})
+        self.assertEqual(storage.stats.evictions, 1)
+
+    def test_least_frequently_used_item_is_evicted(self):
+        storage = EvictingStorage(max_entries=3, policy="lfu")
+        for key in "abc":
+            storage[key] = key
+        for _ in range(3):
+            storage.get("a")
+        storage.get("b")
+        storage.get("c")
+        storage.get("c")
+        storage["d"] = "d"
+        self.assertNotIn("b", storage)
+        storage["e"] = "e"
+        self.assertNotIn("d", storage)
+        self.assertEqual(set(storage), {"a", "c", "e"})
+
+    def test_byte_budget(self):
+        storage = EvictingStorage(max_bytes=1000, sizeof=lambda obj: 100)
+        for i in range(20):
+            storage[i] = i
+        self.assertEqual(len(storage), 5)
+        self.assertEqual(storage.stats.bytes, 1000)
+        self.assertEqual(list(storage), [15, 16, 17, 18, 19])
+
+    def test_items_expire(self):
+        with patch("pyttman.core.storage.evicting.monotonic") as clock:
+            clock.return_value = 100
+            storage = EvictingStorage(ttl=10)
+            storage["default"] = 1
+            storage.put("short", 2, ttl=1)
+            storage.put("forever", 3, ttl=None)
+            clock.return_value = 105
+            self.assertNotIn("short", storage)
+            self.assertEqual(storage["default"], 1)
+            clock.return_value = 111
+            self.assertIsNone(storage.get("default"))
+            self.assertEqual(list(storage), ["forever"])
+            self.assertEqual(storage.stats.expirations, 2)
+
+    def test_stats(self):
+        storage = EvictingStorage()
+        storage["a"] = 1
+        storage.get("a")
+        storage.get("b")
+        stats = storage.stats
+        self.assertEqual((stats.hits, stats.misses, stats.entries),
+                         (1, 1, 1))
+        self.assertEqual(stats.hit_ratio, 0.5)
+
+    def test_evicted_items_are_read_from_engine(self):
+        engine = DictStorageEngine()
+        storage = EvictingStorage(engine=engine, max_entries=2)
+        for key in "abc":
+            storage[key] = key
+        self.assertNotIn("a", storage.data)
+        self.assertEqual(storage["a"], "a")
+        self.assertEqual(len(storage.data), 2)
+
+        storage.put("temporary", 1, ttl=0)
+        self.assertNotIn("temporary", storage)
+        self.assertNotIn("temporary", engine.items)
+
+    def test_evicted_items_keep_their_ttl(self):
+        engine = DictStorageEngine()
+        with patch("pyttman.core.storage.evicting.monotonic") as clock:
+            clock.return_value = 100
+            storage = EvictingStorage(engine=engine, max_entries=1, ttl=60)
+            storage.put("short", 1, ttl=5)
+            storage.put("forever", 2, ttl=None)
+            # Both were evicted to the engine, and are read again
+            storage["other"] = 3
+            self.assertEqual(storage["forever"], 2)
+            clock.return_value = 104
+            self.assertEqual(storage["short"], 1)
+            clock.return_value = 106
+            self.assertNotIn("short", storage)
+            self.assertNotIn("short", engine.items)
+
+            storage.put("evicted", 4, ttl=5)
+            storage["other"] = 3
+            clock.return_value = 112
+            storage.purge_expired()
+            self.assertNotIn("evicted", engine.items)
+            clock.return_value = 1000
+            storage.synchronize()
+            self.assertEqual(storage["forever"], 2)
+            # Its default ttl passed while it was in memory
+            self.assertNotIn("other", storage)
+            self.assertNotIn("other", engine.items)
+
+    def test_bookkeeping_is_bounded(self):
+        storage = EvictingStorage(engine=DictStorageEngine(), max_entries=10)
+        for key in range(10_000):
+            storage[key] = key
+        self.assertEqual(len(storage._evicted_expiry), 0)
+
+        storage = EvictingStorage(max_entries=10, ttl=3600)
+        for value in range(10_000):
+            storage["hot"] = value
+        self.assertLess(len(storage._deadlines), 20)
+
+        storage = EvictingStorage(engine=DictStorageEngine(), max_entries=10,
+                                  ttl=3600)
+        for key in range(10_000):
+            storage[key % 100] = key
+            storage.get(key * 7 % 100)
+        self.assertLessEqual(len(storage._evicted_expiry), 100)
+        self.assertLess(len(storage._deadlines), 2 * 100 + 20)
+
+    def test_configured_per_ability(self):
+        class CacheAbility(Ability):
+            storage_class = EvictingStorage
+            storage_options = {"max_entries": 1, "policy": "lfu"}
+
+        storage = CacheAbility().storage
+        self.assertIsInstance(storage, EvictingStorage)
+        self.assertEqual(storage.max_entries, 1)
+        with self.assertRaises(ValueError):
+            EvictingStorage(policy="fifo")
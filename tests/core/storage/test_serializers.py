@@ -0,0 +1,50 @@
+from unittest import TestCase
+
+from pyttman.core.storage.serializers import PickleSerializer
+
+
+class TestPickleSerializer(TestCase):
+
+    def setUp(self) -> None:
+        self.values = ("text", 42, None, {"nested": [1, 2, (3, 4)]},
+                       b"\x00" * 10_000, bytearray(b"abc" * 1000),
+                       {"payload": bytearray(b"\x01" * 5000)})
+
+    def test_round_trip(self):
+        for compression in (None, "zlib", "lzma"):
+            serializer = PickleSerializer(compression=compression)
+            for value in self.values:
+                data = serializer.dumps(value)
+                self.assertEqual(serializer.loads(data), value)
+                self.assertEqual(type(serializer.loads(data)), type(value))
+                parts = serializer.dumps_parts(value)
+                self.assertEqual(b"".join(parts), data)
+
+    def test_binary_values_are_not_copied(self):
+        serializer = PickleSerializer()
+        payload = bytearray(b"\x01" * 100_000)
+        parts = serializer.dumps_parts(payload)
+        self.assertTrue(any(isinstance(part, memoryview)
+                            and part.obj is payload for part in parts))
+
+        parts = serializer.dumps_parts({"payload": payload})
+        self.assertTrue(any(isinstance(part, memoryview)
+                            and part.obj is payload for part in parts))
+        self.assertLess(max(len(part) for part in parts
+                            if not isinstance(part, memoryview)), 1000)
+
+    def test_compression(self):
+        value = {"text": "repeated " * 10_000}
+        plain = PickleSerializer().dumps(value)
+        for compression in ("zlib", "lzma"):
+            compressed = PickleSerializer(compression=compression).dumps(value)
+            self.assertLess(len(compressed), len(plain) / 10)
+        small = PickleSerializer(compression="zlib").dumps("small")
+        self.assertEqual(PickleSerializer().dumps("small"), small)
+        with self.assertRaises(ValueError):
+            PickleSerializer(compression="zip")
+
+    def test_older_protocols(self):
+        serializer = PickleSerializer(protocol=4)
+        value = {"payload": bytearray(b"\x01" * 100)}
+        self.assertEqual(serializer.loads(serializer.dumps(value)), value)
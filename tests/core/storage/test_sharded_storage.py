@@ -0,0 +1,119 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from pyttman.core.ability import Ability
+from pyttman.core.storage.concurrent import ConcurrentStorage
+from pyttman.core.storage.engines.sqlite import SqliteStorageEngine
+from pyttman.core.storage.evicting import EvictingStorage
+from pyttman.core.storage.sharded import ShardedStorage
+
+
+class Author:
+    def __init__(self, id):
+        self.id = id
+
+
+class TestShardedStorage(TestCase):
+
+    def test_items_are_kept_per_author(self):
+        storage = ShardedStorage(shards=4)
+        alice, bob = Author(1), Author(2)
+        storage.for_author(alice)["name"] = "Alice"
+        storage.for_author(bob).put("name", "Bob")
+        storage.for_author("anonymous")["name"] = "?"
+        storage["global"] = True
+
+        self.assertEqual(storage.for_author(alice)["name"], "Alice")
+        self.assertEqual(storage.for_author(Author(2)).get("name"), "Bob")
+        self.assertEqual(dict(storage.for_author("anonymous")), {"name": "?"})
+        self.assertEqual(set(storage.namespaces()), {1, 2, "anonymous"})
+        self.assertEqual(list(storage), ["global"])
+
+        storage.for_author(alice).clear()
+        self.assertEqual(len(storage.for_author(alice)), 0)
+        self.assertEqual(set(storage.namespaces()), {2, "anonymous"})
+        del storage.for_author(bob)["name"]
+        with self.assertRaises(KeyError):
+            storage.for_author(bob).delete("name")
+
+    def test_items_are_stored_one_by_one(self):
+        storage = ShardedStorage(shards=1)
+        alice = storage.for_author("alice")
+        alice["theme"] = "dark"
+        snapshot = alice.snapshot()
+        shard_snapshot = storage.shards[0].snapshot()
+        alice["theme"] = "light"
+        alice["language"] = "sv"
+
+        self.assertEqual(dict(snapshot), {"theme": "dark"})
+        self.assertEqual(shard_snapshot[("alice", "theme")], "dark")
+        # The keys of the namespace are not kept in the shard
+        self.assertNotIn(("alice",), shard_snapshot)
+        self.assertEqual(storage.shards[0][("alice", "language")], "sv")
+        self.assertEqual(sorted(alice), ["language", "theme"])
+        del alice["theme"]
+        self.assertEqual(alice.copy(), {"language": "sv"})
+
+    def test_shard_is_stable(self):
+        storage = ShardedStorage(shards=8)
+        self.assertEqual(storage.shard_of(12345), storage.shard_of("12345"))
+        self.assertEqual(storage.shard_of("alice"), 7)
+        used = {storage.shard_of(i) for i in range(100)}
+        self.assertEqual(used, set(range(8)))
+
+    def test_shards_evict_authors(self):
+        storage = ShardedStorage(shards=1,
+                                 shard_class=EvictingStorage,
+                                 shard_options={"max_entries": 2})
+        for author in range(3):
+            storage.for_author(author)["visits"] = author
+        self.assertNotIn("visits", storage.for_author(0))
+        self.assertEqual(storage.for_author(2)["visits"], 2)
+
+    def test_keys_outlive_evictions_in_the_shard(self):
+        storage = ShardedStorage(shards=1,
+                                 shard_class=EvictingStorage,
+                                 shard_options={"max_entries": 2,
+                                                "ttl": 3600})
+        alice = storage.for_author("alice")
+        alice["x"], alice["y"] = 1, 2
+        self.assertEqual(alice.copy(), {"x": 1, "y": 2})
+        alice["z"] = 3
+        # One of the older items is evicted by the shard
+        self.assertEqual(len(alice.copy()), 2)
+        self.assertEqual(alice["z"], 3)
+        self.assertEqual(list(storage.namespaces()), ["alice"])
+
+        storage.for_author("alice").clear()
+        self.assertEqual(len(storage.shards[0]), 0)
+        self.assertEqual(list(storage.namespaces()), [])
+
+    def test_shards_are_persisted(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "shards.sqlite3"
+            engines = []
+
+            def shard_engine(i):
+                engines.append(SqliteStorageEngine(path, table=f"shard{i}"))
+                return engines[-1]
+
+            storage = ShardedStorage(shards=2, shard_engine=shard_engine)
+            storage.for_author("alice")["theme"] = "dark"
+            storage.for_author("alice")["language"] = "sv"
+            storage.dump()
+            restarted = ShardedStorage(shards=2, shard_engine=shard_engine)
+            self.assertEqual(dict(restarted.for_author("alice")),
+                             {"theme": "dark", "language": "sv"})
+            for engine in engines:
+                engine.close()
+
+    def test_configured_per_ability(self):
+        class ProfileAbility(Ability):
+            storage_class = ShardedStorage
+            storage_options = {"shards": 2, "shard_class": ConcurrentStorage}
+
+        storage = ProfileAbility().storage
+        storage.for_author("alice")["visits"] = 1
+        self.assertIsInstance(storage.shards[0], ConcurrentStorage)
+        self.assertEqual(storage.for_author("alice")["visits"], 1)
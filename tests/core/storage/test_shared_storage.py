@@ -0,0 +1,94 @@
+import multiprocessing
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from pyttman.core.ability import Ability
+from pyttman.core.storage.shared import SharedStorage
+
+
+def count_visits(path, times):
+    storage = SharedStorage(path)
+    for _ in range(times):
+        storage.incr("visits")
+        storage.update_with("log", lambda log: log + [1], default=[])
+
+
+class TestSharedStorage(TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / "shared.sqlite3"
+        self.storage = SharedStorage(self.path)
+
+    def tearDown(self) -> None:
+        self.storage.close()
+        self.directory.cleanup()
+
+    def test_items_are_shared_between_instances(self):
+        other = SharedStorage(self.path)
+        self.storage["a"] = {"value": 1}
+        self.assertEqual(other["a"], {"value": 1})
+        del other["a"]
+        self.assertNotIn("a", self.storage)
+        with self.assertRaises(KeyError):
+            self.storage.delete("a")
+        other.close()
+
+    def test_mapping_and_bulk_operations(self):
+        self.storage.put_many({i: i * 2 for i in range(10)})
+        self.assertEqual(len(self.storage), 10)
+        self.assertEqual(sorted(self.storage), list(range(10)))
+        self.assertEqual(self.storage.get_many([1, 2, 99]), {1: 2, 2: 4})
+        self.storage.delete_many(range(5))
+        self.assertEqual(dict(self.storage.snapshot()),
+                         {i: i * 2 for i in range(5, 10)})
+        self.assertIsNone(self.storage.get(0))
+        copy = self.storage.copy()
+        self.storage[5] = "changed"
+        self.assertEqual(copy, {i: i * 2 for i in range(5, 10)})
+
+    def test_atomic_operations(self):
+        self.assertEqual(self.storage.setdefault("users", []), [])
+        self.assertTrue(self.storage.compare_and_set("state", None, "idle"))
+        self.assertFalse(self.storage.compare_and_set("state", "busy", "x"))
+        self.assertEqual(self.storage.pop("state"), "idle")
+        with self.storage.locked():
+            self.storage["a"] = self.storage.get("a", 0) + 1
+        with self.assertRaises(RuntimeError):
+            with self.storage.locked():
+                self.storage["b"] = 1
+                raise RuntimeError()
+        self.assertNotIn("b", self.storage)
+
+    def test_reads_do_not_wait_for_writers(self):
+        other = SharedStorage(self.path, timeout=0.01)
+        self.storage.put_many({"a": 1, "b": 2})
+        with self.storage.locked():
+            self.storage["a"] = 10
+            self.assertEqual(other.get_many(["a", "b"]), {"a": 1, "b": 2})
+        other.close()
+
+    def test_updates_from_several_processes_are_not_lost(self):
+        processes = [multiprocessing.Process(target=count_visits,
+                                             args=(self.path, 50))
+                     for _ in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        self.assertEqual(self.storage["visits"], 200)
+        self.assertEqual(len(self.storage["log"]), 200)
+
+    def test_configured_per_ability(self):
+        path = self.path
+
+        class CounterAbility(Ability):
+            storage_class = SharedStorage
+            storage_options = {"path": path, "table": "counters"}
+
+        CounterAbility().storage.incr("count")
+        self.assertEqual(CounterAbility().storage["count"], 1)
+        self.assertNotIn("count", self.storage)
+        with self.assertRaises(ValueError):
+            self.storage.add_index("value", lambda item: item)
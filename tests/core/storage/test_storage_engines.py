@@ -0,0 +1,226 @@
+import functools
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from pyttman.core.ability import Ability
+from pyttman.core.storage.basestorage import Storage
+from pyttman.core.storage.engines.log import LogStorageEngine
+from pyttman.core.storage.engines.sqlite import SqliteStorageEngine
+from pyttman.core.storage.serializers import PickleSerializer
+
+
+class TestSqliteStorageEngine(TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / "storage.sqlite3"
+        self.engines = []
+
+    def tearDown(self) -> None:
+        for engine in self.engines:
+            engine.close()
+        self.directory.cleanup()
+
+    def create_storage(self, **kwargs) -> Storage:
+        engine = SqliteStorageEngine(self.path, **kwargs)
+        self.engines.append(engine)
+        return Storage(engine=engine)
+
+    def test_items_survive_restart(self):
+        storage = self.create_storage()
+        storage["counter"] = 1
+        storage.put("user", {"name": "Ada"})
+        storage["removed"] = True
+        del storage["removed"]
+        storage.engine.close()
+
+        restarted = self.create_storage()
+        self.assertEqual(restarted["counter"], 1)
+        self.assertEqual(restarted.get("user"), {"name": "Ada"})
+        self.assertNotIn("removed", restarted)
+        self.assertIsNone(restarted.get("removed"))
+
+    def test_state_is_loaded_lazily(self):
+        storage = self.create_storage()
+        for i in range(100):
+            storage[i] = i * 2
+        storage.engine.flush()
+
+        restarted = self.create_storage()
+        self.assertEqual(len(restarted.data), 0)
+        self.assertEqual(restarted[10], 20)
+        self.assertEqual(len(restarted.data), 1)
+        self.assertEqual(len(restarted), 100)
+        self.assertEqual(sorted(restarted.keys())[-1], 99)
+
+    def test_buffered_writes_are_visible_and_batched(self):
+        storage = self.create_storage(flush_interval=60, max_batch_size=10_000)
+        other = self.create_storage()
+        storage["key"] = "value"
+        self.assertEqual(storage.engine.read("key"), "value")
+        self.assertIsNone(other.get("key"))
+        storage.engine.flush()
+        self.assertEqual(other.get("key"), "value")
+
+    def test_dump_and_synchronize(self):
+        storage = self.create_storage()
+        storage["a"] = 1
+        storage.data["b"] = 2  # Bypasses the engine
+        storage.dump()
+
+        other = self.create_storage()
+        self.assertEqual(dict(other.items()), {"a": 1, "b": 2})
+        other["c"] = 3
+        other.engine.flush()
+        storage.synchronize()
+        self.assertEqual(storage["c"], 3)
+
+    def test_storage_without_engine(self):
+        storage = Storage()
+        storage["a"] = 1
+        self.assertEqual(len(storage), 1)
+        with self.assertRaises(NotImplementedError):
+            storage.dump()
+
+    def test_engine_configured_per_ability(self):
+        path = self.path
+
+        class PersistentAbility(Ability):
+            storage_engine = functools.partial(SqliteStorageEngine, path)
+
+        ability = PersistentAbility()
+        self.engines.append(ability.storage.engine)
+        self.assertIsInstance(ability.storage.engine, SqliteStorageEngine)
+        self.assertIsNone(Ability().storage.engine)
+
+
+class TestLogStorageEngine(TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / "log"
+        self.engines = []
+
+    def tearDown(self) -> None:
+        for engine in self.engines:
+            engine.close()
+        self.directory.cleanup()
+
+    def create_engine(self, **kwargs) -> LogStorageEngine:
+        engine = LogStorageEngine(self.path, **kwargs)
+        self.engines.append(engine)
+        return engine
+
+    def test_items_survive_restart(self):
+        storage = Storage(engine=self.create_engine())
+        for i in range(50):
+            storage[f"key{i}"] = i
+        storage["key0"] = "overwritten"
+        del storage["key1"]
+        storage.engine.close()
+
+        restarted = Storage(engine=self.create_engine())
+        self.assertEqual(restarted["key0"], "overwritten")
+        self.assertNotIn("key1", restarted)
+        self.assertEqual(len(restarted), 49)
+
+    def test_records_after_hint_file_are_recovered(self):
+        engine = self.create_engine()
+        engine.write("a", 1)
+        engine.close()
+        self.assertTrue(engine.hint_path.exists())
+
+        # Written after the hint file, and never closed cleanly
+        engine.write("b", 2)
+        engine.delete("a")
+        engine.flush()
+        other = self.create_engine()
+        self.assertEqual(dict(other.read_all()), {"b": 2})
+
+    def test_stale_hint_file_is_ignored(self):
+        engine = self.create_engine()
+        engine.write("a", 1)
+        engine.close()
+        hint = engine.hint_path.read_bytes()
+        engine.clear()
+        engine.write("b", 2)
+        engine.close()
+        engine.hint_path.write_bytes(hint)
+
+        self.assertEqual(dict(self.create_engine().read_all()), {"b": 2})
+
+    def test_torn_record_is_truncated(self):
+        engine = self.create_engine()
+        engine.write("a", 1)
+        engine.close()
+        size = engine.log_path.stat().st_size
+        engine.hint_path.unlink()
+        with open(engine.log_path, "ab") as file:
+            file.write(b"\x01\x02\x03\x04\x00\x05")
+
+        other = self.create_engine()
+        self.assertEqual(other.read("a"), 1)
+        self.assertEqual(engine.log_path.stat().st_size, size)
+        other.write("b", 2)
+        other.close()
+        self.assertEqual(dict(self.create_engine().read_all()),
+                         {"a": 1, "b": 2})
+
+    def test_compaction_keeps_live_records(self):
+        engine = self.create_engine(min_compaction_size=1 << 30)
+        for i in range(1000):
+            engine.write(i % 10, i)
+        engine.delete(0)
+        engine.flush()
+        size = engine.log_path.stat().st_size
+        engine.compact()
+
+        self.assertLess(engine.log_path.stat().st_size, size / 10)
+        expected = {i: 990 + i for i in range(1, 10)}
+        self.assertEqual(dict(engine.read_all()), expected)
+        engine.write(1, "after")
+        engine.close()
+        expected[1] = "after"
+        self.assertEqual(dict(self.create_engine().read_all()), expected)
+
+    def test_compaction_runs_in_background(self):
+        engine = self.create_engine(min_compaction_size=4096,
+                                    compaction_threshold=0.5)
+        engine.write("counter", 0)
+        generation = engine._generation
+        for i in range(1, 2000):
+            engine.write("counter", i)
+        # Closing waits for a running compaction to finish
+        engine.close()
+        self.assertNotEqual(engine._generation, generation)
+        self.assertEqual(self.create_engine().read("counter"), 1999)
+
+
+class TestBulkOperations(TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.engines = [
+            SqliteStorageEngine(Path(self.directory.name) / "bulk.sqlite3"),
+            LogStorageEngine(Path(self.directory.name) / "log",
+                             serializer=PickleSerializer(compression="zlib"))]
+
+    def tearDown(self) -> None:
+        for engine in self.engines:
+            engine.close()
+        self.directory.cleanup()
+
+    def test_bulk_operations(self):
+        for engine in self.engines:
+            storage = Storage(engine=engine)
+            storage.put_many((f"key{i}", {"value": i}) for i in range(1000))
+            storage.put_many({"image": bytearray(b"\x89PNG" * 10_000)})
+            storage.delete_many(["key0", "key1", "missing"])
+            engine.flush()
+
+            restarted = Storage(engine=engine)
+            found = restarted.get_many(["key1", "key2", "image", "missing"])
+            self.assertEqual(found.keys(), {"key2", "image"})
+            self.assertEqual(found["image"], bytearray(b"\x89PNG" * 10_000))
+            self.assertEqual(len(restarted), 999)
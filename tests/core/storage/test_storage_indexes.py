@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+from unittest import TestCase
+
+from pyttman.core.ability import Ability
+from pyttman.core.storage.basestorage import Storage
+from pyttman.core.storage.concurrent import ConcurrentStorage
+from pyttman.core.storage.evicting import EvictingStorage
+
+
+class Reminder:
+    def __init__(self, text, due, channel=None):
+        self.text = text
+        self.due = due
+        self.channel = channel
+
+    def __repr__(self):
+        return self.text
+
+
+class TestStorageIndexes(TestCase):
+
+    def setUp(self) -> None:
+        self.now = datetime(2026, 1, 1, 12)
+        self.storage = Storage(indexes={
+            "due": lambda reminder: reminder.due,
+            "channel": lambda reminder: reminder.channel})
+        for hours in (3, -1, 1, 2, -2):
+            self.storage[f"{hours}h"] = Reminder(
+                f"{hours}h", self.now + timedelta(hours=hours),
+                channel="general" if hours > 0 else "random")
+
+    def texts(self, reminders):
+        return [reminder.text for reminder in reminders]
+
+    def test_range_queries_are_ordered(self):
+        self.assertEqual(self.texts(self.storage.query_range("due",
+                                                             high=self.now)),
+                         ["-2h", "-1h"])
+        self.assertEqual(
+            self.texts(self.storage.query_range(
+                "due", low=self.now + timedelta(hours=1),
+                high=self.now + timedelta(hours=3), include_high=True)),
+            ["1h", "2h", "3h"])
+        self.assertEqual(
+            self.texts(self.storage.query_range(
+                "due", low=self.now + timedelta(hours=1), include_low=False)),
+            ["2h", "3h"])
+
+    def test_equality_queries(self):
+        self.assertEqual(sorted(self.texts(self.storage.query("channel",
+                                                              "random"))),
+                         ["-1h", "-2h"])
+        self.assertEqual(self.storage.query("channel", "unknown"), [])
+
+    def test_indexes_follow_changes(self):
+        self.storage["1h"] = Reminder("moved", self.now - timedelta(hours=5))
+        del self.storage["-1h"]
+        self.storage["plain"] = "not a reminder"
+        self.assertEqual(self.texts(self.storage.query_range("due",
+                                                             high=self.now)),
+                         ["moved", "-2h"])
+        self.assertEqual(len(self.storage._indexes["due"]), 4)
+        self.storage.drop_index("due")
+        with self.assertRaises(KeyError):
+            self.storage.query_range("due")
+
+    def test_items_which_cannot_be_indexed_are_not_stored(self):
+        # The channel index is updated first, and must be rolled back
+        self.storage.drop_index("due")
+        self.storage.add_index("due", lambda reminder: reminder.due)
+        before = self.texts(self.storage.query_range("due"))
+        for key in ("1h", "new"):
+            with self.assertRaises(TypeError):
+                self.storage[key] = Reminder("broken", "not a datetime",
+                                             channel="random")
+        self.assertNotIn("new", self.storage)
+        self.assertEqual(self.storage["1h"].text, "1h")
+        self.assertEqual(self.texts(self.storage.query_range("due")), before)
+        self.assertEqual(sorted(self.texts(self.storage.query("channel",
+                                                              "random"))),
+                         ["-1h", "-2h"])
+
+    def test_index_added_to_existing_items(self):
+        storage = ConcurrentStorage(a={"channel": 1}, b={"channel": 2})
+        storage.add_index("channel", lambda item: item["channel"])
+        self.assertEqual(storage.query("channel", 2), [{"channel": 2}])
+
+    def test_evicted_items_leave_the_index(self):
+        storage = EvictingStorage(max_entries=2,
+                                  indexes={"value": lambda item: item})
+        for i in range(4):
+            storage[i] = i
+        self.assertEqual(storage.query_range("value"), [2, 3])
+
+    def test_configured_per_ability(self):
+        class ReminderAbility(Ability):
+            storage_options = {"indexes": {"due": lambda r: r.due}}
+
+        storage = ReminderAbility().storage
+        storage["a"] = Reminder("a", self.now)
+        self.assertEqual(self.texts(storage.query("due", self.now)), ["a"])
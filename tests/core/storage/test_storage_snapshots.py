@@ -0,0 +1,124 @@
+import statistics
+import threading
+import time
+from unittest import TestCase
+
+from pyttman.core.storage.basestorage import Storage
+from pyttman.core.storage.concurrent import ConcurrentStorage
+from pyttman.core.storage.evicting import EvictingStorage
+from pyttman.core.storage.sharded import ShardedStorage
+
+
+class TestStorageSnapshots(TestCase):
+
+    def test_snapshot_is_not_changed_by_writes(self):
+        storage = Storage()
+        storage.update({"a": 1, "b": 2})
+        snapshot = storage.snapshot()
+        self.assertIs(snapshot._data, storage.data)
+
+        storage["a"] = 10
+        storage["c"] = 3
+        del storage["b"]
+        self.assertEqual(dict(snapshot), {"a": 1, "b": 2})
+        self.assertEqual(dict(storage), {"a": 10, "c": 3})
+        with self.assertRaises(TypeError):
+            snapshot["a"] = 2
+
+    def test_dict_is_copied_once_per_snapshot(self):
+        storage = Storage()
+        storage["a"] = 1
+        storage.snapshot()
+        storage["b"] = 2
+        data = storage.data
+        storage["c"] = 3
+        self.assertIs(storage.data, data)
+
+    def test_storage_can_change_while_iterated(self):
+        storage = Storage()
+        storage.update({i: i for i in range(10)})
+        for key in storage:
+            storage[key + 100] = key
+            storage.delete(key)
+        self.assertEqual(sorted(storage), list(range(100, 110)))
+        # Iterating does not make the next change copy the dict
+        data = storage.data
+        list(storage)
+        storage["a"] = 1
+        self.assertIs(storage.data, data)
+
+    def test_subclasses_copy_on_write(self):
+        for storage in (EvictingStorage(max_entries=2), ConcurrentStorage()):
+            storage["a"] = 1
+            snapshot = storage.snapshot()
+            storage["b"] = 2
+            storage["c"] = 3
+            self.assertEqual(dict(snapshot), {"a": 1}, storage)
+
+        storage = ShardedStorage(shards=2)
+        storage.for_author("alice")["a"] = 1
+        snapshot = storage.for_author("alice").snapshot()
+        storage.for_author("alice")["b"] = 2
+        self.assertEqual(dict(snapshot), {"a": 1})
+
+    def test_readers_see_consistent_view_while_writers_continue(self):
+        storage = ConcurrentStorage()
+        storage.update({i: 0 for i in range(1000)})
+        stop = threading.Event()
+
+        def write():
+            i = 0
+            while not stop.is_set():
+                storage.incr(i % 1000)
+                i += 1
+
+        writers = [threading.Thread(target=write) for _ in range(4)]
+        for writer in writers:
+            writer.start()
+        try:
+            for _ in range(50):
+                snapshot = storage.snapshot()
+                total = sum(snapshot.values())
+                self.assertEqual(sum(snapshot[i] for i in snapshot), total)
+                self.assertEqual(len(snapshot), 1000)
+        finally:
+            stop.set()
+            for writer in writers:
+                writer.join()
+
+    def test_snapshots_are_not_changed_by_concurrent_writers(self):
+        storage = ConcurrentStorage()
+
+        def write(offset):
+            for i in range(20_000):
+                storage[offset + i] = i
+
+        writers = [threading.Thread(target=write, args=(i * 100_000,))
+                   for i in range(4)]
+        for writer in writers:
+            writer.start()
+        snapshots = []
+        while any(writer.is_alive() for writer in writers):
+            snapshot = storage.snapshot()
+            snapshots.append((snapshot, dict(snapshot)))
+        for writer in writers:
+            writer.join()
+        self.assertEqual(len(storage), 80_000)
+        for snapshot, taken in snapshots:
+            self.assertEqual(dict(snapshot), taken)
+
+    def test_write_latency_after_snapshot(self):
+        storage = ConcurrentStorage()
+        storage.update({i: i for i in range(200_000)})
+
+        def latency(key) -> float:
+            started = time.perf_counter()
+            storage[key] = 0
+            return time.perf_counter() - started
+
+        storage.snapshot()
+        first = latency(0)
+        following = statistics.median(latency(i) for i in range(1, 1000))
+        # The first write copies the dict, the ones after it don't
+        self.assertLess(following * 10, first)
+        self.assertLess(first, 1.0)
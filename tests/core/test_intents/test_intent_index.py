@@ -0,0 +1,83 @@
+from itertools import product
+from unittest import TestCase
+
+from pyttman.core.ability import Ability
+from pyttman.core.containers import Message
+from pyttman.core.entity_parsing.fields import TextEntityField
+from pyttman.core.intent import Intent
+from pyttman.core.middleware.vocabulary import IntentIndex, Vocabulary
+
+
+class LeadOnly(Intent):
+    lead = ("hello", "hi")
+
+
+class LeadAndTrail(Intent):
+    lead = ("add", "new")
+    trail = ("expense", "purchase")
+
+
+class Ordered(Intent):
+    lead = ("add", "new")
+    trail = ("expense",)
+    ordered = True
+
+
+class WithEntities(Intent):
+    lead = ("set",)
+    category = TextEntityField(valid_strings=("Food", "rent"),
+                               prefixes=("category",))
+
+
+class CustomMatching(Intent):
+    lead = ("never",)
+
+    def matches(self, message: Message) -> bool:
+        return "custom" in message.content
+
+
+class IndexedAbility(Ability):
+    intents = (LeadOnly, LeadAndTrail, Ordered, WithEntities, CustomMatching)
+
+
+class TestIntentIndex(TestCase):
+
+    def setUp(self) -> None:
+        self.ability = IndexedAbility()
+        self.index = IntentIndex([self.ability])
+
+    def test_vocabulary_contains_routing_words(self):
+        vocabulary = self.index.vocabulary
+        for word in ("hello", "expense", "set"):
+            self.assertIn(word, vocabulary)
+        # EntityFields parse messages by their words, not by ids
+        for word in ("food", "rent", "category"):
+            self.assertNotIn(word, vocabulary)
+        self.assertEqual(vocabulary.id_of("unheard"), Vocabulary.UNKNOWN)
+        self.assertEqual(vocabulary.word_of(vocabulary.id_of("set")), "set")
+
+    def test_candidates_are_selected_by_lead_and_trail(self):
+        token_ids = self.index.intern(Message("add new thing").sanitized_content())
+        candidates = [i.intent_class for i in self.index.candidates(token_ids)]
+        # LeadAndTrail and Ordered lack a trail word in the message
+        self.assertEqual(candidates, [CustomMatching])
+
+        token_ids = self.index.intern(Message("add expense").sanitized_content())
+        candidates = [i.intent_class for i in self.index.candidates(token_ids)]
+        self.assertEqual(candidates, [LeadAndTrail, Ordered, CustomMatching])
+
+    def test_compiled_matching_equals_string_matching(self):
+        words = ("add", "new", "expense", "purchase", "hi", "x")
+        compiled = {i.intent_class: i for i in self.index.intents}
+        for length in range(1, 5):
+            for combination in product(words, repeat=length):
+                message = Message(" ".join(combination))
+                token_ids = self.index.intern(message.sanitized_content())
+                first_index = {}
+                for position, word_id in enumerate(token_ids):
+                    first_index.setdefault(word_id, position)
+                for intent_class in (LeadOnly, LeadAndTrail, Ordered):
+                    self.assertEqual(
+                        intent_class().matches(message),
+                        compiled[intent_class].matches(token_ids, first_index),
+                        f"{intent_class.__name__} - '{message.as_str()}'")
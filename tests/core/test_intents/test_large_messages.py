@@ -0,0 +1,83 @@
+from pyttman.core.ability import Ability
+from pyttman.core.containers import Message, MessageMixin, Reply
+from pyttman.core.entity_parsing.fields import TextEntityField, \
+    IntegerEntityField
+from pyttman.core.intent import Intent
+from pyttman.core.middleware.routing import FirstMatchingRouter
+from tests.module_helper import PyttmanInternalBaseTestCase
+
+
+class LogIntent(Intent):
+    lead = ("log",)
+    level = TextEntityField(valid_strings=("error", "warning"))
+    code = IntegerEntityField(prefixes=("code",))
+
+    def respond(self, message: Message) -> Reply:
+        return Reply(f"{message.entities['level']} {message.entities['code']}")
+
+
+class LogAbility(Ability):
+    intents = (LogIntent,)
+
+
+class TestLargeMessages(PyttmanInternalBaseTestCase):
+
+    def setUp(self) -> None:
+        self.filler = " ".join(f"line{i}" for i in range(5000))
+        self.text = f"log {self.filler} error code 42"
+        MessageMixin.max_tokens = 100
+
+    def tearDown(self) -> None:
+        MessageMixin.max_tokens = None
+        super().tearDown()
+
+    def test_message_is_truncated(self):
+        message = Message(self.text)
+        self.assertTrue(message.truncated)
+        self.assertEqual(len(message.content), 100)
+        self.assertEqual(self.text[message.truncated_at:].split()[0],
+                         "line99")
+        self.assertEqual(message.as_str(), self.text)
+        self.assertEqual(len(list(message.iter_tokens())),
+                         len(self.text.split()))
+
+        small = Message("log error code 42")
+        self.assertFalse(small.truncated)
+        self.assertIsNone(small.truncated_at)
+
+    def test_content_with_format_is_materialized_lazily(self):
+        message = Message("first line\nsecond line")
+        self.assertIsNone(message._content_with_format)
+        self.assertEqual(message.content_with_format,
+                         ["first line\n", "second line"])
+        self.assertIs(message.content_with_format,
+                      message.content_with_format)
+        message.content = "third line"
+        self.assertEqual(message.content_with_format, ["third line"])
+
+    def test_new_content_replaces_truncated_text(self):
+        message = Message(self.text)
+        message.content = ["log", "error"]
+        self.assertFalse(message.truncated)
+        self.assertIsNone(message.truncated_at)
+        self.assertEqual(message.as_str(), "log error")
+        self.assertEqual([i.raw for i in message.iter_tokens()],
+                         ["log", "error"])
+
+    def test_windowed_entity_parsing_finds_values_past_routing_limit(self):
+        router = FirstMatchingRouter(abilities=[LogAbility()],
+                                     help_keyword="help",
+                                     intent_unknown_responses=["?"],
+                                     entity_parsing_window=64,
+                                     max_entity_parsing_tokens=10_000)
+        reply = router.get_reply(Message(self.text))
+        self.assertEqual(reply.as_str(), "error 42")
+
+    def test_entity_parsing_is_bounded(self):
+        router = FirstMatchingRouter(abilities=[LogAbility()],
+                                     help_keyword="help",
+                                     intent_unknown_responses=["?"],
+                                     entity_parsing_window=64,
+                                     max_entity_parsing_tokens=1000)
+        reply = router.get_reply(Message(self.text))
+        self.assertEqual(reply.as_str(), "None None")
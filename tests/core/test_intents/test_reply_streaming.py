@@ -0,0 +1,225 @@
+import asyncio
+import threading
+from queue import Full, Empty
+from unittest import TestCase
+
+from pyttman.core.ability import Ability
+from pyttman.core.containers import Message, Reply, ReplyStream, ReplyChannel
+from pyttman.core.exceptions import ReplyChannelClosed
+from pyttman.core.intent import Intent
+from pyttman.core.middleware.routing import FirstMatchingRouter
+from tests.module_helper import PyttmanInternalBaseTestCase
+
+
+class YieldingIntent(Intent):
+    """
+    Yields its replies one at a time, recording how far the
+    generator has progressed.
+    """
+    lead = ("search",)
+    produced = []
+
+    def respond(self, message: Message):
+        for i in range(3):
+            self.produced.append(i)
+            yield Reply(f"result {i}")
+
+
+class AsyncYieldingIntent(Intent):
+    lead = ("report",)
+
+    async def respond(self, message: Message):
+        for i in range(2):
+            await asyncio.sleep(0)
+            yield f"part {i}"
+
+
+class FailingYieldingIntent(Intent):
+    lead = ("fail",)
+
+    def respond(self, message: Message):
+        yield Reply("first")
+        raise ValueError("Broken generator")
+
+
+class StreamingAbility(Ability):
+    intents = (YieldingIntent, AsyncYieldingIntent, FailingYieldingIntent)
+
+
+class TestReplyStreaming(PyttmanInternalBaseTestCase):
+
+    def setUp(self) -> None:
+        YieldingIntent.produced = []
+        self.router = FirstMatchingRouter(abilities=[StreamingAbility()],
+                                          help_keyword="help",
+                                          intent_unknown_responses=["?"])
+
+    def test_generator_reply_is_consumed_lazily(self):
+        reply = self.router.get_reply(Message("search something"))
+        self.assertIsInstance(reply, ReplyStream)
+        self.assertTrue(reply.is_lazy)
+        self.assertEqual(YieldingIntent.produced, [])
+
+        stream = iter(reply)
+        first = next(stream)
+        self.assertEqual(first.as_str(), "result 0")
+        self.assertEqual(YieldingIntent.produced, [0])
+        self.assertEqual([i.as_str() for i in stream],
+                         ["result 1", "result 2"])
+
+    def test_async_generator_reply(self):
+        reply = self.router.get_reply(Message("report please"))
+        self.assertIsInstance(reply, ReplyStream)
+
+        async def consume():
+            return [i.as_str() async for i in reply]
+
+        self.assertEqual(asyncio.run(consume()), ["part 0", "part 1"])
+        with self.assertRaises(TypeError):
+            list(ReplyStream(AsyncYieldingIntent().respond(Message(""))))
+
+    def test_sync_generator_is_produced_off_the_event_loop(self):
+        threads = []
+
+        def produce():
+            for i in range(2):
+                threads.append(threading.current_thread())
+                yield str(i)
+
+        async def consume():
+            return [i.as_str() async for i in ReplyStream(produce())]
+
+        self.assertEqual(asyncio.run(consume()), ["0", "1"])
+        self.assertNotIn(threading.main_thread(), threads)
+        self.assertFalse(ReplyStream(produce()).is_async)
+        self.assertTrue(self.router.get_reply(
+            Message("report please")).is_async)
+
+    def test_exception_in_generator_yields_error_reply(self):
+        reply = self.router.get_reply(Message("fail now"))
+        chunks = [i.as_str() for i in reply]
+        self.assertEqual(chunks[0], "first")
+        self.assertIn("An internal error occurred", chunks[1])
+
+    def test_eager_collection_stream(self):
+        reply = ReplyStream(["a", "b"])
+        self.assertFalse(reply.is_lazy)
+        self.assertEqual([i.as_str() for i in reply], ["a", "b"])
+        # Never waits for more elements
+        with self.assertRaises(Empty):
+            reply.get()
+
+
+class TestReplyChannel(TestCase):
+
+    def test_bounded_channel_applies_backpressure(self):
+        channel = ReplyChannel(maxsize=2)
+        channel.put("a")
+        channel.put("b")
+        with self.assertRaises(Full):
+            channel.put("c", block=False)
+        with self.assertRaises(Full):
+            channel.put("c", timeout=0.01)
+        self.assertEqual(channel.get().as_str(), "a")
+        channel.put("c", block=False)
+
+    def test_producer_thread_and_consumer(self):
+        channel = ReplyChannel(maxsize=1)
+
+        def produce():
+            with channel:
+                for i in range(20):
+                    channel.put(str(i))
+
+        producer = threading.Thread(target=produce)
+        producer.start()
+        received = [i.as_str() for i in channel]
+        producer.join()
+        self.assertEqual(received, [str(i) for i in range(20)])
+
+    def test_async_consumption(self):
+        channel = ReplyChannel(maxsize=2)
+
+        def produce():
+            with channel:
+                for i in range(5):
+                    channel.put(str(i))
+
+        async def consume():
+            threading.Thread(target=produce).start()
+            return [i.as_str() async for i in channel]
+
+        self.assertEqual(asyncio.run(consume()), ["0", "1", "2", "3", "4"])
+
+    def test_close_semantics(self):
+        channel = ReplyChannel()
+        channel.put("last")
+        channel.close()
+        with self.assertRaises(ReplyChannelClosed):
+            channel.put("too late")
+        self.assertEqual(channel.get().as_str(), "last")
+        with self.assertRaises(ReplyChannelClosed):
+            channel.get()
+        with self.assertRaises(Empty):
+            ReplyChannel().get(timeout=0.01)
+
+    def test_close_wakes_blocked_producer(self):
+        channel = ReplyChannel(maxsize=1)
+        channel.put("a")
+        errors = []
+
+        def produce():
+            try:
+                channel.put("b")
+            except ReplyChannelClosed as e:
+                errors.append(e)
+
+        producer = threading.Thread(target=produce)
+        producer.start()
+        channel.close()
+        producer.join(timeout=1)
+        self.assertEqual(len(errors), 1)
+
+    def test_async_producer_and_consumer(self):
+        channel = ReplyChannel(maxsize=1)
+
+        async def produce():
+            with channel:
+                for i in range(5):
+                    await channel.aput(str(i))
+
+        async def consume():
+            producer = asyncio.create_task(produce())
+            received = [i.as_str() async for i in channel]
+            await producer
+            return received
+
+        self.assertEqual(asyncio.run(consume()), ["0", "1", "2", "3", "4"])
+
+    def test_close_wakes_async_consumer(self):
+        channel = ReplyChannel()
+
+        async def consume():
+            threading.Timer(0.05, channel.close).start()
+            return [i async for i in channel]
+
+        self.assertEqual(asyncio.run(asyncio.wait_for(consume(), 5)), [])
+
+    def test_cancelled_consumer_blocks_no_thread(self):
+        channel = ReplyChannel()
+
+        async def consume():
+            async for _ in channel:
+                pass
+
+        async def cancel_consumer():
+            consumer = asyncio.create_task(consume())
+            await asyncio.sleep(0.01)
+            consumer.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await consumer
+
+        started = threading.active_count()
+        asyncio.run(cancel_consumer())
+        self.assertEqual(threading.active_count(), started)
+        self.assertFalse(channel._async_getters)
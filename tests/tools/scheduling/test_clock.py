@@ -0,0 +1,89 @@
+import time
+from datetime import datetime, timedelta
+from unittest import TestCase
+
+from pyttman.tools.scheduling.clock import VirtualClock
+from pyttman.tools.scheduling.engines.heap import HeapSchedulerEngine
+from pyttman.tools.scheduling.engines.wheel import \
+    TimingWheelSchedulerEngine
+from pyttman.tools.scheduling.schedule import schedule
+from tests.module_helper import PyttmanInternalBaseTestCase
+
+# A monday
+START = datetime(2024, 1, 1, 8, 0)
+
+
+class TestVirtualClock(TestCase):
+
+    def test_advance(self):
+        clock = VirtualClock(START)
+        self.assertEqual(clock.now(), START)
+        clock.advance(timedelta(hours=1))
+        clock.advance(30)
+        self.assertEqual(clock.now(), START + timedelta(hours=1, seconds=30))
+        clock.advance_to(START + timedelta(days=1))
+        self.assertEqual(clock.time(), (START + timedelta(days=1)).timestamp())
+        with self.assertRaises(ValueError):
+            clock.advance(-1)
+
+
+class TestVirtualClockEngines(PyttmanInternalBaseTestCase):
+
+    def setUp(self) -> None:
+        self.clock = VirtualClock(START)
+        self.engine = HeapSchedulerEngine(clock=self.clock)
+        self.runs = []
+        self.jobs = []
+
+    def tearDown(self) -> None:
+        self.engine.shutdown()
+        for job in self.jobs:
+            schedule.name_job_map.popall(job.func_name, None)
+        super().tearDown()
+
+    def schedule_job(self, **kwargs):
+        def run():
+            return self.clock.now()
+
+        job = schedule.method(func=run, recipient=self.runs.append,
+                              engine=self.engine, **kwargs)
+        self.jobs.append(job)
+        return job
+
+    def test_a_week_of_a_daily_job_runs_at_once(self):
+        started = time.perf_counter()
+        self.schedule_job(every="day", at="09:00")
+        for _ in range(7):
+            self.clock.advance(timedelta(days=1))
+            self.assertTrue(self.engine.settle(timeout=5))
+        self.assertLess(time.perf_counter() - started, 5)
+        self.assertEqual(len(self.runs), 7)
+        self.assertEqual(self.runs[0], START + timedelta(days=1))
+
+    def test_passed_points_in_time_are_caught_up(self):
+        job = self.schedule_job(every="hour")
+        self.clock.advance(timedelta(hours=5, minutes=30))
+        self.assertTrue(self.engine.settle(timeout=5))
+        self.assertEqual(len(self.runs), 5)
+        self.assertEqual(job.trigger.next_trigger,
+                         START + timedelta(hours=6))
+        # Nothing is due until the clock is advanced
+        self.assertTrue(self.engine.settle(timeout=5))
+        self.assertEqual(len(self.runs), 5)
+
+    def test_cron_jobs_on_a_timing_wheel(self):
+        self.engine.shutdown()
+        self.engine = TimingWheelSchedulerEngine(clock=self.clock)
+        self.schedule_job(cron="0 9 * * mon-fri")
+        for _ in range(7 * 24):
+            self.clock.advance(timedelta(hours=1))
+            self.assertTrue(self.engine.settle(timeout=5))
+        self.assertEqual(self.runs, [START + timedelta(days=day, hours=1)
+                                     for day in range(5)])
+
+    def test_lateness_is_in_virtual_time(self):
+        job = self.schedule_job(exactly_at=START + timedelta(minutes=1))
+        self.clock.advance(timedelta(minutes=3))
+        self.assertTrue(self.engine.settle(timeout=5))
+        self.assertEqual(job.metrics.lateness.max, 120)
+        self.assertFalse(job.running)
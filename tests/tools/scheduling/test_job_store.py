@@ -0,0 +1,148 @@
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest import TestCase
+
+from pyttman.tools.scheduling.components import CronTrigger, TimeTrigger
+from pyttman.tools.scheduling.engines.heap import HeapSchedulerEngine
+from pyttman.tools.scheduling.schedule import schedule
+from pyttman.tools.scheduling.store import SqliteJobStore, \
+    apply_misfire_policy, callable_name
+from tests.module_helper import PyttmanInternalBaseTestCase
+
+reminded = []
+reminded_event = threading.Event()
+
+
+def remind(text):
+    reminded.append(text)
+    reminded_event.set()
+    return text
+
+
+class TestMisfirePolicy(TestCase):
+
+    def setUp(self) -> None:
+        self.now = datetime.now()
+        self.trigger = TimeTrigger(every="hour")
+        self.trigger.next_trigger = self.now - timedelta(hours=3, minutes=10)
+
+    def test_once_fires_for_the_last_passed_time(self):
+        self.assertTrue(apply_misfire_policy(self.trigger, "once"))
+        self.assertEqual(self.trigger.next_trigger,
+                         self.now - timedelta(minutes=10))
+
+    def test_all_fires_for_each_passed_time(self):
+        next_trigger = self.trigger.next_trigger
+        self.assertTrue(apply_misfire_policy(self.trigger, "all"))
+        self.assertEqual(self.trigger.next_trigger, next_trigger)
+
+        cron = CronTrigger("@hourly")
+        cron.next_trigger = next_trigger.replace(minute=0, second=0,
+                                                 microsecond=0)
+        self.assertTrue(apply_misfire_policy(cron, "all"))
+        self.assertTrue(cron.catch_up)
+        self.assertTrue(cron.is_pulled())
+        self.assertLess(cron.next_trigger, self.now)
+
+    def test_skip_fires_for_the_next_time(self):
+        self.assertTrue(apply_misfire_policy(self.trigger, "skip"))
+        self.assertEqual(self.trigger.next_trigger,
+                         self.now + timedelta(minutes=50))
+
+    def test_passed_one_shot_triggers(self):
+        for misfire, fires in (("once", True), ("all", True),
+                               ("skip", False)):
+            trigger = TimeTrigger(exactly_at=self.now - timedelta(days=1))
+            self.assertEqual(apply_misfire_policy(trigger, misfire), fires)
+
+    def test_future_triggers_are_unchanged(self):
+        trigger = TimeTrigger(exactly_at=self.now + timedelta(days=1))
+        self.assertTrue(apply_misfire_policy(trigger, "skip"))
+        self.assertEqual(trigger.next_trigger, self.now + timedelta(days=1))
+
+
+class TestSqliteJobStore(PyttmanInternalBaseTestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = SqliteJobStore(Path(self.directory.name) / "jobs.db")
+        self.default_engine = schedule.engine
+        self.engine = schedule.engine = HeapSchedulerEngine(max_workers=2)
+        schedule.store = self.store
+        reminded.clear()
+        reminded_event.clear()
+
+    def tearDown(self) -> None:
+        self.engine.shutdown()
+        schedule.engine = self.default_engine
+        schedule.store = None
+        schedule.name_job_map.popall(repr(remind), None)
+        self.store.close()
+        self.directory.cleanup()
+        super().tearDown()
+
+    def test_callable_name(self):
+        self.assertEqual(callable_name(remind), f"{__name__}:remind")
+        with self.assertRaises(ValueError):
+            callable_name(lambda: None)
+
+    def test_jobs_are_saved_when_started(self):
+        due = datetime.now() + timedelta(days=1)
+        job = schedule.method(func=remind, exactly_at=due, persist=True,
+                              misfire="skip", text="Water the plants")
+        [record] = self.store.load()
+        self.assertEqual(record["key"], job.store_key)
+        self.assertEqual(record["func"], callable_name(remind))
+        self.assertIsNone(record["recipient"])
+        self.assertEqual(record["kwargs"], {"text": "Water the plants"})
+        self.assertEqual(record["trigger"].next_trigger, due)
+        self.assertEqual(record["misfire"], "skip")
+
+        job.kill_gracefully()
+        self.assertEqual(self.store.load(), [])
+
+    def test_invalid_jobs_are_not_persisted(self):
+        due = datetime.now() + timedelta(days=1)
+        with self.assertRaises(ValueError):
+            schedule.method(func=lambda: None, exactly_at=due, persist=True)
+        with self.assertRaises(ValueError):
+            schedule.method(func=remind, exactly_at=due, persist=True,
+                            misfire="sometimes", text="")
+        schedule.store = None
+        with self.assertRaises(ValueError):
+            schedule.method(func=remind, exactly_at=due, persist=True,
+                            text="")
+
+    def test_load_jobs_starts_persisted_jobs(self):
+        job = schedule.method(func=remind,
+                              exactly_at=datetime.now() - timedelta(hours=1),
+                              persist=True, start_now=False,
+                              text="Water the plants")
+        # Persisted by an app which was shut down before it was due
+        self.store.save(job)
+        schedule.name_job_map.popall(repr(remind))
+
+        [loaded] = schedule.load_jobs()
+        self.assertEqual(loaded.store_key, job.store_key)
+        self.assertEqual(schedule.load_jobs(), [])
+        self.assertTrue(reminded_event.wait(5))
+        self.assertEqual(reminded, ["Water the plants"])
+        self.assertIs(schedule.get_latest_output(timeout=5), loaded)
+
+        # Done, and thereby deleted from the store
+        self.engine.shutdown()
+        self.assertEqual(self.store.load(), [])
+
+    def test_passed_jobs_are_skipped(self):
+        job = schedule.method(func=remind,
+                              exactly_at=datetime.now() - timedelta(hours=1),
+                              persist=True, start_now=False, misfire="skip",
+                              text="Water the plants")
+        self.store.save(job)
+        schedule.name_job_map.popall(repr(remind))
+
+        self.assertEqual(schedule.load_jobs(), [])
+        self.assertEqual(self.store.load(), [])
+        self.assertEqual(reminded, [])
@@ -0,0 +1,174 @@
+import multiprocessing
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest import TestCase
+
+from pyttman.tools.scheduling.clock import VirtualClock
+from pyttman.tools.scheduling.engines.heap import HeapSchedulerEngine
+from pyttman.tools.scheduling.leases import SqliteLeaseManager, \
+    default_lease_name
+from pyttman.tools.scheduling.schedule import schedule
+from tests.module_helper import PyttmanInternalBaseTestCase
+
+
+def report():
+    return "report"
+
+
+def acquire_lease(path, name):
+    return SqliteLeaseManager(path).acquire(name)
+
+
+class TestSqliteLeaseManager(TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / "leases.sqlite3"
+        self.clock = VirtualClock()
+        self.first = SqliteLeaseManager(self.path, ttl=5, clock=self.clock)
+        self.second = SqliteLeaseManager(self.path, ttl=5, clock=self.clock)
+
+    def tearDown(self) -> None:
+        self.first.close()
+        self.second.close()
+        self.directory.cleanup()
+
+    def test_leases_are_held_until_they_expire(self):
+        self.assertTrue(self.first.acquire("report"))
+        self.assertFalse(self.second.acquire("report"))
+        self.assertTrue(self.second.acquire("other"))
+        self.clock.advance(4)
+        # Renewed by the holder
+        self.assertTrue(self.first.acquire("report"))
+        self.clock.advance(4)
+        self.assertFalse(self.second.acquire("report"))
+        self.clock.advance(1)
+        self.assertTrue(self.second.acquire("report"))
+        self.assertEqual(self.first.holder("report"), self.second.owner)
+        self.assertFalse(self.first.acquire("report"))
+
+    def test_released_leases_are_taken_over_at_once(self):
+        self.assertTrue(self.first.acquire("report"))
+        self.second.release("report")
+        self.assertFalse(self.second.acquire("report"))
+        self.first.release_all()
+        self.assertIsNone(self.first.holder("report"))
+        self.assertTrue(self.second.acquire("report"))
+
+    def test_one_of_many_processes_gets_the_lease(self):
+        with multiprocessing.Pool(4) as pool:
+            acquired = pool.starmap(acquire_lease,
+                                    [(self.path, "report")] * 8)
+        self.assertEqual(acquired.count(True), 1)
+
+    def test_default_lease_name(self):
+        name = default_lease_name(report, {"a": 1}, ("10:00", "day"))
+        self.assertEqual(name, default_lease_name(report, {"a": 1},
+                                                  ("10:00", "day")))
+        self.assertNotEqual(name, default_lease_name(report, {"a": 2},
+                                                     ("10:00", "day")))
+        self.assertEqual(
+            default_lease_name(report, {"b": [1], "a": None},
+                               (None, None, datetime(2024, 1, 1))),
+            default_lease_name(report, {"a": None, "b": [1]},
+                               (None, None, datetime(2024, 1, 1))))
+        with self.assertRaises(ValueError):
+            default_lease_name(lambda: None, {}, ())
+        # Its repr has a memory address, which differs by process
+        with self.assertRaises(ValueError):
+            default_lease_name(report, {"a": object()}, ())
+
+
+class TestLeasedJobs(PyttmanInternalBaseTestCase):
+    """
+    Two apps in one process, each with an engine and leases of its
+    own, as if they ran in two processes.
+    """
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        path = Path(self.directory.name) / "leases.sqlite3"
+        self.clock = VirtualClock(datetime(2024, 1, 1))
+        self.runs = []
+        self.apps = {}
+        for app in ("first", "second"):
+            engine = HeapSchedulerEngine(clock=self.clock)
+            leases = SqliteLeaseManager(path, ttl=5, clock=self.clock)
+            schedule.leases = leases
+            job = schedule.method(func=report, every="second",
+                                  engine=engine,
+                                  recipient=lambda _, app=app:
+                                  self.runs.append(app))
+            self.apps[app] = engine, leases, job
+        schedule.leases = None
+
+    def tearDown(self) -> None:
+        for engine, leases, _ in self.apps.values():
+            engine.shutdown()
+            leases.close()
+        schedule.name_job_map.popall(repr(report), None)
+        self.directory.cleanup()
+        super().tearDown()
+
+    def advance(self, seconds: int) -> None:
+        for _ in range(seconds):
+            self.clock.advance(1)
+            for engine, _, _ in self.apps.values():
+                self.assertTrue(engine.settle(timeout=5))
+
+    def test_jobs_fire_in_one_process(self):
+        _, _, first_job = self.apps["first"]
+        _, _, second_job = self.apps["second"]
+        self.assertEqual(first_job.lease, second_job.lease)
+        self.advance(10)
+        self.assertEqual(len(self.runs), 10)
+        self.assertEqual(len(set(self.runs)), 1)
+        standby = second_job if self.runs[0] == "first" else first_job
+        self.assertEqual(standby.standby_runs, 10)
+
+    def test_another_process_takes_over(self):
+        self.advance(1)
+        owner = self.runs[0]
+        other = "second" if owner == "first" else "first"
+        # The owner dies, without releasing the lease
+        self.apps[owner][0].shutdown()
+        self.advance(10)
+        self.assertEqual(self.runs[1:], [other] * 6)
+
+    def test_killed_jobs_release_their_lease(self):
+        self.advance(1)
+        owner = self.runs[0]
+        other = "second" if owner == "first" else "first"
+        self.apps[owner][2].kill_gracefully()
+        self.advance(1)
+        self.assertEqual(self.runs, [owner, other])
+
+    def test_jobs_can_fire_in_every_process(self):
+        engine, leases, _ = self.apps["first"]
+        schedule.leases = leases
+        try:
+            job = schedule.method(func=report, every="second",
+                                  engine=engine, lease=False)
+        finally:
+            schedule.leases = None
+        self.assertIsNone(job.leases)
+        job.kill_gracefully()
+
+    def test_jobs_without_a_lease_name_fire_in_every_process(self):
+        engine, leases, _ = self.apps["first"]
+        schedule.leases = leases
+        try:
+            with self.assertWarns(UserWarning):
+                bound = schedule.method(func=self.advance, every="second",
+                                        engine=engine, seconds=0)
+            with self.assertWarns(UserWarning):
+                unserializable = schedule.method(func=report, every="second",
+                                                 engine=engine,
+                                                 value=object())
+        finally:
+            schedule.leases = None
+        for job in (bound, unserializable):
+            self.assertIsNone(job.leases)
+            self.assertIsNone(job.lease)
+            job.kill_gracefully()
@@ -0,0 +1,126 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from unittest import TestCase
+
+from pyttman.tools.scheduling.engines.heap import HeapSchedulerEngine
+from pyttman.tools.scheduling.metrics import Histogram
+from pyttman.tools.scheduling.schedule import schedule
+from tests.module_helper import PyttmanInternalBaseTestCase
+
+
+class TestHistogram(TestCase):
+
+    def test_observe_and_quantiles(self):
+        histogram = Histogram(bounds=(0.1, 1.0))
+        for value in (0.05, 0.05, 0.5, 3.0):
+            histogram.observe(value)
+        self.assertEqual(histogram.count, 4)
+        self.assertAlmostEqual(histogram.mean, 0.9)
+        self.assertEqual(histogram.max, 3.0)
+        self.assertEqual(histogram.quantile(0.5), 0.1)
+        self.assertEqual(histogram.quantile(0.75), 1.0)
+        self.assertEqual(histogram.quantile(0.99), 3.0)
+        self.assertEqual(histogram.as_dict()["buckets"],
+                         {"0.1": 2, "1.0": 3, "+Inf": 4})
+
+    def test_empty(self):
+        histogram = Histogram()
+        self.assertEqual(histogram.mean, 0.0)
+        self.assertEqual(histogram.quantile(0.99), 0.0)
+
+
+class TestJobMetrics(PyttmanInternalBaseTestCase):
+
+    def setUp(self) -> None:
+        self.default_engine = schedule.engine
+        self.engine = schedule.engine = HeapSchedulerEngine(max_workers=1)
+        self.jobs = []
+
+    def tearDown(self) -> None:
+        self.engine.shutdown()
+        schedule.engine = self.default_engine
+        for job in self.jobs:
+            schedule.name_job_map.popall(job.func_name, None)
+        super().tearDown()
+
+    def run_jobs(self, *funcs, due: datetime) -> None:
+        done = threading.Semaphore(0)
+        for func in funcs:
+            job = schedule.method(func=func, exactly_at=due,
+                                  recipient=lambda _: done.release())
+            self.jobs.append(job)
+        for _ in funcs:
+            self.assertTrue(done.acquire(timeout=5))
+        # Updated right after the recipient returned
+        while any(job.metrics.runs == 0 for job in self.jobs):
+            time.sleep(0.01)
+
+    def test_lateness_duration_and_queue_wait(self):
+        def slow():
+            time.sleep(0.2)
+
+        def fast():
+            pass
+
+        self.run_jobs(slow, fast, due=datetime.now() - timedelta(seconds=1))
+        slow_job, fast_job = self.jobs
+        for job in self.jobs:
+            self.assertEqual(job.metrics.runs, 1)
+            self.assertEqual(job.metrics.failures, 0)
+            self.assertGreaterEqual(job.metrics.lateness.max, 1.0)
+
+        self.assertGreaterEqual(slow_job.metrics.duration.max, 0.2)
+        # Only one worker, so the fast job waited for the slow one
+        self.assertGreaterEqual(fast_job.metrics.queue_wait.max, 0.15)
+
+    def test_failures_are_counted(self):
+        def fail():
+            raise RuntimeError("Failed")
+
+        job = schedule.method(func=fail, exactly_at=datetime.now())
+        self.jobs.append(job)
+        self.assertIs(schedule.get_latest_output(timeout=5), job)
+        while job.running:
+            time.sleep(0.01)
+        self.assertEqual(job.metrics.runs, 1)
+        self.assertEqual(job.metrics.failures, 1)
+
+        metrics = job.metrics.as_dict()
+        self.assertEqual(metrics["failures"], 1)
+        self.assertEqual(metrics["duration"]["count"], 1)
+        # Done, and thereby no longer kept by schedule
+        self.assertEqual(schedule.get_metrics(job_id=job.native_id), [])
+
+    def test_export_metrics(self):
+        def fast():
+            pass
+
+        done = threading.Event()
+        job = schedule.method(func=fast, every="hour", start_now=False,
+                              recipient=lambda _: done.set())
+        self.jobs.append(job)
+        job.trigger.next_trigger = datetime.now()
+        schedule.start_job(job.func_name)
+        self.assertTrue(done.wait(5))
+        while job.metrics.runs == 0:
+            time.sleep(0.01)
+        exported = json.loads(schedule.export_metrics())
+        [engine] = exported["engines"]
+        self.assertEqual(engine["engine"], "HeapSchedulerEngine")
+        self.assertEqual(engine["max_workers"], 1)
+        [metrics] = [job for job in exported["jobs"]
+                     if job["id"] == self.jobs[0].native_id]
+        self.assertEqual(metrics["runs"], 1)
+
+        exported = schedule.export_metrics("prometheus")
+        self.assertIn("# TYPE pyttman_schedule_job_duration_seconds "
+                      "histogram", exported)
+        self.assertIn(f'pyttman_schedule_job_runs_total{{job="'
+                      f'{self.jobs[0].func_name}",id="'
+                      f'{self.jobs[0].native_id}"}} 1', exported)
+        self.assertIn('pyttman_schedule_engine_max_workers'
+                      '{engine="HeapSchedulerEngine"} 1', exported)
+        with self.assertRaises(ValueError):
+            schedule.export_metrics("xml")
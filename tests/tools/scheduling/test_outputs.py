@@ -0,0 +1,106 @@
+from datetime import datetime
+from types import SimpleNamespace
+from unittest import TestCase
+
+from pyttman.tools.scheduling.clock import system_clock
+from pyttman.tools.scheduling.engines.heap import HeapSchedulerEngine
+from pyttman.tools.scheduling.outputs import JobOutputs
+from pyttman.tools.scheduling.schedule import schedule
+from tests.module_helper import PyttmanInternalBaseTestCase
+
+
+class FakeJob:
+    engine = SimpleNamespace(clock=system_clock)
+
+    def __init__(self, native_id: int, func_name: str):
+        self.native_id = native_id
+        self.func_name = func_name
+        self.result = None
+        self.error = None
+
+    def executed(self, result=None, error=None):
+        self.result, self.error = result, error
+        return self
+
+
+class TestJobOutputs(TestCase):
+
+    def setUp(self) -> None:
+        self.outputs = JobOutputs(per_job=3, max_outputs=5)
+        self.first = FakeJob(1, "first")
+        self.second = FakeJob(2, "second")
+
+    def test_last_outputs_are_kept_per_job(self):
+        for i in range(5):
+            self.outputs.add(self.first.executed(i))
+        self.assertEqual([output.result for output in
+                          self.outputs.get(job_id=1)], [2, 3, 4])
+        self.assertEqual(len(self.outputs), 3)
+        self.assertEqual(self.outputs.latest(job_name="first").result, 4)
+        self.assertIsNone(self.outputs.latest(job_id=2))
+
+    def test_oldest_outputs_are_evicted_first(self):
+        self.outputs.add(self.first.executed("a"))
+        self.outputs.add(self.second.executed("b"))
+        self.outputs.add(self.first.executed("c"))
+        self.outputs.add(self.second.executed("d"))
+        self.outputs.add(self.second.executed("e"))
+        self.outputs.add(self.second.executed("f"))
+        self.assertEqual(len(self.outputs), 5)
+        # "b" was dropped by 'per_job', "a" is evicted by 'max_outputs'
+        self.outputs.add(self.first.executed("g"))
+        self.assertEqual([output.result for output in self.outputs.get()],
+                         ["c", "d", "e", "f", "g"])
+        self.assertEqual([output.result for output in
+                          self.outputs.get(job_name="first")], ["c", "g"])
+
+    def test_errors_are_kept(self):
+        self.outputs.add(self.first.executed("ok"))
+        error = ValueError("Failed")
+        output = self.outputs.add(self.first.executed("ok", error=error))
+        self.assertIsNone(output.result)
+        self.assertIs(output.error, error)
+        self.assertIsInstance(output.finished_at, datetime)
+
+    def test_unread_outputs(self):
+        self.assertFalse(self.outputs.has_unread())
+        with self.assertRaises(TimeoutError):
+            self.outputs.next_unread(timeout=0.01)
+        self.outputs.add(self.first.executed("a"))
+        self.outputs.add(self.second.executed("b"))
+        self.assertEqual(self.outputs.next_unread().result, "a")
+        self.outputs.clear(job_id=2)
+        self.assertFalse(self.outputs.has_unread())
+        # Reading doesn't remove outputs
+        self.assertEqual(len(self.outputs), 1)
+
+    def test_invalid_bounds(self):
+        with self.assertRaises(ValueError):
+            JobOutputs(per_job=0)
+
+
+class TestScheduleOutputs(PyttmanInternalBaseTestCase):
+
+    def setUp(self) -> None:
+        self.default_engine = schedule.engine
+        self.default_outputs = schedule.outputs
+        schedule.engine = HeapSchedulerEngine(max_workers=1)
+        schedule.outputs = JobOutputs()
+
+    def tearDown(self) -> None:
+        schedule.engine.shutdown()
+        schedule.engine = self.default_engine
+        schedule.outputs = self.default_outputs
+        super().tearDown()
+
+    def test_failed_jobs_are_kept_with_their_error(self):
+        def fail():
+            raise ValueError("Failed")
+
+        job = schedule.method(func=fail, exactly_at=datetime.now())
+        self.assertIs(schedule.get_latest_output(timeout=5), job)
+        [output] = schedule.get_outputs(job_id=job.native_id)
+        self.assertIsInstance(output.error, ValueError)
+        self.assertIsNone(output.result)
+        self.assertEqual(schedule.get_outputs(job.func_name), [output])
+        schedule.name_job_map.popall(job.func_name, None)
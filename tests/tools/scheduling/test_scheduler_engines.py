@@ -0,0 +1,380 @@
+import asyncio
+import functools
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from unittest import IsolatedAsyncioTestCase
+
+from pyttman.tools.scheduling.clock import VirtualClock
+from pyttman.tools.scheduling.components import Job
+from pyttman.tools.scheduling.engines.aio import AsyncioSchedulerEngine
+from pyttman.tools.scheduling.engines.heap import HeapSchedulerEngine
+from pyttman.tools.scheduling.engines.wheel import \
+    TimingWheelSchedulerEngine
+from pyttman.tools.scheduling.schedule import schedule
+from tests.module_helper import PyttmanInternalBaseTestCase
+
+
+def process_id():
+    return os.getpid()
+
+
+class ConcurrencyProbe:
+    """
+    Callable recording the most calls executing at once.
+    """
+    def __init__(self, duration: float):
+        self.duration = duration
+        self.lock = threading.Lock()
+        self.executing = self.max_executing = self.calls = 0
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+            self.executing += 1
+            self.max_executing = max(self.max_executing, self.executing)
+        time.sleep(self.duration)
+        with self.lock:
+            self.executing -= 1
+
+
+class TestHeapSchedulerEngine(PyttmanInternalBaseTestCase):
+
+    def setUp(self) -> None:
+        self.default_engine = schedule.engine
+        self.engine = schedule.engine = HeapSchedulerEngine(max_workers=4)
+
+    def tearDown(self) -> None:
+        self.engine.shutdown()
+        schedule.engine = self.default_engine
+        super().tearDown()
+
+    def test_jobs_run_in_order_of_their_trigger(self):
+        now = datetime.now()
+        order, done = [], threading.Event()
+
+        def record(value):
+            order.append(value)
+            if len(order) == 3:
+                done.set()
+
+        for offset in (0.3, 0.1, 0.2):
+            schedule.method(func=lambda offset=offset: offset,
+                            exactly_at=now + timedelta(seconds=offset),
+                            recipient=record)
+        self.assertTrue(done.wait(5))
+        self.assertEqual(order, [0.1, 0.2, 0.3])
+
+    def test_many_jobs_share_one_dispatcher_and_bounded_pool(self):
+        threads_before = threading.active_count()
+        jobs = [schedule.method(func=lambda: None, every="hour")
+                for _ in range(200)]
+        self.assertTrue(all(job.running for job in jobs))
+        self.assertLessEqual(threading.active_count() - threads_before, 5)
+
+        for job in jobs:
+            job.kill_gracefully()
+        self.engine.shutdown()
+        self.assertFalse(any(job.running for job in jobs))
+
+    def test_reoccurring_job_runs_until_killed(self):
+        calls = []
+        job = schedule.method(func=lambda: calls.append(1), every="second",
+                              recipient=lambda _: None, start_now=False)
+        job.trigger.next_trigger = datetime.now()
+        schedule.start_job(job.func_name)
+        time.sleep(1.5)
+        job.kill_gracefully()
+        time.sleep(1.2)
+        self.assertEqual(len(calls), 2)
+        self.assertFalse(job.running)
+        self.assertIsNone(next(schedule.get_jobs(job_id=job.native_id)))
+
+    def test_failing_job_is_not_run_again(self):
+        def fail():
+            raise ValueError("failed")
+
+        job = schedule.method(func=fail, every="second",
+                              recipient=lambda _: None, start_now=False)
+        job.trigger.next_trigger = datetime.now()
+        schedule.start_job(job.func_name)
+        time.sleep(0.3)
+        self.assertIsInstance(job.error, ValueError)
+        self.assertFalse(job.running)
+
+    def test_job_failing_outside_its_function_is_not_run_again(self):
+        class BrokenLeases:
+            def acquire(self, name):
+                raise OSError("disk I/O error")
+
+        job = schedule.method(func=lambda: None, every="second",
+                              recipient=lambda _: None, start_now=False)
+        job.leases, job.lease = BrokenLeases(), "broken"
+        job.trigger.next_trigger = datetime.now()
+        schedule.start_job(job.func_name)
+        self.assertTrue(self.engine.settle(timeout=5))
+        self.assertIsInstance(job.error, OSError)
+        self.assertEqual(job.metrics.failures, 1)
+        self.assertFalse(job.running)
+
+    def test_killed_job_does_not_keep_the_dispatcher_running(self):
+        job = schedule.method(func=lambda: None, every="day")
+        self.assertIsNotNone(self.engine._dispatcher)
+        job.kill_gracefully()
+        self.assertTrue(self.engine.settle(timeout=5))
+        self.assertIsNone(self.engine._dispatcher)
+        self.assertFalse(job.running)
+
+    def test_done_and_killed_jobs_are_forgotten(self):
+        clock = VirtualClock(datetime(2024, 1, 1))
+        engine = HeapSchedulerEngine(clock=clock)
+        self.addCleanup(engine.shutdown)
+
+        def remind():
+            pass
+
+        due = clock.now() + timedelta(minutes=1)
+        jobs = [schedule.method(func=remind, exactly_at=due,
+                                recipient=lambda _: None, engine=engine)
+                for _ in range(100)]
+        reminder = schedule.method(func=remind, every="day",
+                                   recipient=lambda _: None, engine=engine)
+        self.assertEqual(len(schedule.name_job_map.getall(repr(remind))),
+                         101)
+        clock.advance(timedelta(minutes=1))
+        self.assertTrue(engine.settle(timeout=5))
+        self.assertFalse(any(job.running for job in jobs))
+        self.assertEqual(schedule.name_job_map.getall(repr(remind)),
+                         [reminder])
+        self.assertNotIn(jobs[0].native_id, schedule.id_job_map)
+
+        schedule.kill_job_gracefully(job_id=reminder.native_id)
+        self.assertNotIn(repr(remind), schedule.name_job_map)
+        self.assertNotIn(reminder.native_id, schedule.id_job_map)
+
+    def test_options_taken_by_the_function_raise(self):
+        def convert(amount, timezone=None):
+            return amount, timezone
+
+        with self.assertRaises(ValueError):
+            schedule.method(func=convert, every="hour", start_now=False,
+                            amount=1, timezone="UTC")
+        # Passed to the function, and to the job, apart
+        job = schedule.method(func=functools.partial(convert, timezone="UTC"),
+                              cron="0 9 * * *", timezone="Europe/Stockholm",
+                              start_now=False, amount=1)
+        self.assertEqual(job.func(), (1, "UTC"))
+        self.assertEqual(job.trigger.timezone.zone, "Europe/Stockholm")
+        # Arguments of the function left to their defaults are fine
+        job = schedule.method(func=convert, every="hour", start_now=False,
+                              amount=1)
+        self.assertEqual(job.func(), (1, None))
+
+    def test_unstarted_job_is_started_once(self):
+        job = schedule.method(func=lambda: "output", start_now=False,
+                              exactly_at=datetime.now())
+        self.assertIn(job, schedule.get_unstarted_jobs())
+        schedule.start_job(job.func_name)
+        self.assertIs(schedule.get_latest_output(), job)
+        self.assertEqual(job.result, "output")
+        with self.assertRaises(RuntimeError):
+            job.start()
+
+    def test_async_job_runs_in_given_loop_thread_safely(self):
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever)
+        thread.start()
+        loop_threads, done = [], threading.Event()
+
+        async def job():
+            loop_threads.append(threading.current_thread())
+            return "output"
+
+        async def recipient(output):
+            loop_threads.append(threading.current_thread())
+            done.set()
+
+        schedule.method(func=job, exactly_at=datetime.now(),
+                        recipient=recipient, async_loop=loop)
+        self.assertTrue(done.wait(5))
+        self.assertEqual(loop_threads, [thread, thread])
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    def test_overlap_policies(self):
+        probes = {overlap: ConcurrencyProbe(1.5)
+                  for overlap in Job.overlap_policies}
+        jobs = {}
+        for overlap, probe in probes.items():
+            jobs[overlap] = schedule.method(func=probe, every="second",
+                                            overlap=overlap, start_now=False,
+                                            recipient=lambda _: None)
+            jobs[overlap].trigger.next_trigger = datetime.now()
+            schedule.start_job(jobs[overlap].func_name)
+        time.sleep(2.2)
+        for job in jobs.values():
+            job.kill_gracefully()
+
+        self.assertEqual(probes["queue"].max_executing, 1)
+        self.assertEqual(probes["queue"].calls, 2)
+        self.assertEqual(jobs["queue"].skipped_runs, 0)
+        self.assertEqual(probes["skip"].max_executing, 1)
+        self.assertEqual(probes["skip"].calls, 2)
+        self.assertGreaterEqual(jobs["skip"].skipped_runs, 1)
+        self.assertEqual(probes["allow"].max_executing, 2)
+        self.assertEqual(probes["allow"].calls, 3)
+
+    def test_jobs_execute_in_named_pools(self):
+        processes = schedule.create_pool("test-processes", max_workers=1,
+                                         processes=True)
+        single = schedule.create_pool("test-single", max_workers=1)
+        try:
+            with self.assertRaises(ValueError):
+                schedule.create_pool("test-single", max_workers=2)
+            with self.assertRaises(ValueError):
+                schedule.method(func=process_id, executor="missing",
+                                exactly_at=datetime.now())
+
+            job = schedule.method(func=process_id, exactly_at=datetime.now(),
+                                  executor="test-processes")
+            self.assertIs(schedule.get_latest_output(), job)
+            self.assertNotEqual(job.result, os.getpid())
+
+            probe = ConcurrencyProbe(0.2)
+            for _ in range(3):
+                schedule.method(func=probe, exactly_at=datetime.now(),
+                                executor="test-single",
+                                recipient=lambda _: None)
+            time.sleep(0.8)
+            self.assertEqual(probe.calls, 3)
+            self.assertEqual(probe.max_executing, 1)
+        finally:
+            for name in ("test-processes", "test-single"):
+                schedule.pools.pop(name).shutdown()
+
+
+class TestAsyncioSchedulerEngine(PyttmanInternalBaseTestCase,
+                                 IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self) -> None:
+        self.default_engine = schedule.engine
+        self.engine = schedule.engine = AsyncioSchedulerEngine()
+
+    async def asyncTearDown(self) -> None:
+        self.engine.shutdown()
+        schedule.engine = self.default_engine
+
+    async def test_jobs_run_in_attached_loop(self):
+        outputs = []
+
+        async def job():
+            return asyncio.get_running_loop()
+
+        async def recipient(output):
+            outputs.append(output)
+
+        schedule.method(func=job, exactly_at=datetime.now(),
+                        recipient=recipient)
+        schedule.method(func=threading.current_thread,
+                        exactly_at=datetime.now(), recipient=outputs.append)
+        await asyncio.sleep(0.1)
+        self.assertEqual(outputs, [])
+
+        loop = asyncio.get_running_loop()
+        self.engine.attach(loop)
+        await asyncio.sleep(0.1)
+        self.assertIn(loop, outputs)
+        self.assertEqual(len(outputs), 2)
+        self.assertNotIn(threading.current_thread(), outputs)
+
+    async def test_jobs_are_timers_until_killed(self):
+        self.engine.attach(asyncio.get_running_loop())
+        calls = []
+        job = schedule.method(func=lambda: calls.append(1), every="second",
+                              recipient=lambda _: None)
+        self.assertEqual(len(self.engine._timers), 1)
+        await asyncio.to_thread(job.kill_gracefully)
+        await asyncio.sleep(0.01)
+        self.assertEqual(self.engine._timers, {})
+        self.assertFalse(job.running)
+        self.assertEqual(calls, [])
+
+    async def test_reoccurring_job_is_scheduled_again(self):
+        self.engine.attach(asyncio.get_running_loop())
+        calls = []
+        job = schedule.method(func=lambda: calls.append(1), every="second",
+                              recipient=lambda _: None, start_now=False)
+        job.trigger.next_trigger = datetime.now()
+        job.start()
+        await asyncio.sleep(1.2)
+        self.assertEqual(len(calls), 2)
+        self.assertTrue(job.running)
+        self.engine.shutdown()
+        self.assertFalse(job.running)
+
+    async def test_failed_job_is_stopped_once(self):
+        self.engine.attach(asyncio.get_running_loop())
+        stopped = []
+
+        def fail():
+            raise ValueError("failed")
+
+        job = schedule.method(func=fail, every="second", overlap="skip",
+                              recipient=lambda _: None, start_now=False)
+        job.on_stopped = stopped.append
+        job.trigger.next_trigger = datetime.now()
+        job.start()
+        await asyncio.sleep(0.1)
+        self.assertIsInstance(job.error, ValueError)
+        self.assertEqual(stopped, [job])
+        self.assertEqual(self.engine._timers, {})
+
+
+class TestTimingWheelSchedulerEngine(PyttmanInternalBaseTestCase):
+
+    def setUp(self) -> None:
+        # Spans 0.01 * 4 ** 3 = 0.64 seconds
+        self.engine = TimingWheelSchedulerEngine(tick=0.01, slots=4,
+                                                 levels=3)
+
+    def tearDown(self) -> None:
+        self.engine.shutdown()
+        super().tearDown()
+
+    def test_jobs_run_in_order_when_due(self):
+        now = datetime.now()
+        fired, done = [], threading.Event()
+
+        def record(offset):
+            fired.append((offset, datetime.now() - now))
+            if len(fired) == 5:
+                done.set()
+
+        for offset in (0.9, 0.05, 0.3, 0, 0.15):
+            schedule.method(func=lambda offset=offset: offset,
+                            exactly_at=now + timedelta(seconds=offset),
+                            recipient=record, engine=self.engine)
+        self.assertTrue(done.wait(5))
+        self.assertEqual([offset for offset, _ in fired],
+                         [0, 0.05, 0.15, 0.3, 0.9])
+        for offset, elapsed in fired:
+            self.assertGreaterEqual(elapsed.total_seconds(), offset)
+            self.assertLess(elapsed.total_seconds(), offset + 0.2)
+
+    def test_pending_jobs_are_removed_when_killed_by_name(self):
+        def remind():
+            pass
+
+        due = datetime.now() + timedelta(days=30)
+        jobs = [schedule.method(func=remind, exactly_at=due,
+                                engine=self.engine)
+                for _ in range(10_000)]
+        self.assertEqual(self.engine._scheduled(), 10_000)
+        jobs[0].kill_gracefully()
+        self.assertEqual(self.engine._scheduled(), 9_999)
+
+        schedule.kill_job_gracefully(job_name=repr(remind))
+        self.assertEqual(self.engine._scheduled(), 0)
+        self.assertFalse(any(job.running for job in jobs))
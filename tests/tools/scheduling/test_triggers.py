@@ -0,0 +1,119 @@
+import os
+import time
+from datetime import datetime, timedelta
+from unittest import TestCase, skipUnless
+
+import pytz
+
+from pyttman.tools.scheduling.clock import VirtualClock
+from pyttman.tools.scheduling.components import CronTrigger, TimeTrigger
+from pyttman.tools.scheduling.schedule import schedule
+
+
+class TestTimeTrigger(TestCase):
+
+    def test_weekday_is_found_without_stepping(self):
+        trigger = TimeTrigger(every="friday", at="10:00")
+        self.assertEqual(trigger.next_trigger.weekday(), 4)
+        self.assertGreater(trigger.next_trigger, datetime.now())
+        self.assertLessEqual(trigger.next_trigger - datetime.now(),
+                             timedelta(days=7))
+
+
+    @skipUnless(hasattr(time, "tzset"), "the local timezone can't be set")
+    def test_due_in_the_hour_repeated_when_dst_ends(self):
+        default = os.environ.get("TZ")
+        os.environ["TZ"] = "Europe/Stockholm"
+        time.tzset()
+        try:
+            # 02:10 the second time, when the clocks went back at 03:00
+            now = datetime(2026, 10, 25, 2, 10, fold=1).timestamp()
+            trigger = TimeTrigger(exactly_at=datetime(2026, 10, 25, 2, 30),
+                                  clock=VirtualClock(now))
+            # The engines find it due, by its timestamp, and so does it
+            self.assertLess(trigger.next_trigger.timestamp(), now)
+            self.assertTrue(trigger.is_pulled())
+            cron = CronTrigger("30 2 * * *", clock=VirtualClock(now))
+            cron.next_trigger = datetime(2026, 10, 25, 2, 30)
+            self.assertTrue(cron.is_pulled())
+        finally:
+            if default is None:
+                del os.environ["TZ"]
+            else:
+                os.environ["TZ"] = default
+            time.tzset()
+
+
+class TestCronTrigger(TestCase):
+
+    def test_next_after(self):
+        expectations = {
+            # Monday morning, from friday evening
+            ("*/15 9-17 * * mon-fri", datetime(2026, 10, 16, 17, 50)):
+                datetime(2026, 10, 19, 9, 0),
+            ("*/15 9-17 * * mon-fri", datetime(2026, 10, 19, 9, 0)):
+                datetime(2026, 10, 19, 9, 15),
+            # Next leap year
+            ("0 0 29 feb *", datetime(2026, 1, 1)):
+                datetime(2028, 2, 29, 0, 0),
+            # Either the 13th, or a friday
+            ("0 12 13 * fri", datetime(2026, 10, 19)):
+                datetime(2026, 10, 23, 12, 0),
+            ("0 12 13 * fri", datetime(2026, 11, 11)):
+                datetime(2026, 11, 13, 12, 0),
+            ("5/20 * * * *", datetime(2026, 10, 19, 0, 46)):
+                datetime(2026, 10, 19, 1, 5),
+            ("0 0 * * 7", datetime(2026, 12, 31, 12)):
+                datetime(2027, 1, 3, 0, 0),
+            ("@monthly", datetime(2026, 12, 31, 12)):
+                datetime(2027, 1, 1, 0, 0),
+            # Sundays, tuesdays, thursdays and saturdays
+            ("0 0 * * */2", datetime(2026, 10, 19, 12)):
+                datetime(2026, 10, 20, 0, 0),
+            ("0 0 * * */2", datetime(2026, 10, 20, 12)):
+                datetime(2026, 10, 22, 0, 0),
+            # Both an odd day, and a monday
+            ("0 0 */2 * mon", datetime(2026, 10, 19, 12)):
+                datetime(2026, 11, 9, 0, 0),
+        }
+        for (expression, moment), expected in expectations.items():
+            with self.subTest(expression=expression, moment=moment):
+                self.assertEqual(CronTrigger(expression).next_after(moment),
+                                 expected)
+
+    def test_invalid_expressions(self):
+        for expression in ("61 * * * *", "* * *", "1-2-3 * * * *",
+                           "*/0 * * * *", "* * * foo *", "0 0 30 2 *"):
+            with self.subTest(expression=expression):
+                with self.assertRaises(ValueError):
+                    CronTrigger(expression)
+
+    def test_timezone(self):
+        trigger = CronTrigger("30 2 * * *", timezone="Europe/Stockholm")
+        self.assertEqual(trigger.next_trigger.tzinfo.zone, "Europe/Stockholm")
+        self.assertGreater(trigger.next_trigger,
+                           datetime.now(pytz.utc))
+
+        # Skipped when daylight saving time starts
+        tz = trigger.timezone
+        spring = trigger.next_after(datetime(2027, 3, 27, 12))
+        self.assertEqual(tz.normalize(tz.localize(spring)).isoformat(),
+                         "2027-03-28T03:30:00+02:00")
+
+    def test_is_pulled(self):
+        trigger = CronTrigger("@yearly")
+        self.assertFalse(trigger.is_pulled())
+        due = trigger.next_trigger
+        trigger.next_trigger = datetime.now()
+        self.assertTrue(trigger.is_pulled())
+        self.assertEqual(trigger.next_trigger, due)
+        self.assertEqual(trigger.amount_of_runs, 1)
+
+    def test_schedule_method_with_cron(self):
+        job = schedule.method(func=lambda: None, cron="0 9 * * *",
+                              timezone="UTC", start_now=False)
+        self.assertIsInstance(job.trigger, CronTrigger)
+        self.assertEqual(job.trigger.next_trigger.hour, 9)
+        with self.assertRaises(ValueError):
+            schedule.method(func=lambda: None, cron="0 9 * * *",
+                            every="day", start_now=False)
@@ -0,0 +1,75 @@
+from datetime import datetime
+from decimal import Decimal
+from unittest import TestCase
+
+from pyttman.core.containers import Message, MessageMixin, Reply
+from pyttman.core.middleware.tokenization import (
+    WhitespaceTokenizer,
+    PunctuationTokenizer,
+    Token
+)
+
+
+class TestTokenization(TestCase):
+
+    def setUp(self) -> None:
+        self.text = "Add  NEW expense: Coffee, 100 SEK!"
+
+    def test_tokens_carry_forms_and_offsets(self):
+        tokens = list(WhitespaceTokenizer().tokenize(self.text))
+        self.assertEqual([i.raw for i in tokens], self.text.split())
+        for token in tokens:
+            self.assertEqual(self.text[token.start:token.end], token.raw)
+
+        expense = tokens[2]
+        self.assertEqual(expense.casefolded, "expense:")
+        self.assertEqual(expense.sanitized, "expense")
+
+    def test_message_content_is_backwards_compatible(self):
+        message = Message(self.text)
+        self.assertEqual(message.content, self.text.split())
+        self.assertEqual(message.sanitized_content(),
+                         ["add", "new", "expense", "coffee", "100", "sek"])
+        self.assertEqual(message.sanitized_content(preserve_case=True)[1],
+                         "NEW")
+        self.assertEqual(message.lowered_content()[3], "coffee,")
+
+    def test_tokens_follow_mutated_content(self):
+        message = Message(self.text)
+        coffee = message.tokens[3]
+        message.content.remove("NEW")
+        message.remove("expense:")
+        self.assertEqual([i.raw for i in message.tokens],
+                         ["Add", "Coffee,", "100", "SEK!"])
+        self.assertIs(message.tokens[1], coffee)
+        self.assertEqual(message.sanitized_content()[1], "coffee")
+
+    def test_message_from_tokens_keeps_offsets(self):
+        message = Message(self.text)
+        truncated = Message([i for i in message.tokens
+                             if i.casefolded != "add"])
+        self.assertIsInstance(truncated.tokens[0], Token)
+        self.assertEqual(truncated.tokens[0].start, 5)
+        self.assertEqual(truncated.as_str(), "NEW expense: Coffee, 100 SEK!")
+
+    def test_content_is_case_folded(self):
+        message = Message("Straße STRASSE")
+        self.assertEqual(message.lowered_content(), ["strasse", "strasse"])
+        self.assertEqual(message.sanitized_content(), ["strasse", "strasse"])
+        self.assertEqual(message.sanitized_content(preserve_case=True),
+                         ["Straße", "STRASSE"])
+
+    def test_content_of_other_types_is_their_str(self):
+        moment = datetime(2024, 1, 2, 3, 4)
+        self.assertEqual(Reply(moment).as_str(), "2024-01-02 03:04:00")
+        self.assertEqual(Reply(Decimal("1.5")).as_str(), "1.5")
+        self.assertEqual(Reply({"a": 1}).content, ["{'a':", "1}"])
+
+    def test_configured_tokenizer(self):
+        default = MessageMixin.tokenizer
+        try:
+            MessageMixin.tokenizer = PunctuationTokenizer()
+            message = Message("Hi, there!")
+            self.assertEqual(message.content, ["Hi", ",", "there", "!"])
+        finally:
+            MessageMixin.tokenizer = default